@@ -1,7 +1,8 @@
-from flask import Flask
+from flask import Flask, jsonify
 from flask_login import LoginManager
 from flask_mail import Mail, Message
 from dotenv import load_dotenv
+import hmac
 import os
 
 # Load environment variables
@@ -41,7 +42,8 @@ login_manager.login_message = 'Silakan login untuk mengakses halaman ini.'
 
 # Import models dan utils
 from models.user_model import User
-from utils.database import init_db
+from utils.migrations import check_schema
+from utils import db_pool, sql_metrics
 
 # Import controllers
 from controllers.auth_controller import auth_controller
@@ -50,6 +52,7 @@ from controllers.eggmart_controller import eggmart_controller
 from controllers.eggmonitor_controller import eggmonitor_controller
 from controllers.eggmin_controller import eggmin_controller
 from controllers.chat_controller import chat_controller
+from controllers.media_controller import media_controller
 
 # Register blueprints
 app.register_blueprint(auth_controller)
@@ -58,15 +61,64 @@ app.register_blueprint(eggmart_controller, url_prefix='/eggmart')
 app.register_blueprint(eggmonitor_controller, url_prefix='/eggmonitor')
 app.register_blueprint(eggmin_controller, url_prefix='/eggmin')
 app.register_blueprint(chat_controller)
+app.register_blueprint(media_controller)
+
+# Koneksi DB yang dipinjam selama request dikembalikan ke pool saat teardown
+db_pool.init_app(app)
+# Jumlah / waktu query per request, slow query & N+1 (header X-SQL-* di debug)
+sql_metrics.init_app(app)
+
+# Health check: /healthz = proses hidup, /healthz/grading = siap menerima grading
+@app.route('/healthz')
+def healthz():
+    return jsonify(status="ok")
+
+@app.route('/healthz/grading')
+def healthz_grading():
+    from utils.inference_server import readiness
+    info = readiness()
+    return jsonify(info), (200 if info.get("ready") else 503)
+
+# Metrics (JSON) untuk monitoring: isinya detail internal (pool DB, fingerprint
+# SQL), jadi hanya untuk admin yang login atau scraper dengan METRICS_TOKEN.
+def _metrics_allowed():
+    from flask import request
+    from flask_login import current_user
+    from config import METRICS_TOKEN
+    if METRICS_TOKEN:
+        auth = request.headers.get("Authorization", "")
+        if hmac.compare_digest(auth.encode(), f"Bearer {METRICS_TOKEN}".encode()):
+            return True
+    return current_user.is_authenticated and current_user.role == 'admin'
+
+@app.route('/metrics')
+def metrics():
+    if not _metrics_allowed():
+        return jsonify(error="Forbidden"), 403
+    from utils.inference_server import get_stats as inference_stats
+    from utils.grading_jobs import get_stats as job_stats
+    return jsonify(inference=inference_stats(), grading_jobs=job_stats(), db_pool=db_pool.get_stats(), sql=sql_metrics.get_stats())
 
 # User loader untuk Flask-Login
 @login_manager.user_loader
 def load_user(user_id):
     return User.get_by_id(user_id)
 
-# Initialize database
+# Cek versi skema (1 query); migrasi dijalankan lewat `python migrate.py`
 with app.app_context():
-    init_db()
+    check_schema()
+
+# Job grading async yang belum selesai sebelum restart dijadwalkan lagi, lalu
+# job yang macet di 'running' (worker mati) dicek berkala
+from utils.grading_jobs import resume_pending_jobs, start_stale_job_sweeper
+resume_pending_jobs()
+start_stale_job_sweeper()
+
+# Warm-up model grading di background; /healthz/grading 503 sampai selesai
+from config import ML_WARMUP_ON_START
+if ML_WARMUP_ON_START:
+    from utils.inference_server import start_warm_up
+    start_warm_up()
 
 if __name__ == "__main__":
     app.run(debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
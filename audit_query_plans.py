@@ -0,0 +1,210 @@
+"""
+Audit rencana query (EXPLAIN) untuk semua query produksi.
+
+Query diambil langsung dari source (controllers/, utils/, models/): setiap
+`cur.execute(...)` / `executemany(...)` dengan SQL berupa string literal,
+f-string, atau variabel yang di-assign string di fungsi yang sama. Placeholder
+%s diganti nilai contoh sesuai nama kolomnya, lalu `EXPLAIN` dijalankan.
+
+Query gagal audit kalau ada tabel yang:
+  - full table scan (type=ALL), atau
+  - butuh filesort
+dengan estimasi baris > --max-rows. Jalankan terhadap MySQL lokal yang sudah
+berisi data (python migrate.py && python seed_dummy_data.py), supaya
+statistik index realistis:
+
+    python audit_query_plans.py --max-rows 500
+    python audit_query_plans.py --verbose
+
+Exit code: 0 = lolos, 1 = ada query bermasalah, 2 = database tidak tersedia.
+"""
+import argparse
+import ast
+import os
+import re
+import sys
+
+import mysql.connector
+
+from utils.database import get_db_connection
+
+SOURCE_DIRS = ("controllers", "utils", "models")
+SKIP_FILES = {os.path.join("utils", "migrations.py")}
+AUDITED_VERBS = ("SELECT", "UPDATE", "DELETE")
+# Query internal (metadata / lock) yang tidak perlu di-EXPLAIN
+SKIP_PATTERNS = re.compile(r"information_schema|GET_LOCK|RELEASE_LOCK|schema_version", re.I)
+
+_COMPARE_RE = re.compile(r"([\w.]+)\s*(?:=|!=|<>|>=|<=|<|>|LIKE)\s*%s", re.I)
+
+
+# =============== AMBIL QUERY DARI SOURCE ===============
+
+def _sql_text(node):
+    """SQL dari node string / f-string ({...} -> %s); None kalau bukan string."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.JoinedStr):
+        parts = []
+        for value in node.values:
+            if isinstance(value, ast.Constant):
+                parts.append(str(value.value))
+            else:
+                parts.append("%s")
+        return "".join(parts)
+    return None
+
+
+def _string_assignments(func):
+    """{nama variabel: [(lineno, sql), ...]} untuk `nama = "..."` di fungsi."""
+    assigned = {}
+    for node in ast.walk(func):
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            sql = _sql_text(node.value)
+            if sql is not None:
+                assigned.setdefault(node.targets[0].id, []).append((node.lineno, sql))
+    return assigned
+
+
+def extract_queries(root="."):
+    """List (lokasi, sql) dari semua pemanggilan execute/executemany."""
+    queries = []
+    for source_dir in SOURCE_DIRS:
+        for dirpath, _, filenames in os.walk(os.path.join(root, source_dir)):
+            for filename in sorted(filenames):
+                path = os.path.relpath(os.path.join(dirpath, filename), root)
+                if not filename.endswith(".py") or " " in filename or path in SKIP_FILES:
+                    continue
+                with open(os.path.join(root, path), encoding="utf-8") as f:
+                    tree = ast.parse(f.read(), filename=path)
+                for func in ast.walk(tree):
+                    if not isinstance(func, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                        continue
+                    assigned = _string_assignments(func)
+                    for node in ast.walk(func):
+                        if not (
+                            isinstance(node, ast.Call)
+                            and isinstance(node.func, ast.Attribute)
+                            and node.func.attr in ("execute", "executemany")
+                            and node.args
+                        ):
+                            continue
+                        arg = node.args[0]
+                        sql = _sql_text(arg)
+                        if sql is None and isinstance(arg, ast.Name):
+                            earlier = [s for line, s in assigned.get(arg.id, []) if line <= node.lineno]
+                            sql = earlier[-1] if earlier else None
+                        if sql is not None:
+                            queries.append((f"{path}:{node.lineno}", sql))
+    # fungsi bersarang ikut ter-walk 2x -> buang duplikat
+    return list(dict.fromkeys(queries))
+
+
+def _is_auditable(sql):
+    statement = sql.strip().lstrip("(").upper()
+    return statement.startswith(AUDITED_VERBS) and not SKIP_PATTERNS.search(sql)
+
+
+# =============== NILAI CONTOH ===============
+
+def _sample_value(column):
+    column = column.split(".")[-1].lower()
+    if column.endswith("_at") or "date" in column or column in ("d", "day"):
+        return "'2025-01-15 00:00:00'"
+    if column == "id" or column.endswith("_id"):
+        return "1"
+    if column in ("grade",):
+        return "'A'"
+    return "'1'"
+
+
+def bind_sample_params(sql):
+    """Ganti %s dengan nilai contoh (tipe mengikuti kolom pembanding)."""
+    def replace_compare(match):
+        return match.group(0)[:-2] + _sample_value(match.group(1))
+
+    sql = _COMPARE_RE.sub(replace_compare, sql)
+    return sql.replace("%s", "'1'")
+
+
+# =============== EXPLAIN ===============
+
+def _plan_problems(plan, max_rows):
+    problems = []
+    for row in plan:
+        rows = int(row.get("rows") or 0)
+        extra = row.get("Extra") or ""
+        if rows <= max_rows:
+            continue
+        if row.get("type") == "ALL":
+            problems.append(f"full scan {row.get('table')} (~{rows} baris)")
+        if "filesort" in extra:
+            problems.append(f"filesort {row.get('table')} (~{rows} baris)")
+    return problems
+
+
+def audit(max_rows, verbose=False, analyze=True):
+    conn = get_db_connection()
+    if not conn:
+        print("❌ Database tidak tersedia.")
+        return 2
+
+    queries = [(loc, sql) for loc, sql in extract_queries() if _is_auditable(sql)]
+    failed, errors = [], []
+    try:
+        cur = conn.cursor(dictionary=True)
+        if analyze:
+            cur.execute("SHOW TABLES")
+            for row in cur.fetchall():
+                table = list(row.values())[0]
+                cur.execute(f"ANALYZE TABLE `{table}`")
+                cur.fetchall()
+
+        for location, sql in queries:
+            bound = bind_sample_params(sql)
+            try:
+                cur.execute(f"EXPLAIN {bound}")
+                plan = cur.fetchall()
+            except mysql.connector.Error as e:
+                errors.append((location, str(e)))
+                continue
+            problems = _plan_problems(plan, max_rows)
+            if problems:
+                failed.append((location, problems, plan))
+            if verbose or problems:
+                mark = "❌" if problems else "✅"
+                print(f"{mark} {location}")
+                for row in plan:
+                    print(f"     {row.get('table')}: type={row.get('type')} key={row.get('key')} "
+                          f"rows={row.get('rows')} extra={row.get('Extra') or ''}")
+                for problem in problems:
+                    print(f"     -> {problem}")
+        cur.close()
+    finally:
+        conn.close()
+
+    for location, error in errors:
+        print(f"⚠️  {location}: EXPLAIN gagal ({error})")
+    print(f"\n{len(queries)} query diaudit, {len(failed)} bermasalah, "
+          f"{len(errors)} tidak bisa di-EXPLAIN (batas {max_rows} baris).")
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Audit EXPLAIN query produksi EggVision")
+    parser.add_argument("--max-rows", type=int, default=500,
+                        help="Full scan / filesort di atas estimasi baris ini = gagal")
+    parser.add_argument("--verbose", action="store_true", help="Tampilkan rencana semua query")
+    parser.add_argument("--no-analyze", action="store_true", help="Lewati ANALYZE TABLE")
+    parser.add_argument("--list", action="store_true", help="Hanya daftar query yang diaudit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for location, sql in extract_queries():
+            if _is_auditable(sql):
+                print(f"{location}: {' '.join(bind_sample_params(sql).split())[:140]}")
+        return 0
+    return audit(args.max_rows, verbose=args.verbose, analyze=not args.no_analyze)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,265 @@
+"""
+Benchmark pipeline grading (CPU-only, tanpa network).
+
+Mengukur latency per tahap (baca file, quality gate, decode/resize, tiap model,
+compute_grade) dalam p50/p95/p99 + images/sec, untuk beberapa ukuran batch
+dan jumlah thread pemanggil. Korpus = gambar di static/uploads + gambar
+sintetis berbagai resolusi. Hasil disimpan ke JSON supaya bisa dibandingkan
+antar varian model / perubahan kode.
+
+Pemakaian:
+  python benchmark_inference.py
+  python benchmark_inference.py --batch-sizes 1,8,32 --threads 1,2,4 --output bench.json
+  ML_USE_MULTIHEAD=true python benchmark_inference.py --output bench-multihead.json
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from utils import ml_utils, quality_gate
+from utils.image_decode import check_decode_parity
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".webp")
+SYNTHETIC_SIZES = [(640, 480), (1920, 1080), (4032, 3024)]
+
+
+# =============== KORPUS ===============
+
+def synthetic_image(width, height, seed, fmt="JPEG"):
+    """Gambar sintetis: background noise + elips cokelat (mirip telur)."""
+    rng = np.random.default_rng(seed)
+    bg = rng.integers(150, 230, size=(height, width, 3), dtype=np.uint8)
+    img = Image.fromarray(bg)
+    draw = ImageDraw.Draw(img)
+    w, h = int(width * 0.35), int(height * 0.5)
+    cx, cy = width // 2, height // 2
+    draw.ellipse([cx - w // 2, cy - h // 2, cx + w // 2, cy + h // 2], fill=(150, 95, 60))
+    buf = io.BytesIO()
+    img.save(buf, format=fmt, quality=90)
+    return buf.getvalue()
+
+
+def load_corpus(folder, synthetic_per_size=2, limit=None):
+    corpus = []
+    paths = sorted(
+        p for p in glob.glob(os.path.join(folder, "**", "*"), recursive=True)
+        if p.lower().endswith(IMAGE_EXTS)
+    )
+    for path in paths[:limit] if limit else paths:
+        corpus.append({"name": path, "path": path, "source": "uploads"})
+
+    for width, height in SYNTHETIC_SIZES:
+        for i in range(synthetic_per_size):
+            corpus.append({
+                "name": f"synthetic_{width}x{height}_{i}.jpg",
+                "bytes": synthetic_image(width, height, seed=i),
+                "source": f"synthetic_{width}x{height}",
+            })
+    return corpus
+
+
+def read_bytes(item):
+    if "bytes" in item:
+        return item["bytes"]
+    with open(item["path"], "rb") as f:
+        return f.read()
+
+
+# =============== STATISTIK ===============
+
+def summarize(samples_ms, images=None):
+    if not samples_ms:
+        return {"n": 0}
+    arr = np.asarray(samples_ms, dtype="float64")
+    out = {
+        "n": int(arr.size),
+        "mean_ms": round(float(arr.mean()), 3),
+        "p50_ms": round(float(np.percentile(arr, 50)), 3),
+        "p95_ms": round(float(np.percentile(arr, 95)), 3),
+        "p99_ms": round(float(np.percentile(arr, 99)), 3),
+    }
+    total_s = float(arr.sum()) / 1000.0
+    if images and total_s > 0:
+        out["images_per_sec"] = round(images / total_s, 2)
+    return out
+
+
+def _timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - t0) * 1000.0
+
+
+# =============== BENCH PER TAHAP ===============
+
+def bench_stages(corpus, batch_size, repeats):
+    ml_utils.load_models()
+    models = ml_utils._active_models()
+
+    samples = {"read": [], "quality_gate": [], "decode_resize": [], "compute_grade": []}
+    samples.update({f"model_{name}": [] for name, _ in models})
+    n_images = 0
+
+    for _ in range(repeats):
+        for start in range(0, len(corpus), batch_size):
+            items = corpus[start:start + batch_size]
+            arrays = []
+            for item in items:
+                data, ms = _timed(read_bytes, item)
+                samples["read"].append(ms)
+                _, ms = _timed(quality_gate.assess, data)
+                samples["quality_gate"].append(ms)
+                arr, ms = _timed(ml_utils.preprocess_image, io.BytesIO(data))
+                samples["decode_resize"].append(ms)
+                arrays.append(arr)
+            batch = np.concatenate(arrays, axis=0)
+            n_images += len(items)
+
+            for name, model in models:
+                _, ms = _timed(model.predict, batch, batch_size=batch_size, verbose=0)
+                samples[f"model_{name}"].append(ms)
+
+            for _ in items:
+                _, ms = _timed(
+                    ml_utils.compute_grade,
+                    color_label="Brown",
+                    keutuhan_label="Utuh",
+                    kebersihan_label="Bersih",
+                    berat_kategori="Sedang",
+                )
+                samples["compute_grade"].append(ms)
+
+    n_batches = repeats * ((len(corpus) + batch_size - 1) // batch_size)
+    report = {}
+    for stage, values in samples.items():
+        per_batch = stage.startswith("model_")
+        report[stage] = summarize(values, images=n_images)
+        report[stage]["unit"] = "batch" if per_batch else "image"
+    report["batches"] = n_batches
+    report["images"] = n_images
+    return report
+
+
+# =============== BENCH END-TO-END (thread) ===============
+
+def bench_throughput(corpus, batch_size, threads, repeats):
+    """N thread masing-masing menjalankan predict_images end-to-end pada korpus."""
+    payloads = [read_bytes(item) for item in corpus]
+    latencies = []
+    lock = threading.Lock()
+
+    def worker():
+        local = []
+        for _ in range(repeats):
+            for start in range(0, len(payloads), batch_size):
+                chunk = [io.BytesIO(p) for p in payloads[start:start + batch_size]]
+                _, ms = _timed(ml_utils.predict_images, chunk, "Sedang", batch_size=batch_size)
+                local.append(ms)
+        with lock:
+            latencies.extend(local)
+
+    t0 = time.perf_counter()
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    wall_s = time.perf_counter() - t0
+
+    images = threads * repeats * len(payloads)
+    out = summarize(latencies)
+    out["unit"] = "batch"
+    out["images"] = images
+    out["wall_s"] = round(wall_s, 3)
+    out["images_per_sec"] = round(images / wall_s, 2) if wall_s > 0 else 0.0
+    return out
+
+
+# =============== MAIN ===============
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _int_list(value):
+    return [int(x) for x in value.split(",") if x.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pipeline grading EggVision")
+    parser.add_argument("--images", default="static/uploads")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--synthetic-per-size", type=int, default=2)
+    parser.add_argument("--batch-sizes", type=_int_list, default=[1, 8, 32])
+    parser.add_argument("--threads", type=_int_list, default=[1, 2, 4])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--label", default=None, help="Nama varian (mis. multihead, tflite)")
+    parser.add_argument("--output", default="bench_output.json")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.images, args.synthetic_per_size, args.limit)
+    print(f"🖼️  Korpus: {len(corpus)} gambar")
+
+    print("🔥 Warm-up...")
+    warmup = ml_utils.warm_up(args.batch_sizes)
+
+    # Hanya foto asli: noise sintetis per-piksel adalah kasus aliasing terburuk.
+    parity = check_decode_parity([read_bytes(item) for item in corpus if item["source"] == "uploads"])
+    print(f"🔎 Decode cepat vs lama: {parity['identical']}/{parity['n']} identik, "
+          f"worst mean |Δ| {parity['worst_mean_abs_diff']} (toleransi {parity['tolerance_mad']})")
+
+    results = {
+        "meta": {
+            "label": args.label,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "multihead": ml_utils.model_multihead is not None,
+            "corpus_size": len(corpus),
+            "corpus_sources": sorted({item["source"] for item in corpus}),
+        },
+        "warmup_ms": warmup,
+        "decode_parity": parity,
+        "stages": {},
+        "throughput": {},
+    }
+
+    for batch_size in args.batch_sizes:
+        print(f"⏱️  Stage breakdown, batch {batch_size}...")
+        results["stages"][str(batch_size)] = bench_stages(corpus, batch_size, args.repeats)
+
+        for threads in args.threads:
+            print(f"🚀 Throughput, batch {batch_size}, {threads} thread...")
+            tp = bench_throughput(corpus, batch_size, threads, args.repeats)
+            results["throughput"][f"b{batch_size}_t{threads}"] = {
+                "batch_size": batch_size, "threads": threads, **tp,
+            }
+            print(f"   {tp['images_per_sec']:8.2f} img/s  p95 {tp['p95_ms']:.1f} ms/batch")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Hasil disimpan ke {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""
+Gabungkan 3 model grading (keutuhan, ketebalan/warna, kebersihan) menjadi
+1 model multi-output: satu backbone EfficientNetB0 bersama + 3 head.
+
+Langkah:
+  1. Backbone diambil dari model ketebalan, head tiap model disalin apa adanya.
+  2. (Opsional) distilasi: model gabungan di-fine-tune memakai soft label
+     dari 3 model asli (teacher) pada gambar di folder dataset.
+  3. Cek paritas terhadap jalur 3 model (utils.ml_utils.check_multihead_parity).
+
+Pemakaian:
+  python build_multihead_model.py --images static/uploads --epochs 5
+  ML_USE_MULTIHEAD=true  -> predict_image memakai model gabungan
+"""
+import argparse
+import glob
+import os
+import sys
+
+import numpy as np
+from tensorflow import keras
+from tensorflow.keras.models import load_model
+from tensorflow.keras.preprocessing.image import load_img, img_to_array
+
+from config import MULTIHEAD_MODEL_PATH
+
+IMG_SIZE = (224, 224)
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".webp")
+
+# Urutan harus sama dengan utils.ml_utils.MULTIHEAD_OUTPUTS
+TEACHER_PATHS = {
+    "keutuhan": "static/model-keutuhan.keras",
+    "color": "static/model-ketebalan.keras",
+    "kebersihan": "static/model-kebersihan.keras",
+}
+BACKBONE_FROM = "color"
+
+
+def _split_model(model):
+    """Pisahkan (layer sebelum backbone, backbone, layer head)."""
+    for i, layer in enumerate(model.layers):
+        if isinstance(layer, keras.Model):
+            prefix = [
+                l for l in model.layers[:i]
+                if not isinstance(l, keras.layers.InputLayer)
+                and not l.__class__.__name__.startswith("Random")  # augmentasi
+            ]
+            return prefix, layer, model.layers[i + 1:]
+    raise ValueError(f"Backbone (nested model) tidak ditemukan di {model.name}")
+
+
+def _clone_layer(layer, name):
+    config = layer.get_config()
+    config["name"] = name
+    return layer.__class__.from_config(config)
+
+
+def build_multihead(teachers):
+    prefix, backbone, _ = _split_model(teachers[BACKBONE_FROM])
+
+    shared = keras.models.clone_model(backbone)
+    shared.set_weights(backbone.get_weights())
+
+    inputs = keras.Input(shape=IMG_SIZE + (3,), name="image")
+    x = inputs
+    copied = []
+    for layer in prefix:
+        new = _clone_layer(layer, f"pre_{layer.name}")
+        x = new(x)
+        copied.append((new, layer))
+    feats = shared(x)
+
+    outputs = []
+    for head, model in teachers.items():
+        _, _, head_layers = _split_model(model)
+        h = feats
+        for j, layer in enumerate(head_layers):
+            is_last = j == len(head_layers) - 1
+            new = _clone_layer(layer, head if is_last else f"{head}_{layer.name}")
+            h = new(h)
+            copied.append((new, layer))
+        outputs.append(h)
+
+    merged = keras.Model(inputs, outputs, name="eggvision_multihead")
+    for new, old in copied:
+        new.set_weights(old.get_weights())
+    return merged
+
+
+def load_images(folder, limit=None):
+    paths = sorted(
+        p for p in glob.glob(os.path.join(folder, "**", "*"), recursive=True)
+        if p.lower().endswith(IMAGE_EXTS)
+    )
+    if limit:
+        paths = paths[:limit]
+
+    arrays, used = [], []
+    for path in paths:
+        try:
+            img = load_img(path, target_size=IMG_SIZE)
+        except Exception as e:
+            print(f"   ⚠️  Skip {path}: {e}")
+            continue
+        arrays.append(img_to_array(img))
+        used.append(path)
+
+    if not arrays:
+        return np.zeros((0,) + IMG_SIZE + (3,), dtype="float32"), used
+    return np.stack(arrays).astype("float32"), used
+
+
+def distill(merged, teachers, images, epochs, batch_size, learning_rate):
+    # Augmentasi ringan: flip horizontal, supaya head tidak hafal gambar
+    x = np.concatenate([images, images[:, :, ::-1, :]], axis=0)
+    targets = {
+        head: model.predict(x, batch_size=batch_size, verbose=0)
+        for head, model in teachers.items()
+    }
+
+    merged.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
+        loss={head: "categorical_crossentropy" for head in teachers},
+    )
+    merged.fit(
+        x,
+        targets,
+        epochs=epochs,
+        batch_size=batch_size,
+        shuffle=True,
+        verbose=2,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bangun model grading multi-head")
+    parser.add_argument("--images", default="static/uploads",
+                        help="Folder gambar untuk distilasi & cek paritas")
+    parser.add_argument("--output", default=MULTIHEAD_MODEL_PATH)
+    parser.add_argument("--epochs", type=int, default=5,
+                        help="Epoch distilasi (0 = hanya gabung bobot)")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--learning-rate", type=float, default=1e-4)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--min-agreement", type=float, default=98.0,
+                        help="Minimal %% label sama per fitur agar lolos paritas")
+    args = parser.parse_args(argv)
+
+    print("📦 Loading teacher models...")
+    teachers = {head: load_model(path) for head, path in TEACHER_PATHS.items()}
+
+    print("🔧 Building shared-backbone model...")
+    merged = build_multihead(teachers)
+
+    images, paths = load_images(args.images, args.limit)
+    print(f"🖼️  {len(paths)} gambar dari {args.images}")
+
+    if args.epochs > 0 and len(paths):
+        print(f"🎓 Distilasi {args.epochs} epoch...")
+        distill(merged, teachers, images, args.epochs, args.batch_size, args.learning_rate)
+
+    merged.save(args.output)
+    print(f"✅ Model gabungan disimpan ke {args.output}")
+
+    if not len(paths):
+        print("⚠️  Tidak ada gambar, cek paritas dilewati.")
+        return 0
+
+    print("🔍 Cek paritas vs jalur 3 model...")
+    from utils.ml_utils import check_multihead_parity
+
+    report = check_multihead_parity(list(images), model=merged)
+    ok = True
+    for head, pct in report["agreement"].items():
+        diff = report["max_conf_diff"][head]
+        mark = "✅" if pct >= args.min_agreement else "❌"
+        ok = ok and pct >= args.min_agreement
+        print(f"   {mark} {head:<11} agreement {pct:6.2f}%  max conf diff {diff:6.2f}")
+
+    if not ok:
+        print("❌ Paritas di bawah ambang, jangan aktifkan ML_USE_MULTIHEAD.")
+        return 1
+    print("✨ Paritas OK. Set ML_USE_MULTIHEAD=true untuk memakai model gabungan.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,10 +13,128 @@ DB_CONFIG = {
     'collation': 'utf8mb4_unicode_ci'
 }
 
+# Pool koneksi MySQL (utils/db_pool.py): 1 koneksi per request, dipakai ulang.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT_S = float(os.getenv("DB_POOL_TIMEOUT_S", "10"))
+# Ping hanya koneksi yang menganggur lebih lama dari ini; recycle < wait_timeout MySQL.
+DB_POOL_PING_AFTER_S = float(os.getenv("DB_POOL_PING_AFTER_S", "30"))
+DB_POOL_RECYCLE_S = float(os.getenv("DB_POOL_RECYCLE_S", "3600"))
+
+# Statistik query per request (utils/sql_metrics.py): slow log, deteksi N+1,
+# header X-SQL-* (otomatis di app.debug) dan /metrics.
+SQL_METRICS_ENABLED = os.getenv("SQL_METRICS_ENABLED", "true").lower() == "true"
+SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", "200"))
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))  # fingerprint sama per request
+SQL_DEBUG_HEADERS = os.getenv("SQL_DEBUG_HEADERS", "false").lower() == "true"
+
+# /metrics hanya untuk admin yang login, atau scraper dengan header
+# "Authorization: Bearer <METRICS_TOKEN>" (kosong = token tidak dipakai).
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Migrasi skema (utils/migrations.py) dijalankan lewat `python migrate.py`;
+# true = startup ikut menjalankan migrasi yang tertinggal (praktis untuk dev).
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "false").lower() == "true"
+# Batas tunggu metadata lock untuk DDL, supaya ALTER tidak menahan query aplikasi.
+DB_DDL_LOCK_WAIT_S = int(os.getenv("DB_DDL_LOCK_WAIT_S", "10"))
+
 # ML Model configuration
 MODEL_PATH = "static/cangkang-cnn.keras"
 CLASS_NAMES = ["Brown", "DarkBrown", "LightBrown"]
 UPLOAD_FOLDER = "static/uploads"
+# File upload ditulis ke disk di thread background, paralel dengan grading.
+UPLOAD_WRITE_WORKERS = int(os.getenv("UPLOAD_WRITE_WORKERS", "2"))
+UPLOAD_WRITE_TIMEOUT_S = float(os.getenv("UPLOAD_WRITE_TIMEOUT_S", "30"))
+# Thumbnail / varian ukuran gambar upload (utils/thumbnails.py), cache di disk.
+THUMB_DIR = os.getenv("THUMB_DIR", "static/thumbs")
+THUMB_WEBP_QUALITY = int(os.getenv("THUMB_WEBP_QUALITY", "80"))
+THUMB_JPEG_QUALITY = int(os.getenv("THUMB_JPEG_QUALITY", "82"))
+THUMB_CACHE_MAX_AGE = int(os.getenv("THUMB_CACHE_MAX_AGE", str(30 * 24 * 3600)))
+
+# Model gabungan (1 backbone EfficientNetB0, 3 head) -> 1 forward pass per telur.
+# Dibangun dengan `python build_multihead_model.py`.
+ML_USE_MULTIHEAD = os.getenv("ML_USE_MULTIHEAD", "false").lower() == "true"
+MULTIHEAD_MODEL_PATH = os.getenv("MULTIHEAD_MODEL_PATH", "static/model-multihead.keras")
+
+# Cascade: model keutuhan dulu; telur retak dengan confidence >= ambang langsung
+# Reject tanpa model warna & kebersihan. Di bawah ambang -> dicek ulang model
+# keutuhan yang lebih kuat (Keras float32 / multihead); tetap Retak -> Reject.
+ML_CASCADE = os.getenv("ML_CASCADE", "false").lower() == "true"
+ML_CASCADE_REJECT_CONF = float(os.getenv("ML_CASCADE_REJECT_CONF", "90"))
+
+# Runtime model: keras (float32 .keras) atau tflite (INT8 .tflite, lihat export_tflite.py)
+ML_RUNTIME = os.getenv("ML_RUNTIME", "keras").lower()
+TFLITE_VARIANT = os.getenv("TFLITE_VARIANT", "int8")  # int8 | dynamic | float16
+TFLITE_NUM_THREADS = int(os.getenv("TFLITE_NUM_THREADS", str(os.cpu_count() or 1)))
+
+# Decode cepat (utils/image_decode.py): JPEG draft + reduce, bukan decode penuh.
+# false = load_img Keras seperti semula. Bitmap lebih besar dari batas ditolak.
+ML_FAST_DECODE = os.getenv("ML_FAST_DECODE", "true").lower() == "true"
+ML_MAX_IMAGE_PIXELS = int(os.getenv("ML_MAX_IMAGE_PIXELS", str(50_000_000)))
+
+# Inference server (utils/inference_server.py)
+# direct = predict langsung per request, batch = micro-batching antar request
+INFERENCE_MODE = os.getenv("INFERENCE_MODE", "direct").lower()
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "8"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "10"))
+INFERENCE_MAX_QUEUE = int(os.getenv("INFERENCE_MAX_QUEUE", "256"))
+INFERENCE_TIMEOUT_S = float(os.getenv("INFERENCE_TIMEOUT_S", "60"))
+
+# Bulk upload multi-file / ZIP (utils/bulk_ingest.py)
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "32"))
+BULK_MAX_FILES = int(os.getenv("BULK_MAX_FILES", "5000"))
+BULK_MAX_ENTRY_BYTES = int(os.getenv("BULK_MAX_ENTRY_BYTES", str(20 * 1024 * 1024)))
+
+# Grading async (utils/grading_jobs.py): POST /eggmonitor/upload-async -> 202 + job id
+GRADING_JOB_WORKERS = int(os.getenv("GRADING_JOB_WORKERS", "1"))
+GRADING_JOB_MAX_ATTEMPTS = int(os.getenv("GRADING_JOB_MAX_ATTEMPTS", "3"))
+GRADING_JOB_STALE_S = int(os.getenv("GRADING_JOB_STALE_S", "300"))  # job 'running' dianggap macet
+GRADING_JOB_SWEEP_S = int(os.getenv("GRADING_JOB_SWEEP_S", "60"))   # interval cek job macet (0 = mati)
+
+# Warm-up model saat start: jalankan batch dummy di ukuran batch berikut, lalu
+# tandai worker "ready". Selama belum ready, upload grading ditolak sementara.
+ML_WARMUP_ON_START = os.getenv("ML_WARMUP_ON_START", "false").lower() == "true"
+ML_WARMUP_BATCH_SIZES = [
+    int(x) for x in os.getenv("ML_WARMUP_BATCH_SIZES", f"1,{INFERENCE_MAX_BATCH_SIZE}").split(",")
+    if x.strip()
+]
+
+# Prediction cache (utils/prediction_cache.py): kunci = sha256 isi gambar + versi model
+PREDICTION_CACHE_ENABLED = os.getenv("PREDICTION_CACHE_ENABLED", "true").lower() == "true"
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "1024"))
+PREDICTION_CACHE_DB_ENABLED = os.getenv("PREDICTION_CACHE_DB_ENABLED", "true").lower() == "true"
+PREDICTION_CACHE_DB_MAX_ROWS = int(os.getenv("PREDICTION_CACHE_DB_MAX_ROWS", "100000"))
+# last_hit_at baris cache hanya diperbarui kalau sudah lebih lama dari ini (detik)
+PREDICTION_CACHE_TOUCH_INTERVAL_S = int(os.getenv("PREDICTION_CACHE_TOUCH_INTERVAL_S", "600"))
+# Versi model (stat file model) dihitung ulang paling cepat tiap N detik
+PREDICTION_CACHE_VERSION_TTL_S = float(os.getenv("PREDICTION_CACHE_VERSION_TTL_S", "30"))
+# Baris versi model lain dibuang kalau tidak dipakai selama ini (rolling deploy aman)
+PREDICTION_CACHE_OLD_VERSION_TTL_S = int(os.getenv("PREDICTION_CACHE_OLD_VERSION_TTL_S", str(24 * 3600)))
+
+# Quality gate sebelum inference (utils/quality_gate.py): tolak foto buram,
+# gelap/silau, atau tanpa telur. Ambang disesuaikan per kamera/deployment.
+QUALITY_GATE_ENABLED = os.getenv("QUALITY_GATE_ENABLED", "true").lower() == "true"
+QUALITY_GATE_MAX_SIDE = int(os.getenv("QUALITY_GATE_MAX_SIDE", "128"))
+QUALITY_MIN_SHARPNESS = float(os.getenv("QUALITY_MIN_SHARPNESS", "15"))    # variansi Laplacian
+QUALITY_MIN_BRIGHTNESS = float(os.getenv("QUALITY_MIN_BRIGHTNESS", "35"))  # 0-255
+QUALITY_MAX_BRIGHTNESS = float(os.getenv("QUALITY_MAX_BRIGHTNESS", "235"))
+QUALITY_MAX_CLIPPED = float(os.getenv("QUALITY_MAX_CLIPPED", "0.5"))       # porsi piksel clipping
+QUALITY_REQUIRE_EGG = os.getenv("QUALITY_REQUIRE_EGG", "true").lower() == "true"
+QUALITY_MIN_EGG_AREA = float(os.getenv("QUALITY_MIN_EGG_AREA", "0.03"))    # porsi luas foto
+QUALITY_MAX_EGG_AREA = float(os.getenv("QUALITY_MAX_EGG_AREA", "0.95"))
+
+# Mode tray (utils/tray_utils.py): deteksi tiap telur di 1 foto tray.
+# Tidak ada telur / lebih dari TRAY_MAX_EGGS -> foto ditolak (tanpa fallback grid).
+TRAY_DETECT_MAX_SIDE = int(os.getenv("TRAY_DETECT_MAX_SIDE", "320"))  # resolusi segmentasi
+TRAY_GRID_ROWS = int(os.getenv("TRAY_GRID_ROWS", "5"))   # tata letak tray: mode=grid eksplisit + resolusi decode
+TRAY_GRID_COLS = int(os.getenv("TRAY_GRID_COLS", "6"))
+TRAY_MAX_EGGS = int(os.getenv("TRAY_MAX_EGGS", "60"))
+
+# Worker pool di luar proses web (INFERENCE_MODE=pool), jalankan:
+#   python -m utils.inference_pool
+INFERENCE_POOL_ADDRESS = os.getenv("INFERENCE_POOL_ADDRESS", "/tmp/eggvision-inference.sock")
+INFERENCE_POOL_WORKERS = int(os.getenv("INFERENCE_POOL_WORKERS", "2"))
+INFERENCE_POOL_AUTHKEY = os.getenv("INFERENCE_POOL_AUTHKEY", os.getenv("SECRET_KEY", "dev-secret-key"))
 
 # App configuration
 SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key')
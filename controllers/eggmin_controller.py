@@ -5,6 +5,7 @@ from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash
 from utils.database import get_db_connection
+from utils.thumbnails import pregenerate_async
 from datetime import datetime
 import mysql.connector
 
@@ -23,6 +24,24 @@ def restrict_eggmin_access():
         flash('Hanya Admin yang dapat mengakses halaman ini.', 'error')
         return redirect(url_for('comprof_controller.comprof_beranda'))
 
+# Varian thumbnail yang dipakai template per folder upload (lihat thumb_url di
+# templates/), dibuat di background supaya request pertama tidak menanggung resize
+ADMIN_IMAGE_VARIANTS = {
+    'news': ("md", "lg"),
+    'products': ("sm",),
+}
+
+def save_admin_image(file, folder):
+    """Simpan gambar upload admin ke static/uploads/<folder>/, buat thumbnail-nya, kembalikan URL."""
+    filename = secure_filename(file.filename)
+    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+    new_filename = f"{timestamp}_{filename}"
+    save_path = os.path.join(current_app.root_path, 'static', 'uploads', folder)
+    os.makedirs(save_path, exist_ok=True)
+    file.save(os.path.join(save_path, new_filename))
+    pregenerate_async(f'uploads/{folder}/{new_filename}', variants=ADMIN_IMAGE_VARIANTS.get(folder, ("md",)))
+    return url_for('static', filename=f'uploads/{folder}/{new_filename}')
+
 @eggmin_controller.route('/')
 @login_required
 def eggmin():
@@ -624,13 +643,7 @@ def eggmin_api_news_create():
         if 'image_file' in request.files:
             file = request.files['image_file']
             if file and file.filename != '':
-                filename = secure_filename(file.filename)
-                timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-                new_filename = f"{timestamp}_{filename}"
-                save_path = os.path.join(current_app.root_path, 'static', 'uploads', 'news')
-                os.makedirs(save_path, exist_ok=True)
-                file.save(os.path.join(save_path, new_filename))
-                image_url = url_for('static', filename=f'uploads/news/{new_filename}')
+                image_url = save_admin_image(file, 'news')
 
         if not title or not content:
             return jsonify({'success': False, 'error': 'Title & Content required'}), 400
@@ -708,13 +721,7 @@ def eggmin_api_news_update(news_id):
         if 'image_file' in request.files:
             file = request.files['image_file']
             if file and file.filename != '':
-                filename = secure_filename(file.filename)
-                timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-                new_filename = f"{timestamp}_{filename}"
-                save_path = os.path.join(current_app.root_path, 'static', 'uploads', 'news')
-                os.makedirs(save_path, exist_ok=True)
-                file.save(os.path.join(save_path, new_filename))
-                image_url = url_for('static', filename=f'uploads/news/{new_filename}')
+                image_url = save_admin_image(file, 'news')
         
         conn = get_db_connection()
         try:
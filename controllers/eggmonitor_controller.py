@@ -1,18 +1,25 @@
 # controllers/eggmonitor_controller.py
 import json
-from flask import Blueprint, render_template, request, url_for, redirect, flash, current_app, session, jsonify
+from flask import Blueprint, render_template, request, url_for, redirect, flash, session, jsonify, Response, stream_with_context
 from flask_login import login_required, current_user
 from utils.dashboard_data import build_dashboard_data
 from utils.report_data import build_report_data
 from utils.user_data import build_user_data
-from utils.ml_utils import predict_image
+from utils.inference_server import grade_image, grade_images, grade_multiview, InferenceUnavailable
+from utils.quality_gate import ImageRejected, check_image
+from utils.upload_storage import store_upload_async, wait_saved, discard_upload
+from utils.egg_scan_data import egg_scan_row, insert_egg_scans
+from utils.grading_jobs import enqueue_job, get_job
+from utils.bulk_ingest import ingest, iter_entries
+from utils.thumbnails import pregenerate_async
+from controllers.media_controller import thumb_url
+from utils.tray_utils import decode_tray, locate_eggs, crop_eggs
+from utils.image_decode import ImageTooLarge
 from utils.database import get_db_connection
 from datetime import datetime, timedelta
-import time
-import os
 import mysql.connector
 import paho.mqtt.client as mqtt
-from werkzeug.utils import secure_filename
+from PIL import UnidentifiedImageError
 from flask_login import logout_user
 
 
@@ -30,36 +37,17 @@ def eggmonitor():
 
     data = build_dashboard_data(current_user.id)
 
-    # --- FIX: Calculate Reject Count Separately ---
-    conn = get_db_connection()
-    reject_count = 0
-    if conn:
-        try:
-            cur = conn.cursor()
-            cur.execute("""
-                SELECT COUNT(*) FROM egg_scans 
-                WHERE user_id = %s AND grade = 'Reject'
-            """, (current_user.id,))
-            result = cur.fetchone()
-            if result:
-                reject_count = result[0]
-        except Exception as e:
-            print(f"Error fetching rejects: {e}")
-        finally:
-            conn.close()
-    
-    # Add to data context
-    data['reject_count'] = reject_count
-    
-    # Update grades total to include rejects if not already
-    # Assuming data['grades_total'] sums A+B+C, we add Rejects to it for the total scan count
+    # Reject dihitung dari rollup yang sama (scan_daily_stats) oleh build_dashboard_data
+    reject_count = data.setdefault('reject_count', 0)
+
+    # grades_total hanya A+B+C; tambahkan Reject untuk total scan
     data['grades_total'] = data.get('grades_total', 0) + reject_count
 
     # Ambil hasil scan terakhir dari session (sekali pakai, kayak with() Laravel)
     last_scan = session.pop('last_scan', None)
     if last_scan:
         data.update(
-            uploaded_image = url_for('static', filename=last_scan["image_path"]),
+            uploaded_image = thumb_url(last_scan["image_path"], "md"),
             prediction     = last_scan["prediction"],
             confidence     = last_scan["confidence"],
             scan_details   = last_scan.get("details", {})
@@ -85,64 +73,32 @@ def upload():
         flash('Nama file kosong.', 'error')
         return redirect(url_for("eggmonitor_controller.eggmonitor"))
 
-    filename = secure_filename(file.filename)
-    file_path = os.path.join(current_app.config["UPLOAD_FOLDER"], filename)
-    file.save(file_path)
+    # Bytes dibaca sekali: disimpan ke disk di background, grading dari memori.
+    data = file.read()
+    image_path, saving = store_upload_async(data, file.filename)
 
     # ====== Prediksi gabungan (keutuhan + warna) ======
-    grade, grade_conf, detail = predict_image(file_path)
-
-    # detail: {"keutuhan": "...", "color": "...", ...}
+    try:
+        grade, grade_conf, detail = grade_image(data)
+    except ImageRejected as e:
+        discard_upload(saving, image_path)
+        flash(f'Foto ditolak: {e}', 'error')
+        return redirect(url_for("eggmonitor_controller.eggmonitor"))
+    except (InferenceUnavailable, TimeoutError):
+        discard_upload(saving, image_path)
+        flash('Server grading sedang sibuk, silakan coba lagi.', 'error')
+        return redirect(url_for("eggmonitor_controller.eggmonitor"))
 
-    keutuhan_pred   = detail.get("keutuhan")
-    color_pred      = detail.get("color")
-    kebersihan_pred = detail.get("kebersihan")
-    kesegaran_pred  = detail.get("kesegaran")
-    berat_val       = detail.get("berat_telur") # Numeric (e.g., 54.2)
-    berat_cat       = detail.get("berat")       # Category (e.g., "Sedang")
-    # ketebalan_pred  = detail.get("ketebalan") # Default if not detected
+    # detail: {"keutuhan": "...", "color": "...", "berat_telur": 54.2, "berat": "Sedang", ...}
 
     # Simpan ke tabel egg_scans
     conn = get_db_connection()
     if conn:
         try:
             cur = conn.cursor()
-            cur.execute(
-                """
-                INSERT INTO egg_scans (
-                    user_id,
-                    numeric_id,
-                    scanned_at,
-                    ketebalan,
-                    kebersihan,
-                    keutuhan,
-                    kesegaran,
-                    berat_telur,
-                    berat_cat,
-                    grade,
-                    confidence,
-                    image_path,
-                    status,
-                    is_listed
-                ) VALUES (
-                    %s, %s, NOW(), %s, %s, %s, %s, %s, %s, %s, %s, %s,
-                    'available', FALSE
-                )
-                """,
-                (
-                    current_user.id,
-                    None,             # numeric_id
-                    color_pred,       # ketebalan
-                    kebersihan_pred , # kebersihan
-                    keutuhan_pred,    # keutuhan
-                    kesegaran_pred,   # kesegaran
-                    berat_val,        # berat_telur
-                    berat_cat,        # berat_cat
-                    grade,
-                    grade_conf,
-                    f"uploads/{filename}",
-                )
-            )
+            insert_egg_scans(cur, [
+                egg_scan_row(current_user.id, grade, grade_conf, detail, image_path)
+            ])
             conn.commit()
             cur.close()
         except mysql.connector.Error as e:
@@ -151,17 +107,23 @@ def upload():
         finally:
             conn.close()
 
+    # Foto harus sudah ada di disk sebelum dashboard menampilkannya
+    if not wait_saved(saving):
+        flash("Foto scan gagal disimpan.", "error")
+    else:
+        pregenerate_async(image_path, variants=("md",))
+
     # ====== Simpan hasil ke session untuk 1x tampilan di dashboard ======
     prediction_display = f"Grade {grade}"
 
     session["last_scan"] = {
-        "image_path": f"uploads/{filename}",
+        "image_path": image_path,
         "prediction": prediction_display,
         "confidence": f"{grade_conf:.2f}%",
         "details": {
-                "Ketebalan": detail.get("color", "-"),
+                "Ketebalan": detail.get("color") or "-",   # None kalau dilewati cascade
                 "Keutuhan": detail.get("keutuhan", "-"),
-                "Kebersihan": detail.get("kebersihan", "-"), # Mapping color logic if needed, or use specific field
+                "Kebersihan": detail.get("kebersihan") or "-", # Mapping color logic if needed, or use specific field
                 "Kesegaran": detail.get("kesegaran", "-"),
                 "BeratTelur": detail.get("berat_telur", "-"),
                 "Berat": detail.get("berat", "-")
@@ -174,6 +136,307 @@ def upload():
     return redirect(url_for("eggmonitor_controller.eggmonitor"))
 
 
+def _wants_json():
+    """Klien API (rig konveyor, script) minta JSON lewat ?format=json / Accept."""
+    return (
+        request.args.get("format") == "json"
+        or request.accept_mimetypes.best == "application/json"
+    )
+
+
+def _fail_response(message, status=400):
+    if _wants_json():
+        return jsonify(error=message), status
+    flash(message, 'error')
+    return redirect(url_for("eggmonitor_controller.eggmonitor"))
+
+
+@eggmonitor_controller.route('/upload-tray', methods=['POST'])
+@login_required
+def upload_tray():
+    """
+    Upload 1 foto tray: deteksi tiap telur, grading semua crop dalam 1 batch,
+    simpan 1 baris egg_scans per telur (1 bulk insert).
+    Balas JSON peta grade per posisi kalau diminta (?format=json / Accept JSON),
+    selain itu ringkasan ditampilkan di dashboard.
+    """
+    wants_json = _wants_json()
+    fail = _fail_response
+
+    if current_user.role != 'pengusaha':
+        return fail('Hanya Pengusaha yang dapat mengakses EggMonitor.', 403)
+
+    file = request.files.get("file")
+    if file is None or file.filename == "":
+        return fail('File gambar tidak ditemukan.')
+
+    data = file.read()
+    image_path, saving = store_upload_async(data, file.filename)
+
+    try:
+        img = decode_tray(data)
+        check_image(img, require_egg=False)  # blur & exposure foto tray
+        detections, method = locate_eggs(img, mode=request.form.get("mode", "auto"))
+        crops = crop_eggs(img, detections)
+    except ImageTooLarge:
+        discard_upload(saving, image_path)
+        return fail(f'Foto ditolak: {ImageRejected("too_large")}', 422)
+    except ImageRejected as e:
+        discard_upload(saving, image_path)
+        return fail(f'Foto ditolak: {e}', 422)
+    except (UnidentifiedImageError, OSError) as e:
+        print(f"Tray image error: {e}")
+        discard_upload(saving, image_path)
+        return fail('Gambar tray tidak bisa dibaca.')
+
+    try:
+        results = grade_images(crops)
+    except (InferenceUnavailable, TimeoutError):
+        discard_upload(saving, image_path)
+        return fail('Server grading sedang sibuk, silakan coba lagi.', 503)
+
+    tray_id = f"TRAY-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    rows, tray_map = [], {}
+    for det, (grade, grade_conf, detail) in zip(detections, results):
+        rows.append(egg_scan_row(
+            current_user.id, grade, grade_conf, detail, image_path,
+            numeric_id=f"{tray_id}-{det['position']}",
+        ))
+        tray_map[det["position"]] = {
+            "grade": grade,
+            "confidence": round(grade_conf, 2),
+            "box": list(det["box"]),
+            "keutuhan": detail.get("keutuhan"),
+            "ketebalan": detail.get("color"),
+            "kebersihan": detail.get("kebersihan"),
+            "berat": detail.get("berat"),
+        }
+
+    saved = False
+    conn = get_db_connection()
+    if conn:
+        try:
+            cur = conn.cursor()
+            insert_egg_scans(cur, rows)
+            conn.commit()
+            cur.close()
+            saved = True
+        except mysql.connector.Error as e:
+            conn.rollback()
+            print(f"Insert tray egg_scans error: {e}")
+        finally:
+            conn.close()
+
+    saved = wait_saved(saving) and saved
+
+    summary = {}
+    for info in tray_map.values():
+        summary[info["grade"]] = summary.get(info["grade"], 0) + 1
+
+    if wants_json:
+        return jsonify(
+            tray_id=tray_id,
+            image_path=image_path,
+            method=method,
+            count=len(tray_map),
+            summary=summary,
+            saved=saved,
+            positions=tray_map,
+        ), (200 if saved else 500)
+
+    if not saved:
+        flash("Terjadi kesalahan saat menyimpan data scan tray.", "error")
+        return redirect(url_for("eggmonitor_controller.eggmonitor"))
+
+    session["last_scan"] = {
+        "image_path": image_path,
+        "prediction": f"Tray {len(tray_map)} telur",
+        "confidence": "-",
+        "details": {f"Grade {g}": n for g, n in sorted(summary.items())},
+    }
+    flash(f"Scan tray berhasil: {len(tray_map)} telur disimpan.", "success")
+    return redirect(url_for("eggmonitor_controller.eggmonitor"))
+
+
+@eggmonitor_controller.route('/upload-bulk', methods=['POST'])
+@login_required
+def upload_bulk():
+    """
+    Bulk upload: field `files` (boleh banyak) berisi foto dan/atau arsip .zip.
+    Progres di-stream sebagai NDJSON (1 event JSON per baris); tambahkan
+    ?items=0 untuk hanya menerima event progress + done.
+    """
+    if current_user.role != 'pengusaha':
+        return jsonify(error='Hanya Pengusaha yang dapat mengakses EggMonitor.'), 403
+
+    files = request.files.getlist("files") + request.files.getlist("file")
+    if not any(f.filename for f in files):
+        return jsonify(error='File gambar / ZIP tidak ditemukan.'), 400
+
+    user_id = current_user.id
+    item_events = request.args.get("items", "1") != "0"
+
+    def generate():
+        for event in ingest(user_id, iter_entries(files), item_events=item_events):
+            yield json.dumps(event) + "\n"
+
+    response = Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+    response.headers["X-Accel-Buffering"] = "no"  # jangan di-buffer reverse proxy
+    return response
+
+
+@eggmonitor_controller.route('/upload-async', methods=['POST'])
+@login_required
+def upload_async():
+    """
+    Versi async dari /upload: foto disimpan + job dicatat di grading_jobs, lalu
+    langsung dibalas 202 dengan job id. Hasil diambil lewat /jobs/<job_id>.
+    """
+    if current_user.role != 'pengusaha':
+        return jsonify(error='Hanya Pengusaha yang dapat mengakses EggMonitor.'), 403
+
+    file = request.files.get("file")
+    if file is None or file.filename == "":
+        return jsonify(error='File gambar tidak ditemukan.'), 400
+
+    data = file.read()
+    image_path, saving = store_upload_async(data, file.filename)
+
+    job_id = enqueue_job(
+        current_user.id, image_path, data=data,
+        berat_kategori=request.form.get("berat") or None, saving=saving,
+    )
+    if job_id is None:
+        return jsonify(error='Job grading gagal disimpan, silakan coba lagi.'), 503
+
+    status_url = url_for("eggmonitor_controller.grading_job_status", job_id=job_id)
+    response = jsonify(job_id=job_id, status="queued", status_url=status_url)
+    response.status_code = 202
+    response.headers["Location"] = status_url
+    return response
+
+
+@eggmonitor_controller.route('/jobs/<job_id>')
+@login_required
+def grading_job_status(job_id):
+    """Status job grading async milik user yang login."""
+    job = get_job(job_id, user_id=current_user.id)
+    if job is None:
+        return jsonify(error='Job tidak ditemukan.'), 404
+
+    for key in ("created_at", "started_at", "finished_at"):
+        if job[key] is not None:
+            job[key] = job[key].isoformat()
+    job.pop("user_id", None)
+    if job["image_path"]:
+        job["image_url"] = url_for('static', filename=job["image_path"])
+
+    response = jsonify(job)
+    if job["status"] in ("queued", "running"):
+        response.headers["Retry-After"] = "1"  # klien polling lagi setelah 1 detik
+    return response
+
+
+# Kamera rig konveyor (lihat status_items di utils/dashboard_data.py)
+CAMERA_VIEWS = ("A1", "A2", "A3")
+
+
+@eggmonitor_controller.route('/upload-multiview', methods=['POST'])
+@login_required
+def upload_multiview():
+    """
+    Upload 3 view kamera (field file A1, A2, A3) untuk 1 telur. Probabilitas
+    per view digabung (retak/noda = view terburuk, warna = rata-rata) jadi
+    1 grade, disimpan sebagai 1 baris egg_scans.
+    """
+    if current_user.role != 'pengusaha':
+        return _fail_response('Hanya Pengusaha yang dapat mengakses EggMonitor.', 403)
+
+    view_names, view_paths, view_data, savings = [], [], [], []
+    for name in CAMERA_VIEWS:
+        file = request.files.get(name)
+        if file is None or file.filename == "":
+            continue
+        data = file.read()
+        image_path, saving = store_upload_async(data, file.filename)
+        savings.append((saving, image_path))
+        view_names.append(name)
+        view_paths.append(image_path)
+        view_data.append(data)
+
+    if not view_paths:
+        return _fail_response('File gambar kamera (A1/A2/A3) tidak ditemukan.')
+
+    try:
+        grade, grade_conf, detail = grade_multiview(
+            view_data, request.form.get("berat") or None, view_names=view_names,
+        )
+    except ImageRejected as e:
+        for saving, image_path in savings:
+            discard_upload(saving, image_path)
+        return _fail_response(f'Foto ditolak: {e}', 422)
+    except (InferenceUnavailable, TimeoutError):
+        for saving, image_path in savings:
+            discard_upload(saving, image_path)
+        return _fail_response('Server grading sedang sibuk, silakan coba lagi.', 503)
+
+    # Foto utama = kamera tengah (A2) kalau ada
+    main_path = view_paths[view_names.index('A2')] if 'A2' in view_names else view_paths[0]
+
+    saved = False
+    conn = get_db_connection()
+    if conn:
+        try:
+            cur = conn.cursor()
+            insert_egg_scans(cur, [egg_scan_row(current_user.id, grade, grade_conf, detail, main_path)])
+            conn.commit()
+            cur.close()
+            saved = True
+        except mysql.connector.Error as e:
+            conn.rollback()
+            print(f"Insert multiview egg_scans error: {e}")
+        finally:
+            conn.close()
+
+    if saved:
+        saved = all([wait_saved(saving) for saving, _ in savings])
+    else:
+        # tidak ada baris egg_scans yang mereferensikan file view
+        for saving, image_path in savings:
+            discard_upload(saving, image_path)
+
+    if _wants_json():
+        return jsonify(
+            grade=grade,
+            confidence=round(grade_conf, 2),
+            image_path=main_path,
+            saved=saved,
+            views=detail.get("views", {}),
+            detail={k: v for k, v in detail.items() if k != "views"},
+        ), (200 if saved else 500)
+
+    if not saved:
+        flash("Terjadi kesalahan saat menyimpan data scan telur.", "error")
+        return redirect(url_for("eggmonitor_controller.eggmonitor"))
+
+    session["last_scan"] = {
+        "image_path": main_path,
+        "prediction": f"Grade {grade}",
+        "confidence": f"{grade_conf:.2f}%",
+        "details": {
+            "Ketebalan": detail.get("color") or "-",
+            "Keutuhan": detail.get("keutuhan", "-"),
+            "Kebersihan": detail.get("kebersihan") or "-",
+            "Kesegaran": detail.get("kesegaran", "-"),
+            "BeratTelur": detail.get("berat_telur", "-"),
+            "Berat": detail.get("berat", "-"),
+            "Kamera": ", ".join(view_names),
+        },
+    }
+    flash("Scan telur (multi-kamera) berhasil disimpan.", "success")
+    return redirect(url_for("eggmonitor_controller.eggmonitor"))
+
+
 @eggmonitor_controller.route('/laporan')
 @login_required
 def eggmonitor_laporan():
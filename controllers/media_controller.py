@@ -0,0 +1,55 @@
+from flask import Blueprint, abort, send_file, url_for
+
+from config import THUMB_CACHE_MAX_AGE
+from utils.image_decode import ImageTooLarge
+from utils.thumbnails import (
+    THUMB_FORMATS,
+    THUMB_VARIANTS,
+    ensure_thumbnail,
+    normalize_image_path,
+)
+
+media_controller = Blueprint('media_controller', __name__)
+
+
+@media_controller.route('/media/thumb/<variant>/<fmt>/<path:image_path>')
+def thumbnail(variant, fmt, image_path):
+    """Varian kecil gambar upload; dibuat saat pertama diminta lalu di-cache."""
+    image_path = normalize_image_path(image_path)
+    if image_path is None or variant not in THUMB_VARIANTS or fmt not in THUMB_FORMATS:
+        abort(404)
+    try:
+        path = ensure_thumbnail(image_path, variant, fmt)
+    except FileNotFoundError:
+        abort(404)
+    except (ImageTooLarge, OSError) as e:
+        print(f"Thumbnail error ({image_path}): {e}")
+        abort(404)
+    return send_file(path, mimetype=THUMB_FORMATS[fmt][1], max_age=THUMB_CACHE_MAX_AGE)
+
+
+# =============== HELPER TEMPLATE ===============
+
+@media_controller.app_template_global()
+def thumb_url(src, variant="sm", fmt="webp"):
+    """
+    URL varian gambar untuk template: {{ thumb_url(news.image_url, 'md') }}.
+    `src` boleh image_path ("uploads/..."), URL "/static/uploads/...", atau
+    URL eksternal / static/img (dikembalikan apa adanya).
+    """
+    image_path = normalize_image_path(src)
+    if image_path is None:
+        if src and not src.startswith(("/", "http://", "https://", "//", "data:")):
+            return url_for('static', filename=src.removeprefix("static/"))
+        return src
+    return url_for('media_controller.thumbnail', variant=variant, fmt=fmt, image_path=image_path)
+
+
+@media_controller.app_template_global()
+def thumb_srcset(src, fmt="webp"):
+    """srcset semua varian, mis. <img srcset="{{ thumb_srcset(url) }}" sizes="...">."""
+    if normalize_image_path(src) is None:
+        return ""
+    return ", ".join(
+        f"{thumb_url(src, variant, fmt)} {width}w" for variant, width in THUMB_VARIANTS.items()
+    )
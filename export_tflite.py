@@ -0,0 +1,171 @@
+"""
+Export model grading Keras (float32) ke TFLite terkuantisasi untuk server CPU.
+
+Untuk tiap model:
+  1. Konversi ke TFLite memakai representative dataset (gambar asli dari
+     static/uploads) untuk kalibrasi INT8.
+  2. Bandingkan dengan model Keras pada gambar evaluasi: label yang sama (%),
+     selisih probabilitas, ukuran file, dan latency per gambar.
+  3. Tulis laporan JSON (dokumentasi dampak akurasi) di samping artefak.
+
+Pemakaian:
+  python export_tflite.py                       # INT8, semua model
+  python export_tflite.py --mode dynamic        # dynamic-range quantization
+  python export_tflite.py --models keutuhan,multihead
+  ML_RUNTIME=tflite python app.py               # pakai artefak *.int8.tflite
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import tensorflow as tf
+
+from config import MULTIHEAD_MODEL_PATH
+from utils.ml_utils import MODEL_PATHS, MULTIHEAD_OUTPUTS, preprocess_images
+from utils.tflite_backend import TFLiteModel, tflite_path
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".webp")
+IMG_SHAPE = (224, 224, 3)
+
+
+def load_dataset(folder, limit):
+    paths = sorted(
+        p for p in glob.glob(os.path.join(folder, "**", "*"), recursive=True)
+        if p.lower().endswith(IMAGE_EXTS)
+    )[:limit]
+    batch, ok_index = preprocess_images(paths)
+    if not ok_index:
+        print("⚠️  Tidak ada gambar, kalibrasi memakai noise acak (akurasi INT8 bisa turun).")
+        rng = np.random.default_rng(0)
+        return rng.uniform(0, 255, size=(16,) + IMG_SHAPE).astype("float32")
+    return batch
+
+
+def convert(model, mode, calibration):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if mode in ("int8", "dynamic"):
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if mode == "int8":
+        def representative_dataset():
+            for i in range(len(calibration)):
+                yield [calibration[i:i + 1]]
+
+        converter.representative_dataset = representative_dataset
+        # Op yang belum punya kernel INT8 tetap boleh jalan di float.
+        converter.target_spec.supported_ops = [
+            tf.lite.OpsSet.TFLITE_BUILTINS_INT8,
+            tf.lite.OpsSet.TFLITE_BUILTINS,
+        ]
+    return converter.convert()
+
+
+def _as_list(outputs):
+    return outputs if isinstance(outputs, list) else [outputs]
+
+
+def _latency_ms(predict, x, repeats=5):
+    predict(x[:1])  # warm-up
+    times = []
+    for _ in range(repeats):
+        for i in range(len(x)):
+            t0 = time.perf_counter()
+            predict(x[i:i + 1])
+            times.append((time.perf_counter() - t0) * 1000.0)
+    return round(float(np.percentile(times, 50)), 3)
+
+
+def evaluate(keras_model, lite_model, x, output_names):
+    ref = _as_list(keras_model.predict(x, verbose=0))
+    got = _as_list(lite_model.predict(x))
+
+    heads = {}
+    for name, r, g in zip(output_names, ref, got):
+        heads[name] = {
+            "top1_agreement_pct": round(float(np.mean(r.argmax(1) == g.argmax(1)) * 100.0), 2),
+            "mean_abs_prob_diff": round(float(np.abs(r - g).mean()), 5),
+            "max_abs_prob_diff": round(float(np.abs(r - g).max()), 5),
+        }
+
+    sample = x[: min(len(x), 8)]
+    return {
+        "heads": heads,
+        "latency_p50_ms": {
+            "keras": _latency_ms(lambda b: keras_model.predict(b, verbose=0), sample),
+            "tflite": _latency_ms(lite_model.predict, sample),
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export model grading ke TFLite")
+    parser.add_argument("--images", default="static/uploads")
+    parser.add_argument("--mode", choices=["int8", "dynamic", "float16"], default="int8")
+    parser.add_argument("--models", default="color,keutuhan,kebersihan",
+                        help="Daftar model, tambahkan 'multihead' kalau sudah dibangun")
+    parser.add_argument("--calibration-limit", type=int, default=200)
+    parser.add_argument("--report", default="static/tflite_export_report.json")
+    args = parser.parse_args(argv)
+
+    if args.mode == "float16":
+        print("⚠️  float16 tidak mempercepat CPU x86; dipakai hanya untuk perbandingan.")
+
+    data = load_dataset(args.images, args.calibration_limit)
+    print(f"🖼️  {len(data)} gambar untuk kalibrasi & evaluasi")
+
+    targets = {}
+    for name in [n.strip() for n in args.models.split(",") if n.strip()]:
+        if name == "multihead":
+            targets[name] = (MULTIHEAD_MODEL_PATH, list(MULTIHEAD_OUTPUTS))
+        else:
+            targets[name] = (MODEL_PATHS[name], [name])
+
+    report = {
+        "mode": args.mode,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "images": len(data),
+        "models": {},
+    }
+
+    for name, (keras_path, output_names) in targets.items():
+        if not os.path.exists(keras_path):
+            print(f"⚠️  {keras_path} tidak ada, skip.")
+            continue
+
+        print(f"🔧 {name}: konversi {args.mode}...")
+        keras_model = tf.keras.models.load_model(keras_path)
+        out_path = tflite_path(keras_path, args.mode)
+        with open(out_path, "wb") as f:
+            f.write(convert(keras_model, args.mode, data))
+
+        lite_model = TFLiteModel(out_path, output_names=output_names if len(output_names) > 1 else None)
+        result = evaluate(keras_model, lite_model, data, output_names)
+        result.update({
+            "keras_path": keras_path,
+            "tflite_path": out_path,
+            "keras_mb": round(os.path.getsize(keras_path) / 1e6, 2),
+            "tflite_mb": round(os.path.getsize(out_path) / 1e6, 2),
+        })
+        report["models"][name] = result
+
+        lat = result["latency_p50_ms"]
+        print(f"   ✅ {out_path}: {result['keras_mb']} MB -> {result['tflite_mb']} MB, "
+              f"p50 {lat['keras']} ms -> {lat['tflite']} ms")
+        for head, stats in result["heads"].items():
+            print(f"      {head:<11} agreement {stats['top1_agreement_pct']:6.2f}%  "
+                  f"mean |Δp| {stats['mean_abs_prob_diff']:.4f}")
+
+    with open(args.report, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"📝 Laporan akurasi disimpan ke {args.report}")
+    if args.mode != "int8":
+        print(f"ℹ️  Set TFLITE_VARIANT={args.mode} untuk memakai artefak ini di ML_RUNTIME=tflite.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Laporan waktu import per modul saat startup.
+
+Menjalankan `python -X importtime -c "import app"` di proses baru, lalu
+merangkum waktu import per modul (self & kumulatif) dan per package,
+supaya regresi startup (mis. TensorFlow ke-import lagi di level modul)
+langsung kelihatan.
+
+Pemakaian:
+  python import_report.py                      # laporan untuk `import app`
+  python import_report.py --module controllers.comprof_controller
+  python import_report.py --json startup.json --fail-over-ms 3000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PROJECT_PACKAGES = ("app", "config", "controllers", "models", "utils")
+
+
+def measure(module):
+    env = dict(os.environ)
+    env.pop("PYTHONPROFILEIMPORTTIME", None)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        self_us, cumulative_us, name = parts
+        try:
+            self_us = int(self_us.strip())
+            cumulative_us = int(cumulative_us.strip())
+        except ValueError:
+            continue
+        rows.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_ms": self_us / 1000.0,
+            "cumulative_ms": cumulative_us / 1000.0,
+        })
+    return proc.returncode, rows, proc.stderr
+
+
+def summarize(rows):
+    by_package = {}
+    for row in rows:
+        top = row["module"].split(".")[0]
+        by_package[top] = by_package.get(top, 0.0) + row["self_ms"]
+
+    project = [
+        r for r in rows
+        if r["module"].split(".")[0] in PROJECT_PACKAGES
+    ]
+    total_ms = sum(r["cumulative_ms"] for r in rows if r["depth"] == 0)
+    return {
+        "total_ms": round(total_ms, 3),
+        "project_modules": sorted(project, key=lambda r: -r["cumulative_ms"]),
+        "packages": dict(sorted(by_package.items(), key=lambda kv: -kv[1])),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Laporan waktu import per modul")
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", dest="json_path", default=None)
+    parser.add_argument("--fail-over-ms", type=float, default=None,
+                        help="Exit 1 kalau total waktu import melebihi batas ini")
+    args = parser.parse_args(argv)
+
+    code, rows, stderr = measure(args.module)
+    if code != 0:
+        print(f"❌ import {args.module} gagal:")
+        print("\n".join(l for l in stderr.splitlines() if not l.startswith("import time:")))
+        return 1
+
+    summary = summarize(rows)
+
+    print(f"⏱️  import {args.module}: {summary['total_ms']:.1f} ms total")
+    print("\nModul project (kumulatif):")
+    for r in summary["project_modules"][:args.top]:
+        print(f"   {r['cumulative_ms']:9.1f} ms  {r['self_ms']:8.1f} ms self  {r['module']}")
+
+    print("\nPackage terberat (self, dijumlah):")
+    for name, ms in list(summary["packages"].items())[:args.top]:
+        print(f"   {ms:9.1f} ms  {name}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"module": args.module, **summary, "modules": rows}, f, indent=2)
+        print(f"\n📝 Disimpan ke {args.json_path}")
+
+    if args.fail_over_ms is not None and summary["total_ms"] > args.fail_over_ms:
+        print(f"❌ Startup {summary['total_ms']:.1f} ms > batas {args.fail_over_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""
+Jalankan migrasi skema database (utils/migrations.py).
+
+    python migrate.py            # jalankan semua migrasi yang belum jalan
+    python migrate.py status     # versi sekarang + migrasi yang tertunda
+    python migrate.py up --to 5  # sampai versi tertentu
+
+Jalankan sebelum worker versi baru start (lihat nixpacks.toml).
+"""
+import argparse
+import sys
+
+import mysql.connector
+
+from utils.migrations import migrate, schema_status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migrasi skema database EggVision")
+    parser.add_argument("command", nargs="?", default="up", choices=["up", "status"])
+    parser.add_argument("--to", type=int, default=None, help="Versi target (default: terbaru)")
+    args = parser.parse_args(argv)
+
+    status = schema_status()
+    if status is None:
+        print("❌ Database tidak tersedia.")
+        return 1
+
+    if args.command == "status":
+        print(f"Versi skema: {status['current']} (terbaru {status['latest']})")
+        for version, name in status["pending"]:
+            print(f"   belum: {version:03d} {name}")
+        return 1 if status["pending"] else 0
+
+    try:
+        ran = migrate(target=args.to)
+    except (mysql.connector.Error, RuntimeError) as e:
+        print(f"❌ Migrasi gagal: {e}")
+        return 1
+    status = schema_status()
+    print(f"✅ {ran} migrasi dijalankan, versi skema sekarang {status['current']}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Migrasi static/uploads lama (flat, nama asli) ke penyimpanan content-addressed.
+
+Tiap file di root static/uploads:
+  1. di-hash (sha256) dan disalin ke uploads/ab/cd/<hash>.<ext> (kalau isi
+     yang sama sudah ada, tidak disalin lagi -> dedup)
+  2. egg_scans.image_path dan grading_jobs.image_path yang menunjuk nama lama
+     di-UPDATE ke path baru (1 transaksi per file)
+  3. file lama dihapus setelah commit
+Urutan ini aman diulang kalau proses terhenti di tengah jalan. Subfolder
+(mis. uploads/news) tidak disentuh.
+
+Opsi --gc menghapus file content-addressed yang tidak direferensikan lagi
+(refcount 0 di egg_scans + grading_jobs aktif) dan lebih tua dari --grace-hours,
+supaya upload yang sedang diproses tidak ikut terhapus.
+
+    python migrate_uploads.py --dry-run
+    python migrate_uploads.py
+    python migrate_uploads.py --gc --grace-hours 24
+"""
+import argparse
+import os
+import re
+import shutil
+import sys
+import time
+
+import mysql.connector
+
+from utils.database import get_db_connection
+from utils.migrations import schema_status
+from utils.upload_storage import (
+    UPLOAD_PREFIX,
+    content_image_path,
+    reference_counts,
+    static_path,
+)
+
+UPLOAD_DIR = static_path(UPLOAD_PREFIX)
+SHARD_RE = re.compile(r"^[0-9a-f]{2}$")
+
+
+def legacy_files():
+    for name in sorted(os.listdir(UPLOAD_DIR)):
+        path = os.path.join(UPLOAD_DIR, name)
+        if os.path.isfile(path) and not name.startswith(".") and not name.endswith(".tmp"):
+            yield name, path
+
+
+def migrate(dry_run=False):
+    status = schema_status()
+    if status is None:
+        print("❌ Database tidak tersedia.")
+        return 1
+    if status["pending"]:
+        print("❌ Skema database belum terbaru, jalankan `python migrate.py` dulu.")
+        return 1
+
+    conn = get_db_connection()
+    if not conn:
+        print("❌ Database tidak tersedia.")
+        return 1
+
+    stats = {"files": 0, "copied": 0, "deduplicated": 0, "rows_updated": 0, "errors": 0}
+    try:
+        cur = conn.cursor()
+        for name, path in legacy_files():
+            stats["files"] += 1
+            with open(path, "rb") as f:
+                data = f.read()
+            old_image_path = f"{UPLOAD_PREFIX}/{name}"
+            new_image_path = content_image_path(data, name)
+            target = static_path(new_image_path)
+            exists = os.path.exists(target)
+            stats["deduplicated" if exists else "copied"] += 1
+            print(f"   {old_image_path} -> {new_image_path}{' (dedup)' if exists else ''}")
+            if dry_run:
+                continue
+
+            try:
+                if not exists:
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    tmp_path = f"{target}.migrate.tmp"
+                    shutil.copy2(path, tmp_path)
+                    os.replace(tmp_path, target)
+                for table in ("egg_scans", "grading_jobs"):
+                    cur.execute(
+                        f"UPDATE {table} SET image_path = %s WHERE image_path = %s",
+                        (new_image_path, old_image_path),
+                    )
+                    stats["rows_updated"] += cur.rowcount
+                conn.commit()
+                os.remove(path)
+            except (OSError, mysql.connector.Error) as e:
+                conn.rollback()
+                stats["errors"] += 1
+                print(f"   ❌ {name}: {e}")
+        cur.close()
+    finally:
+        conn.close()
+
+    print(f"✅ Migrasi selesai: {stats}")
+    return 1 if stats["errors"] else 0
+
+
+def sharded_files():
+    for first in sorted(os.listdir(UPLOAD_DIR)):
+        first_dir = os.path.join(UPLOAD_DIR, first)
+        if not SHARD_RE.match(first) or not os.path.isdir(first_dir):
+            continue
+        for second in sorted(os.listdir(first_dir)):
+            second_dir = os.path.join(first_dir, second)
+            if not SHARD_RE.match(second) or not os.path.isdir(second_dir):
+                continue
+            for name in os.listdir(second_dir):
+                yield f"{UPLOAD_PREFIX}/{first}/{second}/{name}", os.path.join(second_dir, name)
+
+
+def collect_garbage(grace_hours, dry_run=False):
+    cutoff = time.time() - grace_hours * 3600
+    candidates = [
+        (image_path, path) for image_path, path in sharded_files()
+        if os.path.getmtime(path) < cutoff
+    ]
+    stats = {"checked": len(candidates), "removed": 0, "bytes_freed": 0}
+
+    for start in range(0, len(candidates), 500):
+        chunk = candidates[start:start + 500]
+        counts = reference_counts([image_path for image_path, _ in chunk])
+        if counts is None:
+            print("❌ Database tidak tersedia, GC dibatalkan.")
+            return 1
+        for image_path, path in chunk:
+            if counts[image_path] > 0:
+                continue
+            size = os.path.getsize(path)
+            print(f"   hapus {image_path} ({size} byte)")
+            if not dry_run:
+                os.remove(path)
+            stats["removed"] += 1
+            stats["bytes_freed"] += size
+
+    print(f"✅ GC selesai: {stats}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migrasi & GC penyimpanan upload content-addressed")
+    parser.add_argument("--dry-run", action="store_true", help="Tampilkan rencana tanpa mengubah apa pun")
+    parser.add_argument("--gc", action="store_true", help="Hapus file yang tidak direferensikan lagi")
+    parser.add_argument("--grace-hours", type=float, default=24.0)
+    args = parser.parse_args(argv)
+
+    if args.gc:
+        return collect_garbage(args.grace_hours, dry_run=args.dry_run)
+    return migrate(dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
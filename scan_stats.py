@@ -0,0 +1,62 @@
+"""
+Rollup harian scan (tabel scan_daily_stats, lihat utils/scan_stats.py).
+
+    python scan_stats.py check              # bandingkan rollup dengan egg_scans
+    python scan_stats.py check --user 12
+    python scan_stats.py rebuild            # hitung ulang semua dari egg_scans
+    python scan_stats.py rebuild --user 12
+
+Rebuild perlu dijalankan setelah egg_scans diisi tanpa lewat aplikasi
+(import manual, restore backup). `check` exit 1 kalau ada selisih.
+"""
+import argparse
+import sys
+
+import mysql.connector
+
+from utils.migrations import schema_status
+from utils.scan_stats import check, rebuild
+
+MAX_REPORTED = 20
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cek / rebuild rollup scan_daily_stats")
+    parser.add_argument("command", choices=["check", "rebuild"])
+    parser.add_argument("--user", type=int, default=None, help="Hanya user_id ini")
+    args = parser.parse_args(argv)
+
+    status = schema_status()
+    if status is None:
+        print("❌ Database tidak tersedia.")
+        return 1
+    if status["pending"]:
+        print("❌ Skema database belum terbaru, jalankan `python migrate.py` dulu.")
+        return 1
+
+    try:
+        if args.command == "rebuild":
+            rows = rebuild(args.user)
+            print(f"✅ Rollup dihitung ulang: {rows} baris scan_daily_stats.")
+            return 0
+
+        mismatches = check(args.user)
+    except mysql.connector.Error as e:
+        print(f"❌ {args.command} gagal: {e}")
+        return 1
+
+    if not mismatches:
+        print("✅ scan_daily_stats konsisten dengan egg_scans.")
+        return 0
+    print(f"❌ {len(mismatches)} selisih (user_id, tanggal, grade, berat_cat): "
+          "egg_scans vs rollup [scan_count, weight_count, weight_sum, weight_sq_sum]")
+    for key, expected, actual in mismatches[:MAX_REPORTED]:
+        print(f"   {key}: {expected} vs {actual}")
+    if len(mismatches) > MAX_REPORTED:
+        print(f"   ... dan {len(mismatches) - MAX_REPORTED} lainnya")
+    print("   Perbaiki dengan `python scan_stats.py rebuild`.")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
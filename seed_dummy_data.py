@@ -3,6 +3,7 @@ import random
 from datetime import datetime, timedelta
 from werkzeug.security import generate_password_hash
 from utils.database import get_db_connection
+from utils.scan_stats import rebuild as rebuild_scan_stats
 
 # Password default untuk semua user
 DEFAULT_PASSWORD = "123456"
@@ -227,6 +228,9 @@ def seed_data():
 
         conn.commit()
 
+        # Scan di atas di-insert langsung, jadi rollup dashboard dihitung ulang
+        rebuild_scan_stats()
+
         # ==========================================
         # 3. REVIEWS 
         # ==========================================
@@ -0,0 +1,222 @@
+# utils/bulk_ingest.py
+"""
+Bulk upload: banyak file sekaligus atau 1 ZIP berisi ribuan foto telur.
+
+Entri ZIP dibaca satu per satu (tidak di-extract semua ke memori/disk),
+dikumpulkan per BULK_BATCH_SIZE gambar, lalu tiap batch:
+  1. quality gate per gambar (yang gagal dicatat dengan alasannya)
+  2. simpan file asli di background (utils.upload_storage, dedup per isi)
+  3. grading 1 panggilan batch (inference_server.grade_images)
+  4. bulk insert egg_scans dengan executemany (1 transaksi per batch)
+Generator `ingest()` menghasilkan event progres (dict) yang di-stream ke klien
+sebagai NDJSON oleh controller.
+"""
+import os
+import time
+import zipfile
+import zlib
+
+import mysql.connector
+
+from config import (
+    BULK_BATCH_SIZE,
+    BULK_MAX_FILES,
+    BULK_MAX_ENTRY_BYTES,
+)
+from utils.database import get_db_connection
+from utils.egg_scan_data import egg_scan_row, insert_egg_scans
+from utils.inference_server import grade_images
+from utils.quality_gate import ImageRejected, check_image
+from utils.upload_storage import store_upload_async, wait_saved, discard_upload
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".webp")
+
+# Error saat membaca 1 entri ZIP: entri itu saja yang ditolak, stream jalan terus
+ZIP_ENTRY_ERRORS = (RuntimeError, NotImplementedError, zipfile.BadZipFile, zlib.error, EOFError)
+
+
+def _zip_entry_reason(error):
+    if isinstance(error, RuntimeError):          # entri ber-password
+        return "encrypted"
+    if isinstance(error, NotImplementedError):   # metode kompresi tidak didukung
+        return "unsupported_compression"
+    return "corrupt"                             # CRC salah / data terpotong
+
+
+# =============== SUMBER ENTRI ===============
+
+def _iter_zip(file_storage):
+    """Entri gambar dari ZIP; FileStorage werkzeug sudah seekable (spooled temp file)."""
+    with zipfile.ZipFile(file_storage.stream) as archive:
+        for info in archive.infolist():
+            name = os.path.basename(info.filename)
+            if info.is_dir() or not name.lower().endswith(IMAGE_EXTS) or name.startswith("."):
+                continue
+            if info.file_size > BULK_MAX_ENTRY_BYTES:
+                yield name, None, "too_large"
+                continue
+            try:
+                with archive.open(info) as entry:
+                    # baca maksimal batas + 1 byte: header ZIP yang bohong soal ukuran tetap tertangkap
+                    data = entry.read(BULK_MAX_ENTRY_BYTES + 1)
+            except ZIP_ENTRY_ERRORS as e:
+                print(f"[BulkIngest] zip entry {info.filename} error: {e}")
+                yield name, None, _zip_entry_reason(e)
+                continue
+            if len(data) > BULK_MAX_ENTRY_BYTES:
+                yield name, None, "too_large"
+                continue
+            yield name, data, None
+
+
+def iter_entries(files):
+    """
+    (nama, bytes, error) untuk tiap gambar dari list FileStorage (file biasa
+    atau .zip), maksimal BULK_MAX_FILES gambar.
+    """
+    count = 0
+    for file_storage in files:
+        if not file_storage or not file_storage.filename:
+            continue
+        if file_storage.filename.lower().endswith(".zip"):
+            try:
+                entries = _iter_zip(file_storage)
+                for entry in entries:
+                    yield entry
+                    count += 1
+                    if count >= BULK_MAX_FILES:
+                        return
+            except zipfile.BadZipFile:
+                yield file_storage.filename, None, "bad_zip"
+            continue
+
+        data = file_storage.read(BULK_MAX_ENTRY_BYTES + 1)
+        if len(data) > BULK_MAX_ENTRY_BYTES:
+            yield file_storage.filename, None, "too_large"
+        else:
+            yield file_storage.filename, data, None
+        count += 1
+        if count >= BULK_MAX_FILES:
+            return
+
+
+# =============== PROSES PER BATCH ===============
+
+def _process_batch(user_id, batch):
+    """Mengembalikan list event item untuk 1 batch (name, data)."""
+    events, accepted = [], []
+    for name, data in batch:
+        try:
+            check_image(data)
+        except ImageRejected as e:
+            events.append({"type": "item", "name": name, "status": "rejected", "reason": e.reason})
+            continue
+        image_path, saving = store_upload_async(data, name)
+        accepted.append((name, data, image_path, saving))
+
+    if not accepted:
+        return events
+
+    try:
+        results = grade_images([data for _, data, _, _ in accepted])
+    except Exception as e:
+        print(f"[BulkIngest] grading error: {e}")
+        for name, _, image_path, saving in accepted:
+            discard_upload(saving, image_path)
+            events.append({"type": "item", "name": name, "status": "failed", "reason": "grading"})
+        return events
+
+    rows = [
+        egg_scan_row(user_id, grade, grade_conf, detail, image_path)
+        for (_, _, image_path, _), (grade, grade_conf, detail) in zip(accepted, results)
+    ]
+
+    saved = False
+    conn = get_db_connection()
+    if conn:
+        try:
+            cur = conn.cursor()
+            insert_egg_scans(cur, rows)
+            conn.commit()
+            cur.close()
+            saved = True
+        except mysql.connector.Error as e:
+            conn.rollback()
+            print(f"[BulkIngest] insert error: {e}")
+        finally:
+            conn.close()
+
+    if not saved:
+        # tanpa baris egg_scans file ini tidak akan pernah direferensikan / di-GC
+        for name, _, image_path, saving in accepted:
+            discard_upload(saving, image_path)
+            events.append({"type": "item", "name": name, "status": "failed", "reason": "database"})
+        return events
+
+    for (name, _, image_path, saving), (grade, grade_conf, _) in zip(accepted, results):
+        ok = wait_saved(saving)
+        event = {"type": "item", "name": name, "status": "saved" if ok else "failed"}
+        if ok:
+            event.update(grade=grade, confidence=round(grade_conf, 2), image_path=image_path)
+        else:
+            event["reason"] = "storage"
+        events.append(event)
+    return events
+
+
+def ingest(user_id, entries, batch_size=BULK_BATCH_SIZE, item_events=True):
+    """
+    Generator event progres:
+      {"type": "item", ...}       per gambar (kalau item_events)
+      {"type": "progress", ...}   setelah tiap batch
+      {"type": "done", ...}       ringkasan akhir
+    """
+    started = time.perf_counter()
+    totals = {"processed": 0, "saved": 0, "rejected": 0, "failed": 0}
+    grades = {}
+    batch = []
+
+    def flush():
+        events = _process_batch(user_id, batch)
+        for event in events:
+            totals["processed"] += 1
+            key = {"saved": "saved", "rejected": "rejected"}.get(event["status"], "failed")
+            totals[key] += 1
+            if event["status"] == "saved":
+                grades[event["grade"]] = grades.get(event["grade"], 0) + 1
+        batch.clear()
+        return events
+
+    def progress():
+        elapsed = time.perf_counter() - started
+        return {
+            "type": "progress",
+            **totals,
+            "elapsed_s": round(elapsed, 2),
+            "images_per_sec": round(totals["processed"] / elapsed, 2) if elapsed > 0 else 0.0,
+        }
+
+    for name, data, error in entries:
+        if error is not None:
+            totals["processed"] += 1
+            totals["rejected"] += 1
+            if item_events:
+                yield {"type": "item", "name": name, "status": "rejected", "reason": error}
+            continue
+
+        batch.append((name, data))
+        if len(batch) >= batch_size:
+            events = flush()
+            if item_events:
+                yield from events
+            yield progress()
+
+    if batch:
+        events = flush()
+        if item_events:
+            yield from events
+        yield progress()
+
+    done = progress()
+    done.update(type="done", grades=grades)
+    yield done
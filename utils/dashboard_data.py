@@ -1,6 +1,7 @@
 # utils/dashboard_data.py
 from datetime import datetime
 from utils.database import get_db_connection
+from utils.scan_stats import grade_counts
 
 
 def _build_header(user_id, total_scans):
@@ -58,25 +59,9 @@ def build_dashboard_data(user_id: int):
     try:
         cur = conn.cursor(dictionary=True)
 
-        # Total scans untuk user ini
-        cur.execute(
-            "SELECT COUNT(*) AS cnt FROM egg_scans WHERE user_id = %s",
-            (user_id,),
-        )
-        total_scans = cur.fetchone()["cnt"]
-
-        # Hitung jumlah tiap grade
-        cur.execute(
-            """
-            SELECT grade, COUNT(*) AS cnt
-            FROM egg_scans
-            WHERE user_id = %s
-            GROUP BY grade
-            """,
-            (user_id,),
-        )
-        grade_rows = cur.fetchall()
-        grade_counts_raw = {row["grade"]: row["cnt"] for row in grade_rows}
+        # Jumlah tiap grade & total scan dari rollup harian (bukan COUNT egg_scans)
+        grade_counts_raw = grade_counts(cur, user_id)
+        total_scans = sum(grade_counts_raw.values())
         total_for_pct = sum(grade_counts_raw.values()) or 1  # avoid /0
 
         grade_defs = [
@@ -216,6 +201,7 @@ def build_dashboard_data(user_id: int):
             "status_items": status_items,
             "table_meta": table_meta,
             "records": records,
+            "reject_count": grade_counts_raw.get("Reject", 0),
             "active_menu": "dashboard",
         }
 
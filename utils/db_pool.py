@@ -0,0 +1,296 @@
+# utils/db_pool.py
+"""
+Pool koneksi MySQL untuk `get_db_connection()`.
+
+Sebelumnya tiap panggilan membuka koneksi baru (TCP + handshake auth), dan 1
+render dashboard bisa memanggilnya 4-5 kali. Sekarang:
+  - Koneksi diambil dari pool berukuran DB_POOL_SIZE (+ DB_POOL_MAX_OVERFLOW
+    koneksi tambahan saat ramai, ditutup lagi setelah dipakai). Kalau semua
+    terpakai, peminjam menunggu maksimal DB_POOL_TIMEOUT_S.
+  - Di dalam app context Flask (request), koneksi yang sudah di-`close()`
+    dipakai ulang oleh panggilan berikutnya di request yang sama, lalu baru
+    dikembalikan ke pool saat teardown. Jadi 1 request biasanya cukup 1
+    koneksi. Di luar app context (thread worker) close() langsung
+    mengembalikan ke pool.
+  - Health check tidak ping setiap pinjam: hanya koneksi yang menganggur >
+    DB_POOL_PING_AFTER_S yang di-ping, dan koneksi > DB_POOL_RECYCLE_S diganti
+    (di bawah wait_timeout MySQL).
+  - Saat dikembalikan, transaksi yang masih terbuka di-rollback dan hasil
+    query yang belum dibaca dibuang, supaya peminjam berikutnya mulai bersih.
+  - Cursor dibungkus utils/sql_metrics.py (jumlah & waktu query, N+1).
+
+Kode lama tetap memakai pola `conn = get_db_connection() ... conn.close()`.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+import mysql.connector
+from flask import g, has_app_context
+
+from config import (
+    DB_CONFIG,
+    DB_POOL_SIZE,
+    DB_POOL_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT_S,
+    DB_POOL_PING_AFTER_S,
+    DB_POOL_RECYCLE_S,
+)
+from utils import sql_metrics
+
+
+class PoolTimeout(mysql.connector.errors.PoolError):
+    """Semua koneksi sedang dipakai lebih lama dari DB_POOL_TIMEOUT_S."""
+
+
+class _Slot:
+    """1 koneksi fisik + waktu dibuat / terakhir dipakai."""
+
+    __slots__ = ("raw", "created_at", "last_used")
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = self.last_used = time.monotonic()
+
+
+class PooledConnection:
+    """
+    Proxy ke koneksi mysql.connector. `close()` tidak menutup socket, tapi
+    mengembalikan koneksi (ke request atau ke pool); aman dipanggil 2x.
+    """
+
+    def __init__(self, slot, request_scoped):
+        self._slot = slot
+        self._request_scoped = request_scoped
+
+    def __getattr__(self, name):
+        slot = self.__dict__.get("_slot")
+        if slot is None:
+            raise mysql.connector.errors.OperationalError("Koneksi sudah dikembalikan ke pool")
+        return getattr(slot.raw, name)
+
+    def cursor(self, *args, **kwargs):
+        return sql_metrics.instrument(self.__getattr__("cursor")(*args, **kwargs))
+
+    def is_connected(self):
+        # tanpa ping: koneksi dari pool sudah dicek saat dipinjam
+        return self._slot is not None
+
+    def close(self):
+        slot, self._slot = self._slot, None
+        if slot is None:
+            return  # sudah dikembalikan (close 2x / setelah teardown request)
+        if not self._request_scoped:
+            get_pool().release(slot)
+        elif has_app_context():
+            if _reset(slot):
+                g._db_idle.append(slot)
+            else:
+                g._db_slots.remove(slot)
+                get_pool().release(slot, discard=True)
+        # di luar app context: slot masih di g._db_slots, dikembalikan saat teardown
+
+
+def _reset(slot):
+    """Rollback transaksi terbuka + buang hasil yang belum dibaca. False kalau koneksi rusak."""
+    try:
+        if slot.raw.unread_result:
+            slot.raw.consume_results()
+        if slot.raw.in_transaction:
+            slot.raw.rollback()
+        return True
+    except mysql.connector.Error:
+        return False
+
+
+class ConnectionPool:
+    def __init__(self, config, size, max_overflow, timeout, ping_after, recycle):
+        self._config = config
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self.recycle = recycle
+        self.pid = os.getpid()
+
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._total = 0
+        self._in_use = 0
+        self._wait_ms = deque(maxlen=1000)
+        self._stats = {
+            "borrowed": 0, "created": 0, "closed": 0, "recycled": 0,
+            "pings": 0, "ping_failures": 0, "timeouts": 0, "request_reuses": 0,
+        }
+
+    # --------------- pinjam ---------------
+
+    def acquire(self):
+        started = time.perf_counter()
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if self._idle:
+                    slot = self._idle.pop()  # LIFO: koneksi yang paling baru dipakai
+                    break
+                if self._total < self.size + self.max_overflow:
+                    self._total += 1
+                    slot = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"Pool koneksi penuh ({self._total} koneksi) setelah {self.timeout}s"
+                    )
+                self._cond.wait(remaining)
+            self._in_use += 1
+            self._stats["borrowed"] += 1
+            self._wait_ms.append((time.perf_counter() - started) * 1000.0)
+
+        try:
+            if slot is None:
+                return self._create()
+            return self._check(slot)
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+    def _create(self):
+        slot = _Slot(mysql.connector.connect(**self._config))
+        with self._cond:
+            self._stats["created"] += 1
+        return slot
+
+    def _check(self, slot):
+        now = time.monotonic()
+        if now - slot.created_at > self.recycle:
+            self._close_raw(slot)
+            with self._cond:
+                self._stats["recycled"] += 1
+            return self._create()
+        if now - slot.last_used > self.ping_after:
+            with self._cond:
+                self._stats["pings"] += 1
+            try:
+                slot.raw.ping(reconnect=False)
+            except mysql.connector.Error:
+                with self._cond:
+                    self._stats["ping_failures"] += 1
+                self._close_raw(slot)
+                return self._create()
+        return slot
+
+    # --------------- kembalikan ---------------
+
+    def release(self, slot, discard=False):
+        if not discard:
+            discard = not _reset(slot)
+        with self._cond:
+            self._in_use -= 1
+            if discard or len(self._idle) >= self.size:
+                self._total -= 1  # koneksi overflow / rusak ditutup
+                close = True
+            else:
+                slot.last_used = time.monotonic()
+                self._idle.append(slot)
+                close = False
+            self._cond.notify()
+        if close:
+            self._close_raw(slot)
+
+    def _close_raw(self, slot):
+        try:
+            slot.raw.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._stats["closed"] += 1
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update(
+                size=self.size,
+                max_overflow=self.max_overflow,
+                total=self._total,
+                in_use=self._in_use,
+                idle=len(self._idle),
+            )
+            waits = sorted(self._wait_ms)
+
+        def pct(p):
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(round(p / 100.0 * (len(waits) - 1))))], 3)
+
+        stats["wait_ms"] = {"p50": pct(50), "p95": pct(95), "max": round(waits[-1], 3) if waits else 0.0}
+        return stats
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Pool per proses (dibuat ulang setelah fork gunicorn, socket tidak dibagi)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.pid != os.getpid():
+            _pool = ConnectionPool(
+                DB_CONFIG,
+                size=DB_POOL_SIZE,
+                max_overflow=DB_POOL_MAX_OVERFLOW,
+                timeout=DB_POOL_TIMEOUT_S,
+                ping_after=DB_POOL_PING_AFTER_S,
+                recycle=DB_POOL_RECYCLE_S,
+            )
+        return _pool
+
+
+# =============== API ===============
+
+def connect():
+    """Pinjam koneksi (PooledConnection); raise mysql.connector.Error kalau gagal."""
+    pool = get_pool()
+    if not has_app_context():
+        return PooledConnection(pool.acquire(), request_scoped=False)
+
+    if "_db_slots" not in g:
+        g._db_slots, g._db_idle, g._db_proxies = [], [], []
+    if g._db_idle:
+        with pool._cond:
+            pool._stats["request_reuses"] += 1
+        slot = g._db_idle.pop()
+    else:
+        slot = pool.acquire()
+        g._db_slots.append(slot)
+    conn = PooledConnection(slot, request_scoped=True)
+    g._db_proxies.append(conn)
+    return conn
+
+
+def release_request_connections(exc=None):
+    """Teardown app context: semua koneksi request kembali ke pool."""
+    slots = g.pop("_db_slots", None)
+    g.pop("_db_idle", None)
+    # proxy yang belum di-close tidak boleh mengembalikan slot yang sama lagi nanti
+    for conn in g.pop("_db_proxies", ()):
+        conn._slot = None
+    if not slots:
+        return
+    pool = get_pool()
+    for slot in slots:
+        pool.release(slot)
+
+
+def init_app(app):
+    app.teardown_appcontext(release_request_connections)
+
+
+def get_stats():
+    return get_pool().stats()
@@ -1,3 +1,5 @@
+from utils.scan_stats import SET_SCANNED_AT_SQL, record_scans
+
 # from datetime import datetime, timedelta
 
 # import random
@@ -17,4 +19,60 @@
 #             "kesegaran": round(random.uniform(7.5, 10), 2),        # contoh: skala 7.5-10
 #             "berat_telur": round(random.uniform(50, 70), 1),       # berat, misal 50g-70g
 #         })
-#     return scans
\ No newline at end of file
+#     return scans
+
+# =============== INSERT egg_scans (dipakai upload & tray) ===============
+
+EGG_SCAN_INSERT_SQL = """
+    INSERT INTO egg_scans (
+        user_id,
+        numeric_id,
+        scanned_at,
+        ketebalan,
+        kebersihan,
+        keutuhan,
+        kesegaran,
+        berat_telur,
+        berat_cat,
+        grade,
+        confidence,
+        image_path,
+        status,
+        is_listed
+    ) VALUES (
+        %s, %s, @eggvision_scanned_at, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+        'available', FALSE
+    )
+"""
+
+
+def egg_scan_row(user_id, grade, grade_conf, detail, image_path, numeric_id=None):
+    """Susun parameter 1 baris egg_scans dari hasil grading (grade, conf, detail)."""
+    return (
+        user_id,
+        numeric_id,
+        detail.get("color"),        # ketebalan
+        detail.get("kebersihan"),   # kebersihan
+        detail.get("keutuhan"),     # keutuhan
+        detail.get("kesegaran"),    # kesegaran
+        detail.get("berat_telur"),  # berat_telur
+        detail.get("berat"),        # berat_cat
+        grade,
+        grade_conf,
+        image_path,
+    )
+
+
+def insert_egg_scans(cur, rows):
+    """
+    Bulk insert baris hasil `egg_scan_row` dalam 1 executemany, plus update
+    rollup scan_daily_stats di transaksi yang sama (commit oleh pemanggil).
+    Rollup ditulis duluan supaya cur.lastrowid tetap id egg_scans.
+    """
+    if not rows:
+        return 0
+    cur.execute(SET_SCANNED_AT_SQL)
+    # (user_id, grade, berat_cat, berat_telur), lihat urutan di egg_scan_row
+    record_scans(cur, [(row[0], row[8], row[7], row[6]) for row in rows])
+    cur.executemany(EGG_SCAN_INSERT_SQL, rows)
+    return cur.rowcount
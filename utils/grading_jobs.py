@@ -0,0 +1,376 @@
+# utils/grading_jobs.py
+"""
+Grading async: upload langsung dibalas 202 + job id, grading jalan di thread
+worker, hasil diambil lewat GET /eggmonitor/jobs/<id>.
+
+Job disimpan di tabel `grading_jobs` (status queued -> running -> done/failed),
+jadi job yang belum selesai saat worker restart diambil lagi oleh
+`resume_pending_jobs()` saat app start. Job yang macet di 'running' lebih dari
+GRADING_JOB_STALE_S (thread worker mati / hang) dikejar thread sweeper tiap
+GRADING_JOB_SWEEP_S. Klaim job memakai UPDATE bersyarat (status='queued'),
+sehingga beberapa proses gunicorn tidak memproses job yang sama dua kali.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import mysql.connector
+
+from config import (
+    GRADING_JOB_WORKERS,
+    GRADING_JOB_MAX_ATTEMPTS,
+    GRADING_JOB_STALE_S,
+    GRADING_JOB_SWEEP_S,
+)
+from utils.database import get_db_connection
+from utils.egg_scan_data import egg_scan_row, insert_egg_scans
+
+_executor = None
+_executor_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"enqueued": 0, "done": 0, "failed": 0, "retried": 0, "resumed": 0, "swept": 0}
+_sweeper = None
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=GRADING_JOB_WORKERS, thread_name_prefix="eggvision-job"
+            )
+        return _executor
+
+
+def _count(name, n=1):
+    with _stats_lock:
+        _stats[name] += n
+
+
+# =============== ENQUEUE ===============
+
+def enqueue_job(user_id, image_path, data=None, berat_kategori=None, saving=None):
+    """
+    Simpan job 'queued' lalu jadwalkan ke worker. `image_path` relatif ke
+    static/ (mis. "uploads/telur.jpg"); `data` = bytes gambar kalau masih di
+    memori (tidak perlu baca ulang dari disk). `saving` = Future penulisan file
+    (utils.upload_storage) yang ditunggu sebelum job tersimpan, supaya job yang
+    di-resume setelah restart selalu menemukan filenya.
+    Mengembalikan job id, atau None kalau DB tidak tersedia.
+    """
+    if saving is not None:
+        from utils.upload_storage import wait_saved
+        if not wait_saved(saving):
+            return None
+
+    job_id = uuid.uuid4().hex
+    conn = get_db_connection()
+    if not conn:
+        return None
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            INSERT INTO grading_jobs (id, user_id, image_path, berat_cat)
+            VALUES (%s, %s, %s, %s)
+            """,
+            (job_id, user_id, image_path, berat_kategori),
+        )
+        conn.commit()
+        cur.close()
+    except mysql.connector.Error as e:
+        print(f"[GradingJobs] enqueue error: {e}")
+        return None
+    finally:
+        conn.close()
+
+    _count("enqueued")
+    _get_executor().submit(_process, job_id, data)
+    return job_id
+
+
+# =============== WORKER ===============
+
+def _claim(job_id):
+    """queued -> running secara atomik; None kalau job sudah diambil proses lain."""
+    conn = get_db_connection()
+    if not conn:
+        return None
+    try:
+        cur = conn.cursor(dictionary=True)
+        cur.execute(
+            """
+            UPDATE grading_jobs
+            SET status = 'running', started_at = NOW(), attempts = attempts + 1
+            WHERE id = %s AND status = 'queued'
+            """,
+            (job_id,),
+        )
+        claimed = cur.rowcount == 1
+        conn.commit()
+        if not claimed:
+            cur.close()
+            return None
+        cur.execute(
+            "SELECT id, user_id, image_path, berat_cat, attempts FROM grading_jobs WHERE id = %s",
+            (job_id,),
+        )
+        job = cur.fetchone()
+        cur.close()
+        return job
+    finally:
+        conn.close()
+
+
+def _finish(job_id, status, result=None, error=None, scan_row=None):
+    """Tulis hasil job; baris egg_scans (kalau ada) masuk di transaksi yang sama."""
+    conn = get_db_connection()
+    if not conn:
+        return False
+    try:
+        cur = conn.cursor()
+        egg_scan_id = None
+        if scan_row is not None:
+            insert_egg_scans(cur, [scan_row])
+            egg_scan_id = cur.lastrowid
+        cur.execute(
+            """
+            UPDATE grading_jobs
+            SET status = %s, result = %s, error = %s, egg_scan_id = %s, finished_at = NOW()
+            WHERE id = %s
+            """,
+            (status, json.dumps(result) if result is not None else None, error, egg_scan_id, job_id),
+        )
+        conn.commit()
+        cur.close()
+        return True
+    except mysql.connector.Error as e:
+        conn.rollback()
+        print(f"[GradingJobs] finish error ({job_id}): {e}")
+        return False
+    finally:
+        conn.close()
+
+
+def _fail(job, error, result=None):
+    """
+    Job gagal permanen. Upload-nya tidak akan dipakai lagi, jadi langsung
+    dilepas (dihapus kalau tidak direferensikan scan lain), tidak menunggu GC.
+    """
+    from utils.upload_storage import release_upload
+
+    if _finish(job["id"], "failed", result=result, error=error[:255]):
+        release_upload(job["image_path"])
+    _count("failed")
+
+
+def _requeue_or_fail(job, error):
+    if job["attempts"] >= GRADING_JOB_MAX_ATTEMPTS:
+        _fail(job, error)
+        return
+
+    conn = get_db_connection()
+    if not conn:
+        return
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            "UPDATE grading_jobs SET status = 'queued', error = %s WHERE id = %s",
+            (error[:255], job["id"]),
+        )
+        conn.commit()
+        cur.close()
+    finally:
+        conn.close()
+    _count("retried")
+    # backoff 2, 4, 8 ... detik supaya server yang sibuk tidak langsung dihantam lagi
+    delay = 2 ** job["attempts"]
+    threading.Timer(delay, lambda: _get_executor().submit(_process, job["id"])).start()
+
+
+def _process(job_id, data=None):
+    from utils.inference_server import grade_image, InferenceUnavailable
+    from utils.quality_gate import ImageRejected
+
+    try:
+        job = _claim(job_id)
+    except mysql.connector.Error as e:
+        print(f"[GradingJobs] claim error ({job_id}): {e}")
+        return
+    if job is None:
+        return
+
+    # image_path relatif ke static/, sama seperti egg_scans.image_path
+    image = data if data is not None else os.path.join("static", job["image_path"])
+    try:
+        grade, grade_conf, detail = grade_image(image, job["berat_cat"])
+    except ImageRejected as e:
+        _fail(job, str(e), result={"reason": e.reason})
+        return
+    except (InferenceUnavailable, TimeoutError) as e:
+        _requeue_or_fail(job, f"busy: {e}")
+        return
+    except Exception as e:
+        print(f"[GradingJobs] grading error ({job_id}): {e}")
+        _requeue_or_fail(job, str(e))
+        return
+
+    result = {"grade": grade, "confidence": round(grade_conf, 2), "detail": detail}
+    row = egg_scan_row(job["user_id"], grade, grade_conf, detail, job["image_path"])
+    if _finish(job_id, "done", result=result, scan_row=row):
+        _count("done")
+    else:
+        _requeue_or_fail(job, "gagal menyimpan hasil")
+
+
+# =============== STATUS & RESUME ===============
+
+def get_job(job_id, user_id=None):
+    """Status job (dict) milik `user_id`; None kalau tidak ada."""
+    conn = get_db_connection()
+    if not conn:
+        return None
+    try:
+        cur = conn.cursor(dictionary=True)
+        sql = """
+            SELECT id, user_id, image_path, status, attempts, result, error, egg_scan_id,
+                   created_at, started_at, finished_at
+            FROM grading_jobs WHERE id = %s
+        """
+        params = [job_id]
+        if user_id is not None:
+            sql += " AND user_id = %s"
+            params.append(user_id)
+        cur.execute(sql, tuple(params))
+        job = cur.fetchone()
+        cur.close()
+    finally:
+        conn.close()
+
+    if job and job["result"]:
+        job["result"] = json.loads(job["result"])
+    return job
+
+
+def _recover_stale_jobs():
+    """
+    Job 'running' lebih lama dari GRADING_JOB_STALE_S dikembalikan ke 'queued',
+    atau 'failed' (upload dilepas) kalau attempts sudah habis. UPDATE bersyarat
+    status + started_at, jadi aman dijalankan beberapa proses sekaligus.
+    Mengembalikan id job yang di-queue ulang.
+    """
+    conn = get_db_connection()
+    if not conn:
+        return []
+    requeued, failed = [], []
+    stale = "status = 'running' AND started_at < NOW() - INTERVAL %s SECOND"
+    try:
+        cur = conn.cursor(dictionary=True)
+        cur.execute(
+            f"SELECT id, image_path, attempts FROM grading_jobs WHERE {stale}",
+            (GRADING_JOB_STALE_S,),
+        )
+        for job in cur.fetchall():
+            if job["attempts"] >= GRADING_JOB_MAX_ATTEMPTS:
+                cur.execute(
+                    f"""
+                    UPDATE grading_jobs
+                    SET status = 'failed', error = %s, finished_at = NOW()
+                    WHERE id = %s AND {stale}
+                    """,
+                    ("timeout: worker tidak menyelesaikan job", job["id"], GRADING_JOB_STALE_S),
+                )
+                if cur.rowcount == 1:
+                    failed.append(job)
+            else:
+                cur.execute(
+                    f"UPDATE grading_jobs SET status = 'queued' WHERE id = %s AND {stale}",
+                    (job["id"], GRADING_JOB_STALE_S),
+                )
+                if cur.rowcount == 1:
+                    requeued.append(job["id"])
+        conn.commit()
+        cur.close()
+    except mysql.connector.Error as e:
+        conn.rollback()
+        print(f"[GradingJobs] recover error: {e}")
+        return []
+    finally:
+        conn.close()
+
+    if failed:
+        from utils.upload_storage import release_upload
+        for job in failed:
+            release_upload(job["image_path"])
+        _count("failed", len(failed))
+    return requeued
+
+
+def sweep_stale_jobs():
+    """Job 'running' yang macet dijadwalkan ulang (atau digagalkan); return jumlah job."""
+    job_ids = _recover_stale_jobs()
+    for job_id in job_ids:
+        _get_executor().submit(_process, job_id)
+    if job_ids:
+        _count("swept", len(job_ids))
+        print(f"[GradingJobs] {len(job_ids)} job macet dijadwalkan ulang")
+    return len(job_ids)
+
+
+def _sweep_loop():
+    while True:
+        time.sleep(GRADING_JOB_SWEEP_S)
+        try:
+            sweep_stale_jobs()
+        except Exception as e:
+            print(f"[GradingJobs] sweep error: {e}")
+
+
+def start_stale_job_sweeper():
+    """Thread daemon sweep_stale_jobs() tiap GRADING_JOB_SWEEP_S (sekali per proses)."""
+    global _sweeper
+    if GRADING_JOB_SWEEP_S <= 0:
+        return
+    with _executor_lock:
+        if _sweeper is None:
+            _sweeper = threading.Thread(target=_sweep_loop, name="eggvision-job-sweeper", daemon=True)
+            _sweeper.start()
+
+
+def resume_pending_jobs():
+    """
+    Dipanggil saat app start: job 'running' yang macet (proses mati di tengah
+    jalan) dikembalikan ke 'queued', lalu semua job 'queued' dijadwalkan lagi.
+    """
+    _recover_stale_jobs()
+    conn = get_db_connection()
+    if not conn:
+        return 0
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT id FROM grading_jobs WHERE status = 'queued' ORDER BY created_at")
+        job_ids = [row[0] for row in cur.fetchall()]
+        conn.commit()
+        cur.close()
+    except mysql.connector.Error as e:
+        print(f"[GradingJobs] resume error: {e}")
+        return 0
+    finally:
+        conn.close()
+
+    for job_id in job_ids:
+        _get_executor().submit(_process, job_id)
+    if job_ids:
+        _count("resumed", len(job_ids))
+        print(f"[GradingJobs] {len(job_ids)} job dilanjutkan")
+    return len(job_ids)
+
+
+def get_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["workers"] = GRADING_JOB_WORKERS
+    return stats
@@ -0,0 +1,138 @@
+# utils/image_decode.py
+"""
+Decode gambar upload dengan biaya sebanding ukuran target, bukan ukuran sumber.
+
+`load_img(path, target_size=IMG_SIZE)` men-decode foto HP 12 MP penuh lalu
+mengecilkannya ke 224x224. Jalur cepat di sini:
+  1. Header dibaca dulu; bitmap > ML_MAX_IMAGE_PIXELS ditolak sebelum decode.
+  2. JPEG: `draft()` -> decoder libjpeg langsung men-decode di skala 1/2, 1/4,
+     atau 1/8 (DCT scaling), minimal 2x ukuran target.
+  3. Format lain (PNG/WebP): `reduce()` box-filter ke <= 2x ukuran target.
+  4. Resize akhir ke IMG_SIZE dengan NEAREST, sama seperti `load_img`.
+
+Toleransi terhadap preprocessing lama (load_img + NEAREST dari resolusi penuh):
+  - sumber <= 2x target per sisi (mis. 600x338, 512x512, 1280x720): identik,
+    karena langkah 2-3 tidak aktif.
+  - sumber besar (mis. JPEG 3024x3024): nilai piksel berbeda karena NEAREST
+    dari resolusi penuh meng-alias, sedangkan DCT scaling merata-rata. Terukur
+    mean |Δpixel| ~3.4 (skala 0-255); batas yang diterima DECODE_TOLERANCE_MAD.
+  - noise per-piksel (gambar sintetis benchmark) ~11: kasus aliasing terburuk,
+    bukan foto telur sungguhan.
+Cek ulang di data sendiri dengan `check_decode_parity(paths)` (juga dilaporkan
+benchmark_inference.py).
+"""
+import io
+
+import numpy as np
+from PIL import Image
+
+from config import ML_MAX_IMAGE_PIXELS
+
+# Rata-rata |Δpixel| (0-255) maksimum terhadap decode lama yang masih diterima.
+DECODE_TOLERANCE_MAD = 8.0
+
+
+class ImageTooLarge(ValueError):
+    """Resolusi gambar melebihi ML_MAX_IMAGE_PIXELS (ditolak sebelum decode)."""
+
+
+def open_image(source):
+    """
+    Buka gambar secara lazy (baru header yang dibaca) dari path, bytes, atau
+    file-like, lalu cek batas jumlah piksel.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    try:
+        img = Image.open(source)
+    except Image.DecompressionBombError as e:
+        # bukan turunan OSError; samakan dengan penolakan batas piksel di bawah
+        raise ImageTooLarge(str(e)) from e
+    width, height = img.size
+    if width * height > ML_MAX_IMAGE_PIXELS:
+        img.close()
+        raise ImageTooLarge(
+            f"Gambar {width}x{height} melebihi batas {ML_MAX_IMAGE_PIXELS} piksel"
+        )
+    return img
+
+
+def reduce_to(img: Image.Image, min_width, min_height):
+    """Perkecil (draft JPEG / box reduce) tapi tetap >= (min_width, min_height)."""
+    if img.format == "JPEG":
+        img.draft("RGB", (min_width, min_height))
+    img = img.convert("RGB")
+    factor = min(img.width // min_width, img.height // min_height)
+    if factor >= 2:
+        img = img.reduce(factor)
+    return img
+
+
+def decode_reduced(source, min_width, min_height):
+    """Decode RGB yang diperkecil (draft / reduce) tapi tetap >= min_width x min_height."""
+    with open_image(source) as img:
+        return reduce_to(img, min_width, min_height)
+
+
+def decode_for_model(source, size):
+    """
+    Decode + resize ke `size` (height, width) -> array float32 (1, h, w, 3),
+    tanpa /255.0 (sama dengan `load_img` + `img_to_array`).
+    """
+    height, width = size
+    with open_image(source) as img:
+        small = reduce_to(img, width * 2, height * 2)
+        small = small.resize((width, height), Image.NEAREST)
+    return np.expand_dims(np.asarray(small, dtype="float32"), axis=0)
+
+
+def decode_thumbnail(source, max_side):
+    """Thumbnail RGB dengan sisi terpanjang <= max_side (untuk cek cepat)."""
+    with open_image(source) as img:
+        small = reduce_to(img, max_side, max_side)
+        small.thumbnail((max_side, max_side), Image.BILINEAR)
+    return small
+
+
+def _legacy_decode(source, size):
+    height, width = size
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    with Image.open(source) as img:
+        img = img.convert("RGB").resize((width, height), Image.NEAREST)
+    return np.expand_dims(np.asarray(img, dtype="float32"), axis=0)
+
+
+def check_decode_parity(images, size=(224, 224)):
+    """
+    Bandingkan `decode_for_model` dengan decode lama (resolusi penuh + NEAREST).
+    Mengembalikan mean/max |Δpixel| per gambar + ringkasan terhadap toleransi.
+    """
+    per_image = []
+    for i, image in enumerate(images):
+        if hasattr(image, "seek"):
+            image.seek(0)
+        data = image if isinstance(image, (str, bytes, bytearray)) else image.read()
+        try:
+            legacy = _legacy_decode(data, size)
+            fast = decode_for_model(data, size)
+        except Exception as e:
+            per_image.append({"index": i, "error": str(e)})
+            continue
+        diff = np.abs(legacy - fast)
+        per_image.append({
+            "index": i,
+            "mean_abs_diff": round(float(diff.mean()), 3),
+            "max_abs_diff": round(float(diff.max()), 3),
+        })
+
+    measured = [r["mean_abs_diff"] for r in per_image if "mean_abs_diff" in r]
+    worst = max(measured) if measured else 0.0
+    return {
+        "n": len(measured),
+        "identical": sum(1 for m in measured if m == 0.0),
+        "worst_mean_abs_diff": worst,
+        "tolerance_mad": DECODE_TOLERANCE_MAD,
+        "within_tolerance": worst <= DECODE_TOLERANCE_MAD,
+        "images": per_image,
+    }
@@ -0,0 +1,332 @@
+# utils/inference_pool.py
+"""
+Worker pool grading di luar proses web.
+
+Model Keras hanya di-load oleh proses worker pool, bukan oleh tiap worker
+gunicorn. Web tier cukup mengirim request lewat Unix socket
+(multiprocessing.connection) dan menunggu hasilnya, jadi worker web tetap
+ringan (tanpa TensorFlow) dan bisa di-scale terpisah.
+
+Menjalankan pool:
+    python -m utils.inference_pool
+Web tier memakai pool bila INFERENCE_MODE=pool.
+"""
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from itertools import count
+from multiprocessing.connection import Client, Listener
+
+from config import (
+    INFERENCE_MAX_BATCH_SIZE,
+    INFERENCE_MAX_WAIT_MS,
+    INFERENCE_MAX_QUEUE,
+    INFERENCE_TIMEOUT_S,
+    INFERENCE_POOL_ADDRESS,
+    INFERENCE_POOL_AUTHKEY,
+    INFERENCE_POOL_WORKERS,
+)
+from utils.inference_server import InferenceQueueFull, InferenceUnavailable
+
+
+class InferencePoolUnavailable(InferenceUnavailable):
+    """Pool grading tidak bisa dihubungi / tidak merespons."""
+
+
+# =============== PROSES WORKER (pemilik model) ===============
+
+def _worker_main(task_queue, result_queue, ready_counter, max_batch_size, max_wait_ms):
+    # TensorFlow + model hanya di-load di sini.
+    from utils.ml_utils import is_ready, predict_images, predict_multiview, readiness, warm_up
+
+    warm_up()
+    if is_ready():
+        with ready_counter.get_lock():
+            ready_counter.value += 1
+        print(f"[InferencePool] worker {os.getpid()} siap")
+    else:
+        # tidak dihitung warmed_up -> ping() melaporkan ready=False
+        print(f"[InferencePool] worker {os.getpid()} tidak siap: {readiness()['error']}")
+
+    max_wait = max_wait_ms / 1000.0
+    while True:
+        first = task_queue.get()
+        if first is None:
+            break
+        tasks = [first]
+        deadline = time.perf_counter() + max_wait
+        while len(tasks) < max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                task = task_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if task is None:
+                task_queue.put(None)  # teruskan sinyal stop ke worker lain
+                break
+            tasks.append(task)
+
+        # Task multiview (1 telur, beberapa kamera) sudah 1 batch sendiri.
+        singles = [t for t in tasks if t[1] == "grade"]
+        for task_id, _, (views, view_names), berat in (t for t in tasks if t[1] == "multiview"):
+            try:
+                result = predict_multiview(views, berat, view_names=view_names)
+                result_queue.put((task_id, True, result))
+            except Exception as e:
+                print(f"[InferencePool] multiview error: {e}")
+                result_queue.put((task_id, False, str(e)))
+        if not singles:
+            continue
+
+        try:
+            results = predict_images(
+                [image for _, _, image, _ in singles],
+                [berat for _, _, _, berat in singles],
+                batch_size=max_batch_size,
+            )
+            for (task_id, _, _, _), result in zip(singles, results):
+                result_queue.put((task_id, True, result))
+        except Exception as e:
+            print(f"[InferencePool] batch error: {e}")
+            for task_id, _, _, _ in singles:
+                result_queue.put((task_id, False, str(e)))
+
+
+# =============== PROSES UTAMA POOL (socket + dispatch) ===============
+
+class InferencePoolServer:
+    def __init__(self, address=INFERENCE_POOL_ADDRESS, workers=INFERENCE_POOL_WORKERS,
+                 authkey=INFERENCE_POOL_AUTHKEY):
+        self.address = address
+        self.workers = max(1, int(workers))
+        self.authkey = authkey.encode() if isinstance(authkey, str) else authkey
+
+        ctx = mp.get_context("spawn")  # jangan fork state TensorFlow
+        self._ctx = ctx
+        self._task_queue = ctx.Queue(maxsize=INFERENCE_MAX_QUEUE)
+        self._result_queue = ctx.Queue()
+        self._ready_counter = ctx.Value("i", 0)
+        self._processes = []
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._ids = count(1)
+
+    def _start_workers(self):
+        for _ in range(self.workers):
+            p = self._ctx.Process(
+                target=_worker_main,
+                args=(self._task_queue, self._result_queue, self._ready_counter,
+                      INFERENCE_MAX_BATCH_SIZE, INFERENCE_MAX_WAIT_MS),
+                daemon=True,
+            )
+            p.start()
+            self._processes.append(p)
+
+    def _dispatch_results(self):
+        while True:
+            task_id, ok, payload = self._result_queue.get()
+            with self._pending_lock:
+                waiter = self._pending.pop(task_id, None)
+            if waiter is not None:
+                waiter["result"] = (ok, payload)
+                waiter["event"].set()
+
+    def _grade(self, items, kind="grade"):
+        """
+        Antrikan tiap (image, berat) sebagai task terpisah supaya worker bisa
+        menggabungkannya ke micro-batch (dan membaginya ke beberapa worker).
+        kind="multiview": `image` berisi (list view kamera, nama view) untuk 1 telur.
+        """
+        waiters = []
+        with self._pending_lock:
+            for _ in items:
+                task_id = next(self._ids)
+                waiter = {"event": threading.Event(), "result": None}
+                self._pending[task_id] = waiter
+                waiters.append((task_id, waiter))
+
+        def drop_pending():
+            with self._pending_lock:
+                for task_id, _ in waiters:
+                    self._pending.pop(task_id, None)
+
+        # Backpressure cepat: antrian penuh langsung "busy", request tidak ditahan
+        try:
+            for (task_id, _), (image, berat) in zip(waiters, items):
+                self._task_queue.put_nowait((task_id, kind, image, berat))
+        except queue.Full:
+            drop_pending()
+            return "busy", "Antrian grading penuh"
+
+        deadline = time.perf_counter() + INFERENCE_TIMEOUT_S
+        results = []
+        for _, waiter in waiters:
+            if not waiter["event"].wait(max(0.0, deadline - time.perf_counter())):
+                drop_pending()
+                return "error", "Timeout menunggu worker"
+            ok, payload = waiter["result"]
+            if not ok:
+                drop_pending()
+                return "error", payload
+            results.append(payload)
+        return "ok", results
+
+    def _handle_connection(self, conn):
+        try:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    break
+
+                op = request[0]
+                if op == "ping":
+                    alive = sum(p.is_alive() for p in self._processes)
+                    warmed = self._ready_counter.value
+                    conn.send(("ok", {"workers": self.workers, "alive": alive,
+                                      "warmed_up": warmed, "ready": alive > 0 and warmed > 0}))
+                    continue
+                if op == "grade":
+                    _, image, berat = request
+                    status, payload = self._grade([(image, berat)])
+                    conn.send((status, payload[0] if status == "ok" else payload))
+                elif op == "grade_many":
+                    _, images, berat_list = request
+                    conn.send(self._grade(list(zip(images, berat_list))))
+                elif op == "multiview":
+                    _, views, berat, view_names = request
+                    status, payload = self._grade([((views, view_names), berat)], kind="multiview")
+                    conn.send((status, payload[0] if status == "ok" else payload))
+                else:
+                    conn.send(("error", f"unknown op {op}"))
+        finally:
+            conn.close()
+
+    def serve_forever(self):
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+
+        self._start_workers()
+        threading.Thread(target=self._dispatch_results, daemon=True).start()
+
+        listener = Listener(self.address, family="AF_UNIX", authkey=self.authkey)
+        print(f"✅ Inference pool: {self.workers} worker, socket {self.address}")
+        try:
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    print(f"[InferencePool] accept error: {e}")
+                    continue
+                threading.Thread(target=self._handle_connection, args=(conn,), daemon=True).start()
+        finally:
+            listener.close()
+            for _ in self._processes:
+                self._task_queue.put(None)
+
+
+# =============== CLIENT (dipakai worker web) ===============
+
+_local = threading.local()
+_stats_lock = threading.Lock()
+_stats = {"requests": 0, "errors": 0, "busy": 0, "total_ms": 0.0}
+
+
+def _get_conn():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        authkey = INFERENCE_POOL_AUTHKEY
+        authkey = authkey.encode() if isinstance(authkey, str) else authkey
+        try:
+            conn = Client(INFERENCE_POOL_ADDRESS, family="AF_UNIX", authkey=authkey)
+        except (OSError, EOFError) as e:
+            raise InferencePoolUnavailable(f"Pool grading tidak tersedia: {e}")
+        _local.conn = conn
+    return conn
+
+
+def _reset_conn():
+    conn = getattr(_local, "conn", None)
+    _local.conn = None
+    if conn is not None:
+        try:
+            conn.close()
+        except OSError:
+            pass
+
+
+def _call(request):
+    # 1x retry kalau koneksi lama sudah putus (mis. pool di-restart)
+    for attempt in range(2):
+        conn = _get_conn()
+        try:
+            conn.send(request)
+            return conn.recv()
+        except (EOFError, OSError, BrokenPipeError) as e:
+            _reset_conn()
+            if attempt:
+                raise InferencePoolUnavailable(f"Koneksi pool grading putus: {e}")
+
+
+def _remote(request):
+    started = time.perf_counter()
+    try:
+        status, payload = _call(request)
+    except InferencePoolUnavailable:
+        with _stats_lock:
+            _stats["errors"] += 1
+        raise
+
+    with _stats_lock:
+        _stats["requests"] += 1
+        _stats["total_ms"] += (time.perf_counter() - started) * 1000.0
+        if status == "busy":
+            _stats["busy"] += 1
+        elif status != "ok":
+            _stats["errors"] += 1
+
+    if status == "busy":
+        raise InferenceQueueFull(payload)
+    if status != "ok":
+        raise InferencePoolUnavailable(payload)
+    return payload
+
+
+def grade_remote(image, berat_kategori=None):
+    """Kirim 1 gambar (path / array / bytes) ke pool, kembalikan (grade, conf, detail)."""
+    return _remote(("grade", image, berat_kategori))
+
+
+def grade_remote_many(images, berat_list):
+    """Kirim N gambar dalam 1 round trip; hasil list (grade, conf, detail) sesuai urutan."""
+    return _remote(("grade_many", list(images), list(berat_list)))
+
+
+def grade_remote_multiview(views, berat_kategori=None, view_names=None):
+    """Kirim semua view kamera 1 telur; kembalikan (grade, conf, detail) gabungan."""
+    return _remote(("multiview", list(views), berat_kategori, view_names))
+
+
+def ping():
+    status, payload = _call(("ping",))
+    return payload if status == "ok" else None
+
+
+def get_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["avg_ms"] = round(stats["total_ms"] / stats["requests"], 3) if stats["requests"] else 0.0
+    stats["address"] = INFERENCE_POOL_ADDRESS
+    return stats
+
+
+def main():
+    InferencePoolServer().serve_forever()
+
+
+if __name__ == "__main__":
+    main()
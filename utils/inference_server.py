@@ -0,0 +1,357 @@
+# utils/inference_server.py
+"""
+Micro-batching untuk grading telur.
+
+Request upload yang datang bersamaan tidak lagi memanggil `model.predict`
+sendiri-sendiri. Tiap request masuk antrian, lalu 1 thread worker
+mengumpulkan request menjadi micro-batch (dibatasi ukuran batch maksimum
+dan waktu tunggu maksimum), menjalankan `predict_images` sekali per batch,
+dan mengisi Future milik masing-masing pemanggil.
+"""
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from config import (
+    INFERENCE_MODE,
+    INFERENCE_MAX_BATCH_SIZE,
+    INFERENCE_MAX_WAIT_MS,
+    INFERENCE_MAX_QUEUE,
+    INFERENCE_TIMEOUT_S,
+    ML_WARMUP_ON_START,
+    PREDICTION_CACHE_ENABLED,
+    QUALITY_GATE_ENABLED,
+)
+from utils.quality_gate import ImageRejected, check_image, get_stats as quality_gate_stats
+
+
+class InferenceUnavailable(Exception):
+    """Grading tidak bisa dilayani saat ini (antrian penuh, pool mati, dll)."""
+
+
+class InferenceQueueFull(InferenceUnavailable):
+    """Antrian grading penuh; pemanggil sebaiknya minta user mencoba lagi."""
+
+
+class InferenceNotReady(InferenceUnavailable):
+    """Model masih warm-up di worker ini."""
+
+
+class MicroBatcher:
+    def __init__(self, batch_fn, max_batch_size=8, max_wait_ms=10, max_queue=256):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms) / 1000.0)
+        self._queue = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._lock = threading.Lock()
+        self._thread = None
+
+        # Metrics
+        self._batches = 0
+        self._items = 0
+        self._rejected = 0
+        self._errors = 0
+        self._queue_latency_ms = deque(maxlen=1000)
+        self._batch_sizes = deque(maxlen=1000)
+
+    # ---------- lifecycle ----------
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="eggvision-microbatcher", daemon=True
+                )
+                self._thread.start()
+        return self
+
+    # ---------- API ----------
+
+    def submit(self, item):
+        """Masukkan 1 item ke antrian, kembalikan Future hasilnya."""
+        self.start()
+        future = Future()
+        try:
+            self._queue.put_nowait((item, future, time.perf_counter()))
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            raise InferenceQueueFull("Antrian grading penuh")
+        return future
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._queue_latency_ms)
+            sizes = list(self._batch_sizes)
+            batches = self._batches
+            items = self._items
+            rejected = self._rejected
+            errors = self._errors
+
+        def pct(p):
+            if not latencies:
+                return 0.0
+            idx = min(len(latencies) - 1, int(round(p / 100.0 * (len(latencies) - 1))))
+            return round(latencies[idx], 3)
+
+        avg_batch = (sum(sizes) / len(sizes)) if sizes else 0.0
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "batches": batches,
+            "items": items,
+            "rejected": rejected,
+            "errors": errors,
+            "avg_batch_size": round(avg_batch, 3),
+            "batch_fill_rate": round(avg_batch / self.max_batch_size, 4) if sizes else 0.0,
+            "queue_latency_ms": {"p50": pct(50), "p95": pct(95), "p99": pct(99)},
+        }
+
+    # ---------- worker ----------
+
+    def _collect(self):
+        first = self._queue.get()
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            items = [item for item, _, _ in batch]
+
+            with self._lock:
+                self._batches += 1
+                self._items += len(batch)
+                self._batch_sizes.append(len(batch))
+                for _, _, enqueued in batch:
+                    self._queue_latency_ms.append((started - enqueued) * 1000.0)
+
+            try:
+                results = self.batch_fn(items)
+            except Exception as e:
+                print(f"[Inference] batch error: {e}")
+                with self._lock:
+                    self._errors += 1
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+
+
+# =============== SINGLETON UNTUK GRADING ===============
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def _grade_batch(items):
+    # Import di sini supaya modul ini ringan (tanpa TensorFlow) saat di-import.
+    from utils.ml_utils import predict_images
+
+    images = [image for image, _ in items]
+    berat = [berat_kategori for _, berat_kategori in items]
+    return predict_images(images, berat, batch_size=INFERENCE_MAX_BATCH_SIZE)
+
+
+def get_batcher():
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = MicroBatcher(
+                _grade_batch,
+                max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+                max_wait_ms=INFERENCE_MAX_WAIT_MS,
+                max_queue=INFERENCE_MAX_QUEUE,
+            )
+        return _batcher
+
+
+def grade_image(image, berat_kategori=None):
+    """
+    Titik masuk grading untuk controller.
+    `image` boleh path, bytes, atau buffer (mis. `FileStorage.stream`); bytes
+    langsung di-decode dari memori tanpa baca-tulis disk.
+    Gambar yang isinya sudah pernah di-grade (hash sama, versi model sama)
+    langsung diambil dari prediction cache tanpa decode/inference.
+    Raise ImageRejected kalau gambar tidak lolos quality gate.
+    """
+    if hasattr(image, "read"):
+        image = image.read()
+    if isinstance(image, (bytearray, memoryview)):
+        image = bytes(image)
+    data = image if isinstance(image, bytes) else None
+
+    key = None
+    if PREDICTION_CACHE_ENABLED:
+        from utils import prediction_cache
+        from utils.ml_utils import grade_features
+
+        if data is None and isinstance(image, str):
+            try:
+                with open(image, "rb") as f:
+                    data = f.read()
+            except OSError as e:
+                print(f"[PredictionCache] read error: {e}")
+        if data is not None:
+            key = prediction_cache.make_key(data)
+            feats = prediction_cache.get(key)
+            if feats is not None:
+                return grade_features(feats, berat_kategori)
+
+    # Foto buram / gelap / tanpa telur ditolak sebelum masuk antrian model.
+    check_image(data if data is not None else image)
+
+    result = _run_inference(data if data is not None else image, berat_kategori)
+
+    if key is not None:
+        from utils import prediction_cache
+        from utils.ml_utils import features_from_detail
+        prediction_cache.put(key, features_from_detail(result[2]))
+    return result
+
+
+def _run_inference(image, berat_kategori=None):
+    """
+    INFERENCE_MODE=batch  -> lewat micro-batcher (antri, digabung per batch)
+    INFERENCE_MODE=pool   -> dikirim ke worker pool di luar proses (utils/inference_pool.py)
+    INFERENCE_MODE=direct -> langsung predict_image di thread pemanggil
+    """
+    if INFERENCE_MODE == "pool":
+        from utils.inference_pool import grade_remote
+        return grade_remote(image, berat_kategori)
+
+    if ML_WARMUP_ON_START:
+        from utils.ml_utils import is_ready
+        if not is_ready():
+            raise InferenceNotReady("Model grading masih warm-up")
+
+    if INFERENCE_MODE == "batch":
+        future = get_batcher().submit((image, berat_kategori))
+        return future.result(timeout=INFERENCE_TIMEOUT_S)
+
+    from utils.ml_utils import predict_image
+    return predict_image(image, berat_kategori)
+
+
+def grade_images(images, berat_kategori=None):
+    """
+    Grading N gambar sekaligus (mis. crop telur dari 1 foto tray).
+    Mengembalikan list (grade, grade_conf, detail) sesuai urutan input.
+    `berat_kategori` boleh None, satu string untuk semua, atau list per gambar.
+    """
+    images = list(images)
+    if berat_kategori is None or isinstance(berat_kategori, str):
+        berat_list = [berat_kategori] * len(images)
+    else:
+        berat_list = list(berat_kategori)
+    if not images:
+        return []
+
+    if INFERENCE_MODE == "pool":
+        from utils.inference_pool import grade_remote_many
+        return grade_remote_many(images, berat_list)
+
+    if ML_WARMUP_ON_START:
+        from utils.ml_utils import is_ready
+        if not is_ready():
+            raise InferenceNotReady("Model grading masih warm-up")
+
+    if INFERENCE_MODE == "batch":
+        batcher = get_batcher()
+        futures = [batcher.submit(item) for item in zip(images, berat_list)]
+        return [future.result(timeout=INFERENCE_TIMEOUT_S) for future in futures]
+
+    from utils.ml_utils import predict_images
+    return predict_images(images, berat_list)
+
+
+def grade_multiview(views, berat_kategori=None, view_names=None):
+    """
+    Grading 1 telur dari beberapa kamera (A1/A2/A3). Semua view sudah masuk
+    1 batch per model di `predict_multiview`, jadi tidak lewat micro-batcher.
+    """
+    views = list(views)
+    view_names = list(view_names or [f"A{i + 1}" for i in range(len(views))])
+
+    # View yang tidak lolos quality gate dibuang; kalau semua gagal, tolak.
+    passed, rejected = [], None
+    for view, name in zip(views, view_names):
+        try:
+            check_image(view)
+            passed.append((view, name))
+        except ImageRejected as e:
+            print(f"[QualityGate] view {name} ditolak: {e.reason}")
+            rejected = rejected or e
+    if not passed:
+        raise rejected
+    views, view_names = [v for v, _ in passed], [n for _, n in passed]
+
+    if INFERENCE_MODE == "pool":
+        from utils.inference_pool import grade_remote_multiview
+        return grade_remote_multiview(views, berat_kategori, view_names)
+
+    if ML_WARMUP_ON_START:
+        from utils.ml_utils import is_ready
+        if not is_ready():
+            raise InferenceNotReady("Model grading masih warm-up")
+
+    from utils.ml_utils import predict_multiview
+    return predict_multiview(views, berat_kategori, view_names=view_names)
+
+
+def start_warm_up():
+    """Dipanggil saat app start (ML_WARMUP_ON_START); di mode pool warm-up ada di worker pool."""
+    if INFERENCE_MODE == "pool":
+        return None
+    from utils.ml_utils import start_warm_up as _start
+    return _start()
+
+
+def readiness():
+    """Status siap-grading worker ini, untuk health check / load balancer."""
+    if INFERENCE_MODE == "pool":
+        from utils.inference_pool import ping
+        try:
+            info = ping()
+        except InferenceUnavailable as e:
+            return {"ready": False, "mode": INFERENCE_MODE, "error": str(e)}
+        return {"ready": bool(info and info.get("ready")), "mode": INFERENCE_MODE, "pool": info}
+
+    from utils.ml_utils import readiness as ml_readiness
+    info = ml_readiness()
+    if not ML_WARMUP_ON_START:
+        # Tanpa warm-up, model di-load saat grading pertama; worker tetap boleh menerima traffic.
+        info["ready"] = True
+    info["mode"] = INFERENCE_MODE
+    return info
+
+
+def get_stats():
+    stats = {"mode": INFERENCE_MODE}
+    if _batcher is not None:
+        stats["batcher"] = _batcher.stats()
+    if INFERENCE_MODE == "pool":
+        from utils.inference_pool import get_stats as pool_stats
+        stats["pool"] = pool_stats()
+    if PREDICTION_CACHE_ENABLED:
+        from utils.prediction_cache import get_stats as cache_stats
+        stats["prediction_cache"] = cache_stats()
+    if QUALITY_GATE_ENABLED:
+        stats["quality_gate"] = quality_gate_stats()
+    return stats
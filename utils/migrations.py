@@ -0,0 +1,703 @@
+# utils/migrations.py
+"""
+Migrasi skema bertingkat (pengganti init_db di setiap boot).
+
+Tiap migrasi punya nomor versi; versi yang sudah jalan dicatat di tabel
+`schema_version`. Startup app hanya menjalankan 1 query murah
+(`check_schema`) dan memberi peringatan kalau skema tertinggal; migrasi
+dijalankan eksplisit dengan `python migrate.py` (sebelum worker baru start).
+
+Aturan menulis migrasi baru:
+  - tambahkan fungsi `_vNNN_nama(cur)` + entri di MIGRATIONS, jangan ubah
+    migrasi yang sudah dirilis;
+  - DDL MySQL auto-commit, jadi buat migrasi idempoten (cek
+    information_schema dulu) supaya aman diulang kalau gagal di tengah;
+  - ALTER tabel besar (egg_scans, orders, ...) lewat `online_alter()`:
+    INSTANT -> INPLACE/LOCK=NONE, dan lock_wait_timeout pendek supaya DDL
+    tidak menahan query aplikasi di belakang metadata lock.
+Runner memegang GET_LOCK, jadi 2 deploy yang menjalankan migrasi bersamaan
+tidak saling balapan DDL.
+"""
+import time
+
+import mysql.connector
+from werkzeug.security import generate_password_hash
+
+from config import DB_CONFIG, DB_AUTO_MIGRATE, DB_DDL_LOCK_WAIT_S
+from utils.database import get_db_connection
+
+MIGRATION_LOCK = "eggvision_schema_migrate"
+MIGRATION_LOCK_TIMEOUT_S = 60
+
+# ALGORITHM tidak dikenal (MySQL 5.7 / MariaDB lama) / tidak bisa online
+_ALGORITHM_UNSUPPORTED = (1800, 1845, 1846)
+
+
+# =============== HELPER DDL ===============
+
+def column_type(cur, table, column):
+    """COLUMN_TYPE (mis. "enum('a','b')") atau None kalau kolom tidak ada."""
+    cur.execute(
+        """
+        SELECT COLUMN_TYPE FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND COLUMN_NAME = %s
+        """,
+        (DB_CONFIG["database"], table, column),
+    )
+    row = cur.fetchone()
+    if row is None:
+        return None
+    value = row[0]
+    return value.decode() if isinstance(value, (bytes, bytearray)) else value
+
+
+def _enum_values(col_type):
+    """"enum('a','b')" -> ['a', 'b'] ([] kalau kolom tidak ada)."""
+    if not col_type or not col_type.lower().startswith("enum("):
+        return []
+    return [v.strip("'") for v in col_type[5:-1].split(",")]
+
+
+def _enum_sql(values):
+    return "ENUM(" + ", ".join(f"'{v}'" for v in values) + ")"
+
+
+def index_exists(cur, table, index):
+    cur.execute(
+        """
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND INDEX_NAME = %s
+        """,
+        (DB_CONFIG["database"], table, index),
+    )
+    return cur.fetchone()[0] > 0
+
+
+def online_alter(cur, table, clause):
+    """
+    ALTER TABLE dengan algoritma se-online mungkin: INSTANT, lalu
+    INPLACE + LOCK=NONE, terakhir default (table copy, dengan peringatan).
+    Mengembalikan algoritma yang dipakai.
+    """
+    cur.execute("SET SESSION lock_wait_timeout = %s", (DB_DDL_LOCK_WAIT_S,))
+    for options in ("ALGORITHM=INSTANT", "ALGORITHM=INPLACE, LOCK=NONE"):
+        try:
+            cur.execute(f"ALTER TABLE {table} {clause}, {options}")
+            return options
+        except mysql.connector.Error as e:
+            if e.errno not in _ALGORITHM_UNSUPPORTED:
+                raise
+    print(f"   ⚠️  ALTER {table} tidak bisa online, memakai table copy: {clause}")
+    cur.execute(f"ALTER TABLE {table} {clause}")
+    return "COPY"
+
+
+# =============== MIGRASI ===============
+
+def _v001_base_schema(cur):
+    """Tabel inti (dulu dibuat init_db)."""
+    # ==========================
+    # 1. USERS (1 user = 1 farm)
+    # ==========================
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            email VARCHAR(100) UNIQUE NOT NULL,
+            password VARCHAR(255) NOT NULL,
+            role ENUM('guest','pembeli','pengusaha','admin') DEFAULT 'guest',
+
+            -- Info farm (dipakai kalau role = 'pengusaha')
+            farm_name VARCHAR(255) NULL,
+            farm_code VARCHAR(10) NULL,
+            farm_location VARCHAR(255) NULL,
+            farm_description TEXT NULL,
+
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # =========================================
+    # 2. EGG_SCANS (hasil upload & prediksi ML)
+    # =========================================
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS egg_scans (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+
+            numeric_id VARCHAR(50),
+            scanned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+            ketebalan VARCHAR(50),
+            kebersihan VARCHAR(50),
+            keutuhan VARCHAR(50),
+            kesegaran VARCHAR(50),
+            berat_telur DECIMAL(6,2),
+            berat_cat VARCHAR(20),
+
+            grade ENUM('A','B','C','Reject') NOT NULL,
+            confidence DECIMAL(5,2),
+
+            image_path VARCHAR(500),
+
+            kategori VARCHAR(50),
+            parameter_minus VARCHAR(100),
+            keterangan TEXT,
+
+            status ENUM('available','listed','sold','discarded')
+                DEFAULT 'available',
+
+            is_listed BOOLEAN DEFAULT FALSE,
+            listed_price DECIMAL(10,2),
+            listed_at TIMESTAMP NULL,
+
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+
+    # =====================================
+    # 2b. EGG_LISTINGS (stok siap jual per grade per seller)
+    # =====================================
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS egg_listings (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            seller_id INT NOT NULL,
+            grade ENUM('A','B','C') NOT NULL,
+            stock_eggs INT NOT NULL DEFAULT 0,
+            price_per_egg DECIMAL(10,2) NOT NULL,
+            status ENUM('active','inactive') DEFAULT 'active',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP NULL,
+            UNIQUE KEY uniq_seller_grade (seller_id, grade),
+            FOREIGN KEY (seller_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+
+
+    # =====================================
+    # 3. ORDERS (UPDATED ENUM per Migration)
+    # =====================================
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS orders (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+
+            buyer_id INT NULL,
+            seller_id INT NULL,
+
+            total DECIMAL(10,2) NOT NULL,
+
+            midtrans_order_id VARCHAR(100),
+            midtrans_transaction_id VARCHAR(100),
+
+            status ENUM('pending','paid','settlement','capture',
+                        'cancelled','expired','refunded')
+                DEFAULT 'pending',
+
+            payment_type VARCHAR(50),
+            shipping_address TEXT,
+
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP NULL,
+
+            UNIQUE KEY uniq_midtrans_order (midtrans_order_id),
+
+            FOREIGN KEY (buyer_id) REFERENCES users(id) ON DELETE SET NULL,
+            FOREIGN KEY (seller_id) REFERENCES users(id) ON DELETE SET NULL
+        )
+    ''')
+
+    # =========================================
+    # 4. ORDER_ITEMS (Telur mana saja yang terjual)
+    # =========================================
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS order_items (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            order_id INT NOT NULL,
+            egg_scan_id INT NOT NULL,
+
+            price DECIMAL(10,2) NOT NULL,
+            quantity INT NOT NULL DEFAULT 1,
+
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+            FOREIGN KEY (order_id) REFERENCES orders(id) ON DELETE CASCADE,
+            FOREIGN KEY (egg_scan_id) REFERENCES egg_scans(id) ON DELETE RESTRICT
+        )
+    ''')
+
+    # =====================================
+    # 5. SELLER_RATINGS (rating & review)
+    # =====================================
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS seller_ratings (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            seller_id INT NOT NULL,
+            buyer_id INT NULL,
+            buyer_name VARCHAR(100),
+            order_id INT NULL,
+
+            rating TINYINT NOT NULL,
+            review TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+            FOREIGN KEY (seller_id) REFERENCES users(id) ON DELETE CASCADE,
+            FOREIGN KEY (buyer_id) REFERENCES users(id) ON DELETE SET NULL,
+            FOREIGN KEY (order_id) REFERENCES orders(id) ON DELETE SET NULL
+        )
+    ''')
+
+    # ==========================
+    # 6. NEWS (opsional)
+    # ==========================
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS news (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            title VARCHAR(255) NOT NULL,
+            content TEXT NOT NULL,
+            image_url VARCHAR(500),
+            tags TEXT NULL,
+            is_published BOOLEAN DEFAULT FALSE,
+            published_at TIMESTAMP NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # ==========================
+    # 7. CHAT_SESSIONS (UPDATED)
+    # ==========================
+    # UPDATED: Added seller_id foreign key
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS chat_sessions (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NULL,
+            seller_id INT NULL, 
+
+            guest_email VARCHAR(100) NULL,
+            guest_name VARCHAR(100) NULL,
+
+            last_message TEXT,
+            last_message_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+            status ENUM('active', 'closed', 'pending') DEFAULT 'active',
+
+            is_pinned BOOLEAN DEFAULT FALSE,
+            is_archived BOOLEAN DEFAULT FALSE,
+
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL,
+            FOREIGN KEY (seller_id) REFERENCES users(id) ON DELETE SET NULL
+        )
+    ''')
+
+    # ==========================
+    # 8. CHAT_MESSAGES (UPDATED)
+    # ==========================
+    # UPDATED: New ENUM types
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS chat_messages (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            session_id INT NOT NULL,
+            user_id INT NULL,
+            guest_name VARCHAR(100) NULL,
+            guest_email VARCHAR(100) NULL,
+            message TEXT NOT NULL,
+
+            message_type ENUM(
+                'guest_to_admin',
+                'admin_to_guest',
+                'pembeli_to_pengusaha',
+                'pengusaha_to_pembeli',
+                'pengusaha_to_admin',
+                'admin_to_pengusaha'
+            ) DEFAULT 'guest_to_admin',
+
+            status ENUM('unread', 'read', 'replied') DEFAULT 'unread',
+            parent_message_id INT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+            FOREIGN KEY (session_id) REFERENCES chat_sessions(id) ON DELETE CASCADE,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL,
+            FOREIGN KEY (parent_message_id) REFERENCES chat_messages(id) ON DELETE SET NULL
+        )
+    ''')
+
+
+def _v002_chat_seller_and_message_types(cur):
+    """chat_sessions.seller_id + ENUM message_type baru (dulu migrate_chat.py)."""
+    if column_type(cur, "chat_sessions", "seller_id") is None:
+        online_alter(cur, "chat_sessions", "ADD COLUMN seller_id INT NULL AFTER user_id")
+        cur.execute(
+            """
+            ALTER TABLE chat_sessions
+            ADD CONSTRAINT fk_session_seller
+            FOREIGN KEY (seller_id) REFERENCES users(id) ON DELETE SET NULL
+            """
+        )
+
+    values = [
+        'guest_to_admin', 'admin_to_guest', 'pembeli_to_pengusaha',
+        'pengusaha_to_pembeli', 'pengusaha_to_admin', 'admin_to_pengusaha',
+    ]
+    current = _enum_values(column_type(cur, "chat_messages", "message_type"))
+    if current == values:
+        return
+    if "user_to_admin" in current or "admin_to_user" in current:
+        # nilai lama dipetakan dulu sebelum ENUM dipersempit
+        widened = current + [v for v in values if v not in current]
+        cur.execute(f"ALTER TABLE chat_messages MODIFY COLUMN message_type {_enum_sql(widened)} NOT NULL")
+        cur.execute("UPDATE chat_messages SET message_type = 'guest_to_admin' WHERE message_type = 'user_to_admin'")
+        cur.execute("UPDATE chat_messages SET message_type = 'admin_to_guest' WHERE message_type = 'admin_to_user'")
+    cur.execute(
+        f"ALTER TABLE chat_messages MODIFY COLUMN message_type {_enum_sql(values)} DEFAULT 'guest_to_admin'"
+    )
+
+
+def _v003_orders_status_enum(cur):
+    """Status Midtrans di orders.status, 'expire' -> 'expired' (dulu riwayat_test.py)."""
+    values = ['pending', 'paid', 'settlement', 'capture', 'cancelled', 'expired', 'refunded']
+    current = _enum_values(column_type(cur, "orders", "status"))
+    if current == values:
+        return
+    if "expire" in current:
+        widened = current + [v for v in values if v not in current]
+        cur.execute(f"ALTER TABLE orders MODIFY COLUMN status {_enum_sql(widened)} DEFAULT 'pending'")
+        cur.execute("UPDATE orders SET status = 'expired' WHERE status = 'expire'")
+    cur.execute(f"ALTER TABLE orders MODIFY COLUMN status {_enum_sql(values)} DEFAULT 'pending'")
+
+
+def _v004_prediction_cache(cur):
+    """Cache hasil model per hash gambar (utils/prediction_cache.py)."""
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS prediction_cache (
+            content_hash CHAR(64) NOT NULL,
+            model_version CHAR(16) NOT NULL,
+            features TEXT NOT NULL,
+            hit_count INT NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_hit_at TIMESTAMP NULL,
+
+            PRIMARY KEY (content_hash, model_version),
+            KEY idx_prediction_cache_last_used (last_hit_at, created_at)
+        )
+    ''')
+
+
+def _v005_grading_jobs(cur):
+    """Antrian grading async, tahan restart (utils/grading_jobs.py)."""
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS grading_jobs (
+            id CHAR(32) PRIMARY KEY,
+            user_id INT NOT NULL,
+            image_path VARCHAR(500) NOT NULL,
+            berat_cat VARCHAR(20),
+
+            status ENUM('queued','running','done','failed') NOT NULL DEFAULT 'queued',
+            attempts INT NOT NULL DEFAULT 0,
+            result TEXT,
+            error VARCHAR(255),
+            egg_scan_id INT NULL,
+
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP NULL,
+            finished_at TIMESTAMP NULL,
+
+            KEY idx_grading_jobs_status (status, created_at),
+            KEY idx_grading_jobs_user (user_id, created_at),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+            FOREIGN KEY (egg_scan_id) REFERENCES egg_scans(id) ON DELETE SET NULL
+        )
+    ''')
+
+
+def _v006_egg_scans_image_path_index(cur):
+    """Index untuk hitung referensi file upload (utils/upload_storage.py)."""
+    if not index_exists(cur, "egg_scans", "idx_egg_scans_image_path"):
+        online_alter(cur, "egg_scans", "ADD KEY idx_egg_scans_image_path (image_path(191))")
+
+
+DUMMY_REVIEWS = [
+    (5, "Telur berkualitas bagus, pengiriman cepat. Recommended!", "Dio Aranda"),
+    (5, "Telur berkualitas bagus, pengiriman sangat cepat. Terima kasih sudah amanah!", "Sarah Aninditya"),
+    (1, "Grade tidak sesuai kualitasnya, penipu!", "Fauzi Luqman"),
+    (1, "Toko tidak amanah. Jangan tergiur dengan harga murahnya!", "Dzaky Az-Zshahir"),
+]
+
+
+def _insert_dummy_reviews(seller_id, cur):
+    for rating, review, buyer_name in DUMMY_REVIEWS:
+        cur.execute(
+            "INSERT INTO seller_ratings (seller_id, buyer_name, rating, review) VALUES (%s, %s, %s, %s)",
+            (seller_id, buyer_name, rating, review)
+        )
+
+
+def _v007_seed_sandbox_data(cur):
+    """Akun sandbox + berita dummy (hanya kalau tabel masih kosong)."""
+    # ===========================================
+    # SEED DATA AWAL (admin, 1 pengusaha, 1 pembeli)
+    # ===========================================
+    cur.execute("SELECT COUNT(*) FROM users")
+    user_count = cur.fetchone()[0]
+
+    if user_count == 0:
+        # Admin
+        eggmin_pwd = generate_password_hash('eggmin123', method='pbkdf2:sha256')
+        cur.execute(
+            "INSERT INTO users (name, email, password, role) VALUES (%s, %s, %s, %s)",
+            ('Sandbox EggMin', 'eggmin@eggvision.com', eggmin_pwd, 'admin')
+        )
+
+        # Pengusaha
+        pengusaha_pwd = generate_password_hash('pengusaha123', method='pbkdf2:sha256')
+        cur.execute(
+            '''
+            INSERT INTO users
+                (name, email, password, role,
+                 farm_name, farm_code, farm_location, farm_description)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            ''',
+            (
+                'Sandbox EggMonitor',
+                'pengusaha@eggvision.com',
+                pengusaha_pwd,
+                'pengusaha',
+                'Sandbox EggMonitor',
+                'SE',
+                'Bogor, Jawa Barat',
+                'Telur ayam konsumsi berkualitas.'
+            )
+        )
+
+        seller_id = cur.lastrowid
+
+        # Insert dummy reviews untuk pengusaha
+        _insert_dummy_reviews(seller_id, cur)
+
+        # Pembeli
+        pembeli_pwd = generate_password_hash('pembeli123', method='pbkdf2:sha256')
+        cur.execute(
+            "INSERT INTO users (name, email, password, role) VALUES (%s, %s, %s, %s)",
+            ('Sandbox EggMart', 'pembeli@eggvision.com', pembeli_pwd, 'pembeli')
+        )
+
+    # ==========================
+    # SEED BERITA DUMMY
+    # ==========================
+    try:
+        from utils.news_data import get_dummy_news_data
+
+        cur.execute("SELECT COUNT(*) FROM news")
+        news_count = cur.fetchone()[0]
+
+        if news_count == 0:
+            print("📝 Seeding dummy news data...")
+            dummy_news = get_dummy_news_data()
+
+            for item in dummy_news:
+                cur.execute('''
+                    INSERT INTO news (title, content, image_url, tags, is_published, published_at)
+                    VALUES (%s, %s, %s, %s, TRUE, %s)
+                ''', (
+                    item['title'], 
+                    item['content'], 
+                    item['image_url'], 
+                    item['tags'], 
+                    item['published_at']
+                ))
+    except ImportError:
+        print("⚠️ utils.news_data not found, skipping news seed.")
+
+
+# (tabel, nama index, kolom) untuk query yang paling sering jalan; cek dengan
+# `python audit_query_plans.py` (EXPLAIN semua query produksi).
+HOT_QUERY_INDEXES = [
+    # stok per grade / listing: user_id + grade + status, urut scanned_at (FIFO)
+    ("egg_scans", "idx_egg_scans_user_grade_status", "user_id, grade, status, scanned_at"),
+    # riwayat & grafik harian dashboard: ORDER BY scanned_at DESC LIMIT 20
+    ("egg_scans", "idx_egg_scans_user_scanned", "user_id, scanned_at"),
+    # laporan penjualan pengusaha: seller_id + status IN (...) + rentang created_at
+    ("orders", "idx_orders_seller_status_created", "seller_id, status, created_at"),
+    # riwayat pembeli + order pending milik pembeli
+    ("orders", "idx_orders_buyer_status_created", "buyer_id, status, created_at"),
+    # sweeper order pending yang kedaluwarsa
+    ("orders", "idx_orders_status_created", "status, created_at"),
+    # isi chat per sesi (ORDER BY created_at) + hitung unread per sesi & tipe
+    ("chat_messages", "idx_chat_messages_session_created", "session_id, created_at"),
+    ("chat_messages", "idx_chat_messages_session_unread", "session_id, status, message_type"),
+    # dashboard admin: pesan terbaru per tipe, total unread
+    ("chat_messages", "idx_chat_messages_type_created", "message_type, created_at"),
+    ("chat_messages", "idx_chat_messages_status", "status"),
+    # cari sesi chat tamu / pembeli-penjual, inbox penjual urut pesan terakhir
+    ("chat_sessions", "idx_chat_sessions_guest_email", "guest_email"),
+    ("chat_sessions", "idx_chat_sessions_user_seller", "user_id, seller_id"),
+    ("chat_sessions", "idx_chat_sessions_seller_last", "seller_id, last_message_at"),
+    # berita publik terbaru
+    ("news", "idx_news_published", "is_published, published_at"),
+    # katalog EggMart: daftar pengusaha urut nama
+    ("users", "idx_users_role_name", "role, name"),
+]
+
+
+def _v008_hot_query_indexes(cur):
+    """Index komposit untuk query panas (online, hanya yang belum ada)."""
+    for table, index, columns in HOT_QUERY_INDEXES:
+        if not index_exists(cur, table, index):
+            algorithm = online_alter(cur, table, f"ADD KEY {index} ({columns})")
+            print(f"   -> {table}.{index} ({algorithm})")
+
+
+def _v009_scan_daily_stats(cur):
+    """Rollup harian egg_scans untuk dashboard & laporan (utils/scan_stats.py)."""
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS scan_daily_stats (
+            user_id INT NOT NULL,
+            stat_date DATE NOT NULL,
+            grade VARCHAR(10) NOT NULL,
+            berat_cat VARCHAR(20) NOT NULL DEFAULT '',
+
+            scan_count INT NOT NULL DEFAULT 0,
+            weight_count INT NOT NULL DEFAULT 0,
+            weight_sum DECIMAL(16,2) NOT NULL DEFAULT 0,
+            weight_sq_sum DECIMAL(20,4) NOT NULL DEFAULT 0,
+
+            PRIMARY KEY (user_id, stat_date, grade, berat_cat),
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+    # Backfill ditulis langsung (bukan utils.scan_stats.refill) supaya migrasi
+    # yang sudah rilis tidak ikut berubah kalau kode aplikasi berubah.
+    cur.execute('''
+        INSERT INTO scan_daily_stats
+            (user_id, stat_date, grade, berat_cat,
+             scan_count, weight_count, weight_sum, weight_sq_sum)
+        SELECT
+            user_id,
+            DATE(scanned_at),
+            grade,
+            COALESCE(berat_cat, ''),
+            COUNT(*),
+            COUNT(berat_telur),
+            COALESCE(SUM(berat_telur), 0),
+            COALESCE(SUM(berat_telur * berat_telur), 0)
+        FROM egg_scans
+        WHERE scanned_at IS NOT NULL
+        GROUP BY user_id, DATE(scanned_at), grade, COALESCE(berat_cat, '')
+    ''')
+    print(f"   -> scan_daily_stats diisi dari egg_scans ({cur.rowcount} baris)")
+
+
+MIGRATIONS = [
+    (1, "base_schema", _v001_base_schema),
+    (2, "chat_seller_and_message_types", _v002_chat_seller_and_message_types),
+    (3, "orders_status_enum", _v003_orders_status_enum),
+    (4, "prediction_cache", _v004_prediction_cache),
+    (5, "grading_jobs", _v005_grading_jobs),
+    (6, "egg_scans_image_path_index", _v006_egg_scans_image_path_index),
+    (7, "seed_sandbox_data", _v007_seed_sandbox_data),
+    (8, "hot_query_indexes", _v008_hot_query_indexes),
+    (9, "scan_daily_stats", _v009_scan_daily_stats),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# =============== RUNNER ===============
+
+def _applied_versions(cur):
+    """Set versi yang sudah jalan; None kalau tabel schema_version belum ada."""
+    try:
+        cur.execute("SELECT version FROM schema_version")
+    except mysql.connector.Error as e:
+        if e.errno == 1146:  # ER_NO_SUCH_TABLE
+            return None
+        raise
+    return {row[0] for row in cur.fetchall()}
+
+
+def schema_status():
+    """{"current", "latest", "pending": [(versi, nama), ...]} atau None kalau DB mati."""
+    conn = get_db_connection()
+    if not conn:
+        return None
+    try:
+        cur = conn.cursor()
+        applied = _applied_versions(cur) or set()
+        cur.close()
+    finally:
+        conn.close()
+    return {
+        "current": max(applied) if applied else 0,
+        "latest": LATEST_VERSION,
+        "pending": [(v, name) for v, name, _ in MIGRATIONS if v not in applied],
+    }
+
+
+def migrate(target=None):
+    """
+    Jalankan migrasi yang belum jalan (sampai `target` kalau diisi).
+    Mengembalikan jumlah migrasi yang dijalankan; raise kalau ada yang gagal.
+    """
+    conn = get_db_connection()
+    if not conn:
+        raise RuntimeError("Database tidak tersedia")
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT GET_LOCK(%s, %s)", (MIGRATION_LOCK, MIGRATION_LOCK_TIMEOUT_S))
+        if cur.fetchone()[0] != 1:
+            raise RuntimeError("Migrasi lain sedang berjalan (GET_LOCK timeout)")
+        try:
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INT PRIMARY KEY,
+                    name VARCHAR(100) NOT NULL,
+                    duration_ms INT NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+            applied = _applied_versions(cur)
+            ran = 0
+            for version, name, func in MIGRATIONS:
+                if version in applied or (target is not None and version > target):
+                    continue
+                print(f"🔄 Migrasi {version:03d} {name}...")
+                started = time.perf_counter()
+                func(cur)
+                duration_ms = int((time.perf_counter() - started) * 1000)
+                cur.execute(
+                    "INSERT INTO schema_version (version, name, duration_ms) VALUES (%s, %s, %s)",
+                    (version, name, duration_ms),
+                )
+                conn.commit()
+                ran += 1
+                print(f"   ✅ selesai ({duration_ms} ms)")
+            return ran
+        except mysql.connector.Error:
+            conn.rollback()
+            raise
+        finally:
+            cur.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK,))
+            cur.fetchone()
+            cur.close()
+    finally:
+        conn.close()
+
+
+def check_schema():
+    """
+    Dipanggil saat app start: 1 query versi skema. Kalau tertinggal, migrasi
+    dijalankan hanya bila DB_AUTO_MIGRATE=true; selain itu cukup peringatan.
+    """
+    status = schema_status()
+    if status is None:
+        print("❌ Failed to connect to database")
+        return None
+    if status["pending"]:
+        if DB_AUTO_MIGRATE:
+            migrate()
+            return schema_status()
+        names = ", ".join(f"{v:03d} {name}" for v, name in status["pending"])
+        print(f"⚠️ Skema database versi {status['current']}, terbaru {status['latest']} "
+              f"(belum: {names}). Jalankan `python migrate.py`.")
+    return status
@@ -1,96 +1,500 @@
+import io
 import json
+import os
 import numpy as np
+from PIL import Image
 import random
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing.image import load_img, img_to_array
-
-# =============== LOAD MODEL & LABELS (sekali saja) ===============
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import (
+    ML_USE_MULTIHEAD,
+    MULTIHEAD_MODEL_PATH,
+    ML_WARMUP_BATCH_SIZES,
+    ML_RUNTIME,
+    TFLITE_VARIANT,
+    ML_CASCADE,
+    ML_CASCADE_REJECT_CONF,
+    ML_FAST_DECODE,
+)
+from utils.image_decode import ImageTooLarge, decode_for_model
+from utils.quality_gate import ImageRejected
+
+# TensorFlow TIDAK di-import di level modul: import TF + load 3 model butuh
+# beberapa detik dan ratusan MB. Model baru di-load saat grading pertama
+# (atau saat `load_models()` dipanggil eksplisit untuk warm-up).
+# ML_RUNTIME=tflite memakai artefak INT8 hasil export_tflite.py
+# (utils/tflite_backend.py) dengan antarmuka `predict` yang sama.
+
+# =============== LOAD MODEL & LABELS (lazy, sekali saja) ===============
 
 IMG_SIZE = (224, 224)
 
-try:
-    # Sesuaikan path dengan punyamu
-    model_color      = load_model("static/model-ketebalan.keras")
-    model_keutuhan   = load_model("static/model-keutuhan.keras")
-    model_kebersih   = load_model("static/model-kebersihan.keras")
+# Model gabungan (1 backbone, 3 head) hasil build_multihead_model.py.
+# Urutan output: keutuhan, color (ketebalan), kebersihan.
+MULTIHEAD_OUTPUTS = ("keutuhan", "color", "kebersihan")
+
+# Sesuaikan path dengan punyamu
+MODEL_PATHS = {
+    "color": "static/model-ketebalan.keras",
+    "keutuhan": "static/model-keutuhan.keras",
+    "kebersihan": "static/model-kebersihan.keras",
+}
+
+model_color     = None
+model_keutuhan  = None
+model_kebersih  = None
+model_multihead = None
+model_escalation = None   # model keutuhan yang lebih kuat untuk cascade (lazy)
+
+CLASS_NAMES_COLOR = ["Brown"]
+CLASS_NAMES_KEUTUHAN = ["Utuh"]
+CLASS_NAMES_KEBERSIHAN = ["Bersih"]
+CLASS_NAMES_BY_FEATURE = {}
+
+MODEL_LOAD_SECONDS = None
+_models_loaded = False
+_escalation_loaded = False
+_models_lock = threading.Lock()
+
+
+def _model_path(keras_path: str) -> str:
+    """Path artefak yang benar-benar di-load sesuai ML_RUNTIME (keras / tflite)."""
+    if ML_RUNTIME == "tflite":
+        from utils.tflite_backend import tflite_path
+        return tflite_path(keras_path, TFLITE_VARIANT)
+    return keras_path
+
+
+def _load_model(keras_path: str, output_names=None):
+    if ML_RUNTIME == "tflite":
+        from utils.tflite_backend import TFLiteModel
+        return TFLiteModel(_model_path(keras_path), output_names=output_names)
+
+    from tensorflow.keras.models import load_model
+    return load_model(keras_path)
 
-    with open("static/model-ketebalan-class_names.json") as f:
-        CLASS_NAMES_COLOR = json.load(f)          # ["Dark Brown","Brown","Light Brown"]
 
-    with open("static/model-keutuhan-class_names.json") as f:
-        CLASS_NAMES_KEUTUHAN = json.load(f)       # ["Retak","Utuh"]
+def load_models():
+    """
+    Load TensorFlow + model + label (sekali per proses, thread-safe).
+    Dipanggil otomatis oleh fungsi prediksi; boleh dipanggil manual untuk warm-up.
+    """
+    global model_color, model_keutuhan, model_kebersih, model_multihead
+    global CLASS_NAMES_COLOR, CLASS_NAMES_KEUTUHAN, CLASS_NAMES_KEBERSIHAN
+    global CLASS_NAMES_BY_FEATURE, MODEL_LOAD_SECONDS, _models_loaded
+
+    if _models_loaded:
+        return
+    with _models_lock:
+        if _models_loaded:
+            return
+        started = time.perf_counter()
+
+        try:
+            model_color      = _load_model(MODEL_PATHS["color"])
+            model_keutuhan   = _load_model(MODEL_PATHS["keutuhan"])
+            model_kebersih   = _load_model(MODEL_PATHS["kebersihan"])
+
+            with open("static/model-ketebalan-class_names.json") as f:
+                CLASS_NAMES_COLOR = json.load(f)          # ["Dark Brown","Brown","Light Brown"]
+
+            with open("static/model-keutuhan-class_names.json") as f:
+                CLASS_NAMES_KEUTUHAN = json.load(f)       # ["Retak","Utuh"]
+
+            with open("static/model-kebersihan-class_names.json") as f:
+                CLASS_NAMES_KEBERSIHAN = json.load(f)     # ["Noda","Bersih"]
+
+        except Exception as e:
+            print(f"Error loading models: {e}")
+            # Dummy classes for fallback if models fail to load
+            CLASS_NAMES_COLOR = ["Brown"]
+            CLASS_NAMES_KEUTUHAN = ["Utuh"]
+            CLASS_NAMES_KEBERSIHAN = ["Bersih"]
+
+        CLASS_NAMES_BY_FEATURE = {
+            "keutuhan": CLASS_NAMES_KEUTUHAN,
+            "color": CLASS_NAMES_COLOR,
+            "kebersihan": CLASS_NAMES_KEBERSIHAN,
+        }
+
+        if ML_USE_MULTIHEAD:
+            try:
+                model_multihead = _load_model(MULTIHEAD_MODEL_PATH, output_names=MULTIHEAD_OUTPUTS)
+            except Exception as e:
+                print(f"Error loading multihead model, fallback ke 3 model: {e}")
+                model_multihead = None
+
+        MODEL_LOAD_SECONDS = time.perf_counter() - started
+        print(f"[ML] models loaded ({ML_RUNTIME}) in {MODEL_LOAD_SECONDS:.2f}s")
+        _models_loaded = True
+
+
+def models_loaded() -> bool:
+    return _models_loaded
+
+
+def model_files():
+    """Daftar file model yang dipakai jalur prediksi saat ini (untuk versi cache)."""
+    paths = list(MODEL_PATHS.values())
+    if ML_USE_MULTIHEAD:
+        paths.append(MULTIHEAD_MODEL_PATH)
+    paths = [_model_path(p) for p in paths]
+    escalation = _escalation_model_path() if ML_CASCADE else None
+    if escalation:
+        paths.append(escalation)
+    return paths
+
+
+# =============== WARM-UP & READINESS ===============
+# predict pertama di worker baru jauh lebih lambat (tracing graph + alokasi
+# memori). Warm-up menjalankan batch dummy di tiap ukuran batch yang dipakai,
+# supaya biaya itu tidak ditanggung upload pertama setelah deploy.
+
+WARMUP_TIMINGS = {}
+_ready = threading.Event()
+_warmup_error = None
+
+
+def _active_models():
+    if model_multihead is not None:
+        return [("multihead", model_multihead)]
+    return [
+        (name, model)
+        for name, model in (
+            ("keutuhan", model_keutuhan),
+            ("color", model_color),
+            ("kebersihan", model_kebersih),
+        )
+        if model is not None
+    ]
+
+
+def warm_up(batch_sizes=None):
+    """
+    Load model lalu jalankan batch dummy untuk tiap ukuran batch.
+    Mengembalikan timing (ms) per model per ukuran batch. Readiness hanya
+    di-set kalau ada model aktif dan tiap model minimal 1x predict sukses;
+    kalau tidak, alasannya dicatat di `readiness()["error"]`.
+    """
+    global _warmup_error
+    started = time.perf_counter()
+    try:
+        load_models()
+    except Exception as e:
+        _warmup_error = f"load_models gagal: {e}"
+        print(f"[ML] warm-up gagal: {_warmup_error}")
+        return dict(WARMUP_TIMINGS)
+    WARMUP_TIMINGS["load_ms"] = round((MODEL_LOAD_SECONDS or 0.0) * 1000.0, 3)
+
+    models = _active_models()
+    if not models:
+        _warmup_error = "Tidak ada model yang ter-load"
+        print(f"[ML] warm-up gagal: {_warmup_error}")
+        return dict(WARMUP_TIMINGS)
+
+    succeeded = set()
+    for batch_size in batch_sizes or ML_WARMUP_BATCH_SIZES:
+        dummy = np.zeros((batch_size,) + IMG_SIZE + (3,), dtype="float32")
+        for name, model in models:
+            t0 = time.perf_counter()
+            try:
+                model.predict(dummy, batch_size=batch_size, verbose=0)
+            except Exception as e:
+                print(f"Warm-up {name} (batch {batch_size}) error: {e}")
+                continue
+            succeeded.add(name)
+            WARMUP_TIMINGS[f"{name}@{batch_size}"] = round((time.perf_counter() - t0) * 1000.0, 3)
+
+    WARMUP_TIMINGS["total_ms"] = round((time.perf_counter() - started) * 1000.0, 3)
+    failed = [name for name, _ in models if name not in succeeded]
+    if failed:
+        _warmup_error = f"Predict warm-up gagal untuk model: {', '.join(failed)}"
+        print(f"[ML] warm-up gagal: {_warmup_error}")
+        return dict(WARMUP_TIMINGS)
+
+    _warmup_error = None
+    print(f"[ML] warm-up selesai dalam {WARMUP_TIMINGS['total_ms']:.0f} ms")
+    _ready.set()
+    return dict(WARMUP_TIMINGS)
+
+
+def start_warm_up(batch_sizes=None):
+    """Warm-up di background thread; cek hasilnya lewat `is_ready()`."""
+    thread = threading.Thread(
+        target=warm_up, args=(batch_sizes,), name="eggvision-warmup", daemon=True
+    )
+    thread.start()
+    return thread
+
 
-    with open("static/model-kebersihan-class_names.json") as f:
-        CLASS_NAMES_KEBERSIHAN = json.load(f)     # ["Noda","Bersih"]
+def is_ready() -> bool:
+    return _ready.is_set()
 
-except Exception as e:
-    print(f"Error loading models: {e}")
-    # Dummy classes for fallback if models fail to load
-    CLASS_NAMES_COLOR = ["Brown"]
-    CLASS_NAMES_KEUTUHAN = ["Utuh"]
-    CLASS_NAMES_KEBERSIHAN = ["Bersih"]
+
+def readiness():
+    return {
+        "ready": is_ready(),
+        "models_loaded": models_loaded(),
+        "warmup_ms": dict(WARMUP_TIMINGS),
+        "error": _warmup_error,
+    }
 
 
 # =============== PREPROCESS & PREDICT PER MODEL ===============
 
-def _preprocess_image(file_path: str):
+def _preprocess_image(file_path):
+    if ML_FAST_DECODE:
+        # draft/reduce: biaya decode sebanding ukuran target (lihat utils/image_decode.py)
+        return decode_for_model(file_path, IMG_SIZE)
+
+    from tensorflow.keras.preprocessing.image import load_img, img_to_array
+
+    if isinstance(file_path, (bytes, bytearray)):
+        file_path = io.BytesIO(file_path)
     img = load_img(file_path, target_size=IMG_SIZE)
     arr = img_to_array(img)          # TANPA /255.0 (EfficientNetB0 sudah preprocessing internal)
     arr = np.expand_dims(arr, axis=0)
     return arr
 
-def predict_keutuhan_image(file_path: str):
+def _pil_to_array(img: Image.Image):
+    # Sama dengan load_img(target_size=IMG_SIZE): RGB + resize NEAREST, tanpa /255.0
+    img = img.convert("RGB").resize((IMG_SIZE[1], IMG_SIZE[0]), Image.NEAREST)
+    return np.expand_dims(np.asarray(img, dtype="float32"), axis=0)
+
+def preprocess_image(image):
+    """
+    Satu tahap preprocessing untuk semua model.
+    `image` boleh path file, bytes / file-like (langsung dari request upload),
+    PIL.Image (mis. crop telur dari foto tray), atau
+    array hasil preprocessing sebelumnya (shape (224, 224, 3) atau
+    (1, 224, 224, 3)), sehingga gambar cukup dibaca + di-decode + di-resize
+    sekali saja.
+    """
+    if isinstance(image, Image.Image):
+        return _pil_to_array(image)
+    if isinstance(image, np.ndarray):
+        arr = image.astype("float32", copy=False)
+        if arr.ndim == 3:
+            arr = np.expand_dims(arr, axis=0)
+        return arr
+    return _preprocess_image(image)
+
+def _decode_pred(pred, class_names):
+    idx   = int(np.argmax(pred))
+    label = class_names[idx]
+    conf  = float(np.max(pred) * 100)
+    return label, conf
+
+def _predict_label(model, class_names, arr):
+    pred = model.predict(arr, verbose=0)[0]
+    return _decode_pred(pred, class_names)
+
+def predict_keutuhan_image(image):
+    load_models()
     try:
-        arr  = _preprocess_image(file_path)
-        pred = model_keutuhan.predict(arr, verbose=0)[0]
-        idx  = int(np.argmax(pred))
-        label = CLASS_NAMES_KEUTUHAN[idx]
-        conf  = float(np.max(pred) * 100)
-        return label, conf
+        arr = preprocess_image(image)
+        return _predict_label(model_keutuhan, CLASS_NAMES_KEUTUHAN, arr)
     except Exception as e:
         print(f"Prediction keutuhan error: {e}")
         return "Utuh", 0.0 # Fallback
 
-def predict_color_image(file_path: str):
+def predict_color_image(image):
+    load_models()
     try:
-        arr  = _preprocess_image(file_path)
-        pred = model_color.predict(arr, verbose=0)[0]
-        idx  = int(np.argmax(pred))
-        label = CLASS_NAMES_COLOR[idx]
-        conf  = float(np.max(pred) * 100)
-        return label, conf
+        arr = preprocess_image(image)
+        return _predict_label(model_color, CLASS_NAMES_COLOR, arr)
     except Exception as e:
         print(f"Prediction color error: {e}")
         return "Brown", 0.0 # Fallback
 
-def predict_kebersihan_image(file_path: str):
+def predict_kebersihan_image(image):
+    load_models()
     try:
-        arr  = _preprocess_image(file_path)
-        pred = model_kebersih.predict(arr, verbose=0)[0]
-        idx  = int(np.argmax(pred))
-        label = CLASS_NAMES_KEBERSIHAN[idx]
-        conf  = float(np.max(pred) * 100)
-        return label, conf
+        arr = preprocess_image(image)
+        return _predict_label(model_kebersih, CLASS_NAMES_KEBERSIHAN, arr)
     except Exception as e:
         print(f"Prediction kebersihan error: {e}")
         return "Bersih", 0.0 # Fallback
 
+def predict_multihead_image(image):
+    """
+    Satu forward pass di model gabungan -> label + confidence ketiga fitur.
+    """
+    load_models()
+    arr = preprocess_image(image)
+    outputs = model_multihead.predict(arr, verbose=0)
+    return {
+        name: _decode_pred(pred[0], CLASS_NAMES_BY_FEATURE[name])
+        for name, pred in zip(MULTIHEAD_OUTPUTS, outputs)
+    }
+
 # =============== PREDIKSI FITUR SAJA (untuk egg_scan) ===============
 
-def predict_features(file_path: str):
+def predict_features(image):
     """
     Dipakai saat egg_scan / load model.
     Mengembalikan label + confidence dari 3 model.
+    Gambar di-preprocess sekali, lalu tensor yang sama dipakai ketiga model.
+    Raise ImageRejected kalau gambar tidak bisa di-decode (juga saat quality
+    gate mati), bukan grade Utuh/Bersih karangan dengan confidence 0.
     """
-    keutuhan_label,   keutuhan_conf    = predict_keutuhan_image(file_path)
-    color_label,      color_conf       = predict_color_image(file_path)
-    kebersihan_label, kebersihan_conf = predict_kebersihan_image(file_path)
-
-    return {
+    load_models()
+    try:
+        arr = preprocess_image(image)
+    except ImageTooLarge as e:
+        raise ImageRejected("too_large") from e
+    except Exception as e:
+        print(f"Preprocess image error: {e}")
+        raise ImageRejected("unreadable") from e
+
+    if model_multihead is not None:
+        try:
+            return predict_multihead_image(arr)
+        except Exception as e:
+            print(f"Prediction multihead error, fallback ke 3 model: {e}")
+
+    keutuhan = predict_keutuhan_image(arr)
+    decision = _cascade_decision(*keutuhan)
+    if decision == "escalated":
+        keutuhan = _escalate_keutuhan(arr, [keutuhan])[0]
+    if decision != "full" and keutuhan[0] == "Retak":
+        return _short_circuit_features(keutuhan, decision)
+    keutuhan_label,   keutuhan_conf    = keutuhan
+    color_label,      color_conf       = predict_color_image(arr)
+    kebersihan_label, kebersihan_conf = predict_kebersihan_image(arr)
+
+    feats = {
         "color": (color_label, color_conf),
         "keutuhan": (keutuhan_label, keutuhan_conf),
         "kebersihan": (kebersihan_label, kebersihan_conf),
     }
+    if ML_CASCADE:
+        feats["cascade"] = decision
+    return feats
+
+# =============== CASCADE (short-circuit berdasar aturan grading) ===============
+# `_map_grade` langsung Reject kalau keutuhan == "Retak", jadi model warna &
+# kebersihan tidak bisa mengubah grade telur retak. Mode cascade menjalankan
+# model keutuhan dulu; kalau retak dengan confidence >= ML_CASCADE_REJECT_CONF
+# model lain dilewati. Retak dengan confidence rendah di-eskalasi ke model
+# keutuhan yang lebih kuat (Keras float32 saat ML_RUNTIME=tflite, atau model
+# multihead); model warna & kebersihan hanya jalan kalau hasil akhirnya Utuh.
+
+CASCADE_SKIPPABLE = ("color", "kebersihan")
+
+def _cascade_decision(keutuhan_label, keutuhan_conf):
+    """"full" (semua model), "short_circuit" (lewati sisanya) atau "escalated"."""
+    if not ML_CASCADE or keutuhan_label != "Retak":
+        return "full"
+    if keutuhan_conf >= ML_CASCADE_REJECT_CONF:
+        return "short_circuit"
+    return "escalated"
+
+def _short_circuit_features(keutuhan, decision="short_circuit"):
+    return {
+        "keutuhan": keutuhan,
+        "color": (None, 0.0),
+        "kebersihan": (None, 0.0),
+        "cascade": decision,
+        "skipped": list(CASCADE_SKIPPABLE),
+    }
+
+def _escalation_model_path():
+    """Artefak model eskalasi; None kalau tidak ada yang lebih kuat dari model utama."""
+    if ML_RUNTIME == "tflite":
+        return MODEL_PATHS["keutuhan"]
+    if not ML_USE_MULTIHEAD and os.path.exists(MULTIHEAD_MODEL_PATH):
+        return MULTIHEAD_MODEL_PATH
+    return None
+
+def load_escalation_model():
+    """Load model eskalasi (Keras, sekali per proses); None kalau tidak tersedia."""
+    global model_escalation, _escalation_loaded
+    if _escalation_loaded:
+        return model_escalation
+    with _models_lock:
+        if not _escalation_loaded:
+            path = _escalation_model_path()
+            if path:
+                try:
+                    from tensorflow.keras.models import load_model
+                    model_escalation = load_model(path)
+                    print(f"[ML] escalation model loaded: {path}")
+                except Exception as e:
+                    print(f"Error loading escalation model {path}: {e}")
+                    model_escalation = None
+            _escalation_loaded = True
+    return model_escalation
+
+def _escalation_probs(batch):
+    """Probabilitas keutuhan (n, n_class) dari model eskalasi; None kalau tidak bisa."""
+    model = load_escalation_model()
+    if model is None:
+        return None
+    try:
+        outputs = model.predict(batch, batch_size=len(batch), verbose=0)
+    except Exception as e:
+        print(f"Prediction escalation error: {e}")
+        return None
+    if isinstance(outputs, (list, tuple)):   # multihead: 1 output per fitur
+        outputs = outputs[MULTIHEAD_OUTPUTS.index("keutuhan")]
+    return np.asarray(outputs)
+
+def _escalate_keutuhan(batch, keutuhan):
+    """Ganti hasil keutuhan `batch` dengan prediksi model eskalasi (kalau ada)."""
+    probs = _escalation_probs(batch)
+    if probs is None:
+        return keutuhan
+    return [_decode_pred(pred, CLASS_NAMES_KEUTUHAN) for pred in probs]
+
+def _predict_features_3model(image):
+    arr = preprocess_image(image)
+    return {
+        "keutuhan": predict_keutuhan_image(arr),
+        "color": predict_color_image(arr),
+        "kebersihan": predict_kebersihan_image(arr),
+    }
+
+def check_multihead_parity(images, model=None):
+    """
+    Bandingkan model gabungan dengan jalur 3 model pada daftar gambar.
+    Mengembalikan persentase label yang sama per fitur + selisih confidence
+    terbesar (dalam persen), untuk memastikan model gabungan layak dipakai.
+    """
+    global model_multihead
+    load_models()
+    model = model if model is not None else model_multihead
+    if model is None:
+        raise RuntimeError("Model multihead belum di-load")
+
+    previous, model_multihead = model_multihead, model
+    try:
+        agree = {name: 0 for name in MULTIHEAD_OUTPUTS}
+        max_conf_diff = {name: 0.0 for name in MULTIHEAD_OUTPUTS}
+        total = 0
+        for image in images:
+            arr = preprocess_image(image)
+            ref = _predict_features_3model(arr)
+            got = predict_multihead_image(arr)
+            total += 1
+            for name in MULTIHEAD_OUTPUTS:
+                if ref[name][0] == got[name][0]:
+                    agree[name] += 1
+                diff = abs(ref[name][1] - got[name][1])
+                max_conf_diff[name] = max(max_conf_diff[name], diff)
+    finally:
+        model_multihead = previous
+
+    return {
+        "total": total,
+        "agreement": {
+            name: (agree[name] * 100.0 / total) if total else 0.0
+            for name in MULTIHEAD_OUTPUTS
+        },
+        "max_conf_diff": max_conf_diff,
+    }
 
 # =============== KESEGARAN (DITURUNKAN, TANPA MODEL) ===============
 
@@ -213,8 +617,16 @@ def compute_grade(
 
     return grade, kesegaran_label
 
-def predict_image(file_path: str, berat_kategori: str = None):
-    feats = predict_features(file_path)
+def predict_image(image, berat_kategori: str = None):
+    """
+    `image` boleh path file atau array hasil `preprocess_image`.
+    """
+    return grade_features(predict_features(image), berat_kategori)
+
+def grade_features(feats: dict, berat_kategori: str = None):
+    """
+    Ubah hasil `predict_features` (+ kategori berat) jadi (grade, grade_conf, detail).
+    """
     color_label,      color_conf       = feats["color"]
     keutuhan_label,   keutuhan_conf    = feats["keutuhan"]
     kebersihan_label, kebersihan_conf = feats["kebersihan"]
@@ -263,4 +675,255 @@ def predict_image(file_path: str, berat_kategori: str = None):
         "berat_telur": simulated_weight_g, # Numeric value
         "kesegaran": kesegaran_label,
     }
-    return grade, grade_conf, detail
\ No newline at end of file
+    if "cascade" in feats:
+        detail["cascade"] = feats["cascade"]
+        detail["skipped"] = list(feats.get("skipped", []))
+    return grade, grade_conf, detail
+
+# =============== PREDIKSI BATCH (N gambar sekaligus) ===============
+
+FALLBACK_FEATURES = {
+    "color": ("Brown", 0.0),
+    "keutuhan": ("Utuh", 0.0),
+    "kebersihan": ("Bersih", 0.0),
+}
+
+def preprocess_images(images):
+    """
+    Preprocess N gambar (path / bytes / PIL.Image / array) lalu tumpuk jadi 1 batch NumPy.
+    Mengembalikan (batch, ok_index): gambar yang gagal di-decode dilewati,
+    `ok_index` berisi posisi asli gambar yang masuk batch.
+    """
+    arrays, ok_index = [], []
+    for i, image in enumerate(images):
+        try:
+            arrays.append(preprocess_image(image))
+            ok_index.append(i)
+        except Exception as e:
+            print(f"Preprocess image error (index {i}): {e}")
+
+    if not arrays:
+        return np.zeros((0,) + IMG_SIZE + (3,), dtype="float32"), ok_index
+    return np.concatenate(arrays, axis=0), ok_index
+
+def _predict_batch(model, class_names, batch, batch_size):
+    preds = model.predict(batch, batch_size=batch_size, verbose=0)
+    return [_decode_pred(pred, class_names) for pred in preds]
+
+def predict_features_batch(images, batch_size: int = 32):
+    """
+    Versi batch dari `predict_features`: tiap model dipanggil sekali per batch.
+    Urutan hasil sama dengan urutan input; gambar yang gagal diproses
+    mendapat label fallback dengan confidence 0.
+    """
+    load_models()
+    images = list(images)
+    results = [dict(FALLBACK_FEATURES) for _ in images]
+    batch, ok_index = preprocess_images(images)
+    if not ok_index:
+        return results
+
+    per_model = None
+    if model_multihead is not None:
+        try:
+            outputs = model_multihead.predict(batch, batch_size=batch_size, verbose=0)
+            per_model = {
+                name: [_decode_pred(pred, CLASS_NAMES_BY_FEATURE[name]) for pred in preds]
+                for name, preds in zip(MULTIHEAD_OUTPUTS, outputs)
+            }
+        except Exception as e:
+            print(f"Prediction multihead batch error, fallback ke 3 model: {e}")
+
+    if per_model is not None:
+        for row, i in enumerate(ok_index):
+            results[i] = {name: preds[row] for name, preds in per_model.items()}
+        return results
+
+    def run(name, model, class_names, rows):
+        try:
+            return _predict_batch(model, class_names, batch[rows], batch_size)
+        except Exception as e:
+            print(f"Prediction {name} batch error: {e}")
+            return [FALLBACK_FEATURES[name]] * len(rows)
+
+    all_rows = list(range(len(ok_index)))
+    keutuhan = run("keutuhan", model_keutuhan, CLASS_NAMES_KEUTUHAN, all_rows)
+    decisions = [_cascade_decision(label, conf) for label, conf in keutuhan]
+
+    escalated = [r for r in all_rows if decisions[r] == "escalated"]
+    if escalated:
+        for r, result in zip(escalated, _escalate_keutuhan(batch[escalated], [keutuhan[r] for r in escalated])):
+            keutuhan[r] = result
+
+    # Cascade: model warna & kebersihan hanya untuk baris yang akhirnya tidak Retak
+    skip = {r for r in all_rows if decisions[r] != "full" and keutuhan[r][0] == "Retak"}
+    rows = [r for r in all_rows if r not in skip]
+    color = dict(zip(rows, run("color", model_color, CLASS_NAMES_COLOR, rows))) if rows else {}
+    kebersihan = dict(zip(rows, run("kebersihan", model_kebersih, CLASS_NAMES_KEBERSIHAN, rows))) if rows else {}
+
+    for row, i in enumerate(ok_index):
+        if row in skip:
+            results[i] = _short_circuit_features(keutuhan[row], decisions[row])
+            continue
+        results[i] = {
+            "keutuhan": keutuhan[row],
+            "color": color[row],
+            "kebersihan": kebersihan[row],
+        }
+        if ML_CASCADE:
+            results[i]["cascade"] = decisions[row]
+    return results
+
+def predict_images(images, berat_kategori=None, batch_size: int = 32):
+    """
+    Batch API: grading N gambar (path / bytes / PIL.Image / array) sekaligus.
+    `berat_kategori` boleh None, satu string untuk semua, atau list per gambar.
+    Mengembalikan list (grade, grade_conf, detail) sesuai urutan input.
+    """
+    feats_list = predict_features_batch(images, batch_size=batch_size)
+    if berat_kategori is None or isinstance(berat_kategori, str):
+        berat_list = [berat_kategori] * len(feats_list)
+    else:
+        berat_list = list(berat_kategori)
+
+    return [
+        grade_features(feats, berat)
+        for feats, berat in zip(feats_list, berat_list)
+    ]
+
+def features_from_detail(detail: dict) -> dict:
+    """Kebalikan `grade_features`: ambil lagi label + confidence dari `detail`."""
+    feats = {
+        "color": (detail["color"], detail["color_conf"]),
+        "keutuhan": (detail["keutuhan"], detail["keutuhan_conf"]),
+        "kebersihan": (detail["kebersihan"], detail["kebersihan_conf"]),
+    }
+    if "cascade" in detail:
+        feats["cascade"] = detail["cascade"]
+        feats["skipped"] = list(detail.get("skipped", []))
+    return feats
+
+# =============== MULTI-KAMERA (A1/A2/A3, 1 telur) ===============
+
+# Cacat cukup terlihat dari 1 sisi -> ambil probabilitas terburuk antar view.
+# Fitur lain (warna) dirata-rata.
+MULTIVIEW_DEFECT_CLASS = {"keutuhan": "Retak", "kebersihan": "Noda"}
+
+_view_executor = None
+_view_executor_lock = threading.Lock()
+
+def _get_view_executor():
+    global _view_executor
+    with _view_executor_lock:
+        if _view_executor is None:
+            _view_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="eggvision-view")
+        return _view_executor
+
+def _fuse_probs(name, probs, class_names):
+    """Gabungkan probabilitas (n_view, n_class) jadi 1 vektor (n_class,)."""
+    fused = probs.mean(axis=0)
+    defect = MULTIVIEW_DEFECT_CLASS.get(name)
+    if defect in class_names and len(class_names) > 1:
+        idx = class_names.index(defect)
+        worst = float(probs[:, idx].max())
+        rest = np.delete(fused, idx)
+        rest = rest / rest.sum() * (1.0 - worst) if rest.sum() > 0 else rest
+        fused = np.insert(rest, idx, worst)
+    return fused
+
+def _view_probs(batch, names):
+    """Probabilitas per view untuk fitur `names`, 1 predict per model untuk semua view."""
+    if model_multihead is not None:
+        try:
+            outputs = model_multihead.predict(batch, batch_size=len(batch), verbose=0)
+            by_name = dict(zip(MULTIHEAD_OUTPUTS, outputs))
+            return {name: np.asarray(by_name[name]) for name in names}
+        except Exception as e:
+            print(f"Prediction multihead multiview error, fallback ke 3 model: {e}")
+
+    models = {"keutuhan": model_keutuhan, "color": model_color, "kebersihan": model_kebersih}
+    return {
+        name: np.asarray(models[name].predict(batch, batch_size=len(batch), verbose=0))
+        for name in names
+    }
+
+def _safe_preprocess(image):
+    try:
+        return preprocess_image(image)
+    except Exception as e:
+        print(f"Preprocess view error: {e}")
+        return None
+
+def predict_multiview_features(views):
+    """
+    `views`: list gambar (path / bytes / PIL.Image / array) dari beberapa kamera untuk
+    1 telur yang sama. View di-decode paralel, lalu semua view masuk 1 batch
+    per model. Mengembalikan (feats_gabungan, feats_per_view).
+    """
+    load_models()
+    views = list(views)
+    decoded = list(_get_view_executor().map(_safe_preprocess, views))
+    ok = [i for i, arr in enumerate(decoded) if arr is not None]
+    per_view = [dict(FALLBACK_FEATURES) for _ in views]
+    if not ok:
+        return dict(FALLBACK_FEATURES), per_view
+
+    batch = np.concatenate([decoded[i] for i in ok], axis=0)
+    names = ["keutuhan"] if ML_CASCADE and model_multihead is None else list(MULTIHEAD_OUTPUTS)
+    try:
+        probs = _view_probs(batch, names)
+    except Exception as e:
+        print(f"Prediction multiview error: {e}")
+        return dict(FALLBACK_FEATURES), per_view
+
+    def decode(name):
+        class_names = CLASS_NAMES_BY_FEATURE[name]
+        for row, i in enumerate(ok):
+            per_view[i][name] = _decode_pred(probs[name][row], class_names)
+        return _decode_pred(_fuse_probs(name, probs[name], class_names), class_names)
+
+    keutuhan = decode("keutuhan")
+    decision = _cascade_decision(*keutuhan)
+    if decision == "escalated":
+        escalated = _escalation_probs(batch)
+        if escalated is not None:
+            probs["keutuhan"] = escalated
+            keutuhan = decode("keutuhan")
+    if decision != "full" and keutuhan[0] == "Retak":
+        # label per view juga ditandai dilewati, bukan label fallback yang terlihat seperti prediksi
+        for i in ok:
+            for name in CASCADE_SKIPPABLE:
+                per_view[i][name] = (None, 0.0)
+        return _short_circuit_features(keutuhan, decision), per_view
+
+    missing = [name for name in MULTIHEAD_OUTPUTS if name not in probs]
+    if missing:
+        try:
+            probs.update(_view_probs(batch, missing))
+        except Exception as e:
+            print(f"Prediction multiview error: {e}")
+            return dict(FALLBACK_FEATURES, keutuhan=keutuhan), per_view
+
+    feats = {"keutuhan": keutuhan, "color": decode("color"), "kebersihan": decode("kebersihan")}
+    if ML_CASCADE:
+        feats["cascade"] = decision
+    return feats, per_view
+
+def predict_multiview(views, berat_kategori=None, view_names=None):
+    """
+    Grading 1 telur dari beberapa view kamera -> (grade, grade_conf, detail).
+    `detail["views"]` berisi label per view (key = `view_names`, default A1, A2, ...);
+    saat cascade short-circuit, fitur yang dilewati bernilai None + `skipped`.
+    """
+    views = list(views)
+    view_names = list(view_names or [f"A{i + 1}" for i in range(len(views))])
+    feats, per_view = predict_multiview_features(views)
+    grade, grade_conf, detail = grade_features(feats, berat_kategori)
+    skipped = list(detail.get("skipped", []))
+    detail["views"] = {}
+    for view_name, view_feats in zip(view_names, per_view):
+        view = {name: label for name, (label, _) in view_feats.items()}
+        if skipped:
+            view["skipped"] = skipped
+        detail["views"][view_name] = view
+    return grade, grade_conf, detail
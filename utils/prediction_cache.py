@@ -0,0 +1,296 @@
+# utils/prediction_cache.py
+"""
+Cache hasil prediksi berdasarkan hash isi gambar.
+
+Peternak sering meng-upload ulang foto yang sama. Hasil 3 model (label +
+confidence) disimpan dengan kunci sha256(bytes gambar) + versi model, di
+2 tingkat:
+  1. LRU in-memory per proses (PREDICTION_CACHE_SIZE entri)
+  2. Tabel MySQL `prediction_cache` (dibatasi PREDICTION_CACHE_DB_MAX_ROWS)
+
+Cache hit melewati decode + inference sama sekali. Versi model dihitung dari
+(path, ukuran, mtime) tiap file model + setelan cascade & decode (di-cache
+PREDICTION_CACHE_VERSION_TTL_S detik), jadi entri lama otomatis tidak
+terpakai begitu ada file model / setelan yang berubah. Baris DB versi lain
+tidak langsung dihapus (saat rolling deploy worker lama & baru jalan
+bersamaan), tapi dibuang oleh eviction setelah
+PREDICTION_CACHE_OLD_VERSION_TTL_S tidak dipakai.
+
+last_hit_at (dasar eviction) hanya di-UPDATE kalau sudah lebih tua dari
+PREDICTION_CACHE_TOUCH_INTERVAL_S, jadi DB hit biasa cukup 1 SELECT tanpa
+commit; hit_count karenanya menghitung "sentuhan", bukan setiap hit.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from config import (
+    ML_CASCADE,
+    ML_CASCADE_REJECT_CONF,
+    ML_FAST_DECODE,
+    PREDICTION_CACHE_ENABLED,
+    PREDICTION_CACHE_SIZE,
+    PREDICTION_CACHE_DB_ENABLED,
+    PREDICTION_CACHE_DB_MAX_ROWS,
+    PREDICTION_CACHE_TOUCH_INTERVAL_S,
+    PREDICTION_CACHE_VERSION_TTL_S,
+    PREDICTION_CACHE_OLD_VERSION_TTL_S,
+)
+from utils.database import get_db_connection
+
+FEATURE_NAMES = ("color", "keutuhan", "kebersihan")
+
+_lock = threading.Lock()
+_memory = OrderedDict()
+_stats = {
+    "memory_hits": 0,
+    "db_hits": 0,
+    "misses": 0,
+    "stores": 0,
+    "evictions": 0,
+    "invalidations": 0,
+}
+_last_version = None
+_version_memo = (0.0, None)   # (kedaluwarsa monotonic, versi)
+_db_inserts = 0
+
+
+# =============== KUNCI & VERSI ===============
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def model_version() -> str:
+    """
+    Versi model = hash dari (path, size, mtime) semua file model aktif +
+    setelan cascade (hasil short-circuit tidak boleh dipakai saat cascade mati,
+    dan sebaliknya) + ML_FAST_DECODE (piksel hasil preprocessing berbeda).
+    Di-cache PREDICTION_CACHE_VERSION_TTL_S detik supaya tidak stat tiap upload.
+    """
+    global _version_memo
+    expires, version = _version_memo
+    now = time.monotonic()
+    if version is not None and now < expires:
+        return version
+
+    from utils.ml_utils import model_files
+
+    h = hashlib.sha1()
+    h.update(f"cascade:{ML_CASCADE}:{ML_CASCADE_REJECT_CONF};".encode())
+    h.update(f"fast_decode:{ML_FAST_DECODE};".encode())
+    for path in model_files():
+        try:
+            st = os.stat(path)
+            h.update(f"{path}:{st.st_size}:{st.st_mtime_ns};".encode())
+        except OSError:
+            h.update(f"{path}:missing;".encode())
+    version = h.hexdigest()[:16]
+    _version_memo = (now + PREDICTION_CACHE_VERSION_TTL_S, version)
+    return version
+
+
+def _check_version(version):
+    """
+    Kalau versi model berubah, kosongkan LRU memory proses ini. Baris DB versi
+    lama dibiarkan (mungkin masih dipakai worker lain), dibuang oleh eviction.
+    """
+    global _last_version
+    with _lock:
+        if _last_version == version:
+            return
+        changed = _last_version is not None
+        _last_version = version
+        if changed:
+            _memory.clear()
+            _stats["invalidations"] += 1
+
+
+# =============== TIER 1: MEMORY (LRU) ===============
+
+def _memory_get(key):
+    with _lock:
+        feats = _memory.get(key)
+        if feats is not None:
+            _memory.move_to_end(key)
+        return feats
+
+
+def _memory_put(key, feats):
+    with _lock:
+        _memory[key] = feats
+        _memory.move_to_end(key)
+        while len(_memory) > PREDICTION_CACHE_SIZE:
+            _memory.popitem(last=False)
+            _stats["evictions"] += 1
+
+
+# =============== TIER 2: DATABASE ===============
+
+def _db_get(digest, version):
+    conn = get_db_connection()
+    if not conn:
+        return None
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT features,
+                   last_hit_at IS NULL OR last_hit_at < NOW() - INTERVAL %s SECOND AS stale
+            FROM prediction_cache
+            WHERE content_hash = %s AND model_version = %s
+            """,
+            (PREDICTION_CACHE_TOUCH_INTERVAL_S, digest, version),
+        )
+        row = cur.fetchone()
+        if row and row[1]:
+            # Cukup tahu baris ini masih dipakai (untuk eviction), tidak perlu tiap hit
+            cur.execute(
+                """
+                UPDATE prediction_cache SET hit_count = hit_count + 1, last_hit_at = NOW()
+                WHERE content_hash = %s AND model_version = %s
+                """,
+                (digest, version),
+            )
+            conn.commit()
+        cur.close()
+        if not row:
+            return None
+        data = json.loads(row[0])
+        feats = {name: tuple(data[name]) for name in FEATURE_NAMES}
+        if "cascade" in data:
+            feats["cascade"] = data["cascade"]
+            feats["skipped"] = data.get("skipped", [])
+        return feats
+    except Exception as e:
+        print(f"[PredictionCache] db get error: {e}")
+        return None
+    finally:
+        conn.close()
+
+
+def _serialize(feats):
+    data = {name: list(feats[name]) for name in FEATURE_NAMES}
+    if "cascade" in feats:
+        data["cascade"] = feats["cascade"]
+        data["skipped"] = list(feats.get("skipped", []))
+    return data
+
+
+def _db_put(digest, version, feats):
+    global _db_inserts
+    conn = get_db_connection()
+    if not conn:
+        return
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            INSERT INTO prediction_cache (content_hash, model_version, features)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE features = VALUES(features)
+            """,
+            (digest, version, json.dumps(_serialize(feats))),
+        )
+
+        # Eviction tiap 100 insert: baris versi lain yang lama tidak dipakai, lalu
+        # kelebihan baris (yang paling lama tidak dipakai)
+        with _lock:
+            _db_inserts += 1
+            check = _db_inserts % 100 == 1
+        if check:
+            cur.execute(
+                """
+                DELETE FROM prediction_cache
+                WHERE model_version <> %s
+                  AND COALESCE(last_hit_at, created_at) < NOW() - INTERVAL %s SECOND
+                """,
+                (version, PREDICTION_CACHE_OLD_VERSION_TTL_S),
+            )
+            with _lock:
+                _stats["evictions"] += cur.rowcount
+            cur.execute("SELECT COUNT(*) FROM prediction_cache")
+            total = cur.fetchone()[0]
+            excess = total - PREDICTION_CACHE_DB_MAX_ROWS
+            if excess > 0:
+                cur.execute(
+                    """
+                    DELETE FROM prediction_cache
+                    ORDER BY COALESCE(last_hit_at, created_at) ASC
+                    LIMIT %s
+                    """,
+                    (excess,),
+                )
+                with _lock:
+                    _stats["evictions"] += cur.rowcount
+
+        conn.commit()
+        cur.close()
+    except Exception as e:
+        print(f"[PredictionCache] db put error: {e}")
+    finally:
+        conn.close()
+
+
+# =============== API ===============
+
+def make_key(data: bytes):
+    """(content_hash, model_version) untuk bytes gambar."""
+    version = model_version()
+    _check_version(version)
+    return content_hash(data), version
+
+
+def get(key):
+    """Ambil fitur (label, conf) dari cache; None kalau miss."""
+    if not PREDICTION_CACHE_ENABLED:
+        return None
+    digest, version = key
+    mem_key = f"{digest}:{version}"
+
+    feats = _memory_get(mem_key)
+    if feats is not None:
+        with _lock:
+            _stats["memory_hits"] += 1
+        return feats
+
+    if PREDICTION_CACHE_DB_ENABLED:
+        feats = _db_get(digest, version)
+        if feats is not None:
+            _memory_put(mem_key, feats)
+            with _lock:
+                _stats["db_hits"] += 1
+            return feats
+
+    with _lock:
+        _stats["misses"] += 1
+    return None
+
+
+def put(key, feats):
+    """Simpan fitur hasil inference. Hasil fallback (confidence 0) tidak di-cache."""
+    if not PREDICTION_CACHE_ENABLED:
+        return
+    skipped = set(feats.get("skipped", []))  # tahap yang dilewati cascade memang conf 0
+    if any(feats[name][1] <= 0.0 for name in FEATURE_NAMES if name not in skipped):
+        return
+    digest, version = key
+    _memory_put(f"{digest}:{version}", feats)
+    if PREDICTION_CACHE_DB_ENABLED:
+        _db_put(digest, version, feats)
+    with _lock:
+        _stats["stores"] += 1
+
+
+def get_stats():
+    with _lock:
+        stats = dict(_stats)
+        stats["memory_entries"] = len(_memory)
+    lookups = stats["memory_hits"] + stats["db_hits"] + stats["misses"]
+    stats["hit_rate"] = round((stats["memory_hits"] + stats["db_hits"]) / lookups, 4) if lookups else 0.0
+    stats["enabled"] = PREDICTION_CACHE_ENABLED
+    stats["model_version"] = _last_version
+    return stats
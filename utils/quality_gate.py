@@ -0,0 +1,187 @@
+# utils/quality_gate.py
+"""
+Quality gate murah sebelum inference.
+
+Foto buram, terlalu gelap/terang, atau tanpa telur ditolak dengan alasan
+yang jelas sebelum model dijalankan. Semua cek memakai NumPy pada gambar yang
+sudah diperkecil (QUALITY_GATE_MAX_SIDE px), jadi biayanya beberapa ms:
+  - exposure : rata-rata brightness + porsi piksel clipping gelap/terang
+  - telur    : mask non-background (utils.tray_utils.egg_mask) harus berupa
+               1 blob berbentuk elips dengan luas wajar (momen orde-2)
+  - blur     : variansi Laplacian grayscale
+Ambang diatur lewat env QUALITY_* di config.py; statistik (waktu per gambar,
+rejection rate per alasan) tersedia di `get_stats()` / endpoint /metrics.
+"""
+import threading
+import time
+from collections import deque
+
+import numpy as np
+from PIL import Image
+
+from config import (
+    QUALITY_GATE_ENABLED,
+    QUALITY_GATE_MAX_SIDE,
+    QUALITY_MIN_SHARPNESS,
+    QUALITY_MIN_BRIGHTNESS,
+    QUALITY_MAX_BRIGHTNESS,
+    QUALITY_MAX_CLIPPED,
+    QUALITY_REQUIRE_EGG,
+    QUALITY_MIN_EGG_AREA,
+    QUALITY_MAX_EGG_AREA,
+)
+from utils.image_decode import ImageTooLarge, decode_thumbnail
+from utils.tray_utils import egg_mask
+
+REASON_MESSAGES = {
+    "unreadable": "Gambar tidak bisa dibaca.",
+    "too_large": "Resolusi gambar terlalu besar.",
+    "blur": "Foto terlalu buram, pastikan kamera fokus.",
+    "dark": "Foto terlalu gelap, tambah pencahayaan.",
+    "bright": "Foto terlalu terang / silau.",
+    "no_egg": "Telur tidak terdeteksi di foto.",
+    "tray_count": "Jumlah telur terdeteksi melebihi kapasitas tray, foto ulang 1 tray saja dalam bingkai.",
+}
+
+
+class ImageRejected(ValueError):
+    """Gambar tidak lolos quality gate; `reason` salah satu key REASON_MESSAGES."""
+
+    def __init__(self, reason, metrics=None):
+        super().__init__(REASON_MESSAGES.get(reason, reason))
+        self.reason = reason
+        self.metrics = metrics or {}
+
+
+_lock = threading.Lock()
+_stats = {"checked": 0, "passed": 0, "rejected": {reason: 0 for reason in REASON_MESSAGES}}
+_timings_ms = deque(maxlen=1000)
+
+
+# =============== DECODE KECIL ===============
+
+def _load_small(image, max_side):
+    if isinstance(image, np.ndarray):
+        arr = image[0] if image.ndim == 4 else image
+        img = Image.fromarray(np.clip(arr, 0, 255).astype("uint8"))
+    elif isinstance(image, Image.Image):
+        img = image.copy()
+    else:
+        return decode_thumbnail(image, max_side)  # JPEG: decode langsung di skala kecil
+    img = img.convert("RGB")
+    img.thumbnail((max_side, max_side), Image.BILINEAR)
+    return img
+
+
+# =============== CEK ===============
+
+def _sharpness(gray):
+    lap = (
+        gray[1:-1, :-2] + gray[1:-1, 2:] + gray[:-2, 1:-1] + gray[2:, 1:-1]
+        - 4.0 * gray[1:-1, 1:-1]
+    )
+    return float(lap.var())
+
+
+def _egg_blob(small):
+    """(area_frac, aspect, fill) blob non-background terhadap elips ekuivalennya."""
+    mask = egg_mask(small)
+    area = int(mask.sum())
+    total = mask.size
+    if area < 10:
+        return 0.0, 0.0, 0.0
+
+    ys, xs = np.nonzero(mask)
+    cov = np.cov(np.stack([xs, ys]).astype("float64"))
+    eig = np.sort(np.linalg.eigvalsh(cov))[::-1]
+    if eig[1] <= 0:
+        return area / total, float("inf"), 0.0
+    # elips dengan kovarians sama punya semi-axis 2*sqrt(eigenvalue)
+    a, b = 2.0 * np.sqrt(eig[0]), 2.0 * np.sqrt(eig[1])
+    return area / total, float(a / b), float(area / (np.pi * a * b))
+
+
+def assess(image, require_egg=None):
+    """
+    Hitung metrik kualitas + alasan penolakan (None kalau lolos).
+    Tidak menaikkan exception dan tidak mengubah statistik.
+    """
+    require_egg = QUALITY_REQUIRE_EGG if require_egg is None else require_egg
+    try:
+        small = _load_small(image, QUALITY_GATE_MAX_SIDE)
+    except ImageTooLarge as e:
+        return "too_large", {"error": str(e)}
+    except Exception as e:
+        return "unreadable", {"error": str(e)}
+
+    rgb = np.asarray(small, dtype="float32")
+    gray = rgb @ np.array([0.299, 0.587, 0.114], dtype="float32")
+    metrics = {
+        "size": list(small.size),
+        "sharpness": round(_sharpness(gray), 2),
+        "brightness": round(float(gray.mean()), 2),
+        "clipped_dark": round(float((gray < 16).mean()), 4),
+        "clipped_bright": round(float((gray > 240).mean()), 4),
+    }
+
+    if metrics["brightness"] < QUALITY_MIN_BRIGHTNESS or metrics["clipped_dark"] > QUALITY_MAX_CLIPPED:
+        return "dark", metrics
+    if metrics["brightness"] > QUALITY_MAX_BRIGHTNESS or metrics["clipped_bright"] > QUALITY_MAX_CLIPPED:
+        return "bright", metrics
+
+    # Cek telur sebelum blur: foto polos tanpa objek juga punya variansi Laplacian rendah.
+    if require_egg:
+        area, aspect, fill = _egg_blob(small)
+        metrics.update(egg_area=round(area, 4), egg_aspect=round(aspect, 3), egg_fill=round(fill, 3))
+        if not (QUALITY_MIN_EGG_AREA <= area <= QUALITY_MAX_EGG_AREA and aspect <= 2.2 and fill >= 0.6):
+            return "no_egg", metrics
+
+    if metrics["sharpness"] < QUALITY_MIN_SHARPNESS:
+        return "blur", metrics
+    return None, metrics
+
+
+def check_image(image, require_egg=None):
+    """
+    Jalankan quality gate; raise ImageRejected kalau gagal.
+    Mengembalikan metrik kalau lolos (atau {} kalau gate dimatikan).
+    """
+    if not QUALITY_GATE_ENABLED:
+        return {}
+    started = time.perf_counter()
+    reason, metrics = assess(image, require_egg=require_egg)
+    elapsed_ms = (time.perf_counter() - started) * 1000.0
+    metrics["gate_ms"] = round(elapsed_ms, 3)
+
+    with _lock:
+        _stats["checked"] += 1
+        _timings_ms.append(elapsed_ms)
+        if reason is None:
+            _stats["passed"] += 1
+        else:
+            _stats["rejected"][reason] += 1
+
+    if reason is not None:
+        raise ImageRejected(reason, metrics)
+    return metrics
+
+
+def get_stats():
+    with _lock:
+        stats = {
+            "checked": _stats["checked"],
+            "passed": _stats["passed"],
+            "rejected": dict(_stats["rejected"]),
+        }
+        timings = sorted(_timings_ms)
+
+    def pct(p):
+        if not timings:
+            return 0.0
+        return round(timings[min(len(timings) - 1, int(round(p / 100.0 * (len(timings) - 1))))], 3)
+
+    rejected = sum(stats["rejected"].values())
+    stats["rejection_rate"] = round(rejected / stats["checked"], 4) if stats["checked"] else 0.0
+    stats["gate_ms"] = {"p50": pct(50), "p95": pct(95), "p99": pct(99)}
+    stats["enabled"] = QUALITY_GATE_ENABLED
+    return stats
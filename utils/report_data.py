@@ -2,6 +2,7 @@
 from datetime import datetime
 from utils.database import get_db_connection
 from utils.dashboard_data import _build_header  # pakai helper yg sama
+from utils.scan_stats import daily_counts, grade_counts
 
 
 def build_report_data(user_id: int):
@@ -27,12 +28,9 @@ def build_report_data(user_id: int):
     try:
         cur = conn.cursor(dictionary=True)
 
-        # Total data
-        cur.execute(
-            "SELECT COUNT(*) AS cnt FROM egg_scans WHERE user_id = %s",
-            (user_id,),
-        )
-        total_scans = cur.fetchone()["cnt"]
+        # Total data & jumlah per grade dari rollup harian (scan_daily_stats)
+        grade_counts_raw = grade_counts(cur, user_id)
+        total_scans = sum(grade_counts_raw.values())
 
         # Records histori (ambil 200 terakhir)
         cur.execute(
@@ -89,17 +87,6 @@ def build_report_data(user_id: int):
         }
 
         # Ringkasan per grade untuk card di bawah grafik
-        cur.execute(
-            """
-            SELECT grade, COUNT(*) AS cnt
-            FROM egg_scans
-            WHERE user_id = %s
-            GROUP BY grade
-            """,
-            (user_id,),
-        )
-        grade_rows = cur.fetchall()
-        grade_counts_raw = {r["grade"]: r["cnt"] for r in grade_rows}
         total_for_pct = sum(grade_counts_raw.values()) or 1
 
         grade_summary = []
@@ -115,20 +102,7 @@ def build_report_data(user_id: int):
             )
 
         # Data untuk grafik: agregasi per tanggal scan
-        cur.execute(
-            """
-            SELECT
-                DATE(scanned_at) AS d,
-                COUNT(*) AS cnt
-            FROM egg_scans
-            WHERE user_id = %s
-            GROUP BY DATE(scanned_at)
-            ORDER BY d ASC
-            LIMIT 14
-            """,
-            (user_id,),
-        )
-        hist_rows = cur.fetchall()
+        hist_rows = daily_counts(cur, user_id, limit=14)
         hist_labels = [
             row["d"].strftime("%d/%m") if isinstance(row["d"], datetime) else str(row["d"])
             for row in hist_rows
@@ -0,0 +1,186 @@
+# utils/scan_stats.py
+"""
+Rollup harian egg_scans: tabel scan_daily_stats per
+(user_id, stat_date, grade, berat_cat).
+
+Dashboard & laporan dulu menghitung COUNT(*), GROUP BY grade dan GROUP BY
+DATE(scanned_at) atas seluruh histori egg_scans di setiap page view (makin
+lama makin berat). Sekarang angka itu dibaca dari rollup yang ukurannya
+sebanding jumlah hari x grade x kategori berat, bukan jumlah telur.
+
+  - Diperbarui di transaksi yang sama dengan INSERT egg_scans
+    (utils/egg_scan_data.insert_egg_scans -> `record_scans`).
+  - Menyimpan jumlah scan, jumlah / total / total kuadrat berat, jadi
+    rata-rata & simpangan baku berat bisa dihitung tanpa membaca egg_scans.
+  - Data yang masuk tanpa helper itu (seed_dummy_data.py, import manual)
+    dikejar dengan `python scan_stats.py rebuild`; `python scan_stats.py check`
+    membandingkan rollup dengan egg_scans.
+
+berat_cat NULL disimpan sebagai '' karena bagian dari primary key.
+"""
+import mysql.connector
+
+from utils.database import get_db_connection
+
+STATS_COLUMNS = "user_id, stat_date, grade, berat_cat, scan_count, weight_count, weight_sum, weight_sq_sum"
+
+# Waktu scan dibagi ke INSERT egg_scans (scanned_at) dan rollup (stat_date),
+# supaya scan menjelang tengah malam tidak tercatat di tanggal berbeda.
+SET_SCANNED_AT_SQL = "SET @eggvision_scanned_at = NOW()"
+
+# 1 baris per telur; executemany menggabungkannya jadi 1 INSERT multi-row.
+# CAST ke DECIMAL(6,2) = pembulatan yang sama dengan kolom egg_scans.berat_telur.
+RECORD_SCAN_SQL = f"""
+    INSERT INTO scan_daily_stats ({STATS_COLUMNS})
+    VALUES (
+        %s, DATE(@eggvision_scanned_at), %s, COALESCE(%s, ''), 1,
+        %s IS NOT NULL,
+        COALESCE(CAST(%s AS DECIMAL(6,2)), 0),
+        COALESCE(CAST(%s AS DECIMAL(6,2)) * CAST(%s AS DECIMAL(6,2)), 0)
+    )
+    ON DUPLICATE KEY UPDATE
+        scan_count = scan_count + VALUES(scan_count),
+        weight_count = weight_count + VALUES(weight_count),
+        weight_sum = weight_sum + VALUES(weight_sum),
+        weight_sq_sum = weight_sq_sum + VALUES(weight_sq_sum)
+"""
+
+# Agregasi ulang dari egg_scans (rebuild & checker)
+AGGREGATE_SQL = """
+    SELECT
+        user_id,
+        DATE(scanned_at) AS stat_date,
+        grade,
+        COALESCE(berat_cat, '') AS berat_cat,
+        COUNT(*) AS scan_count,
+        COUNT(berat_telur) AS weight_count,
+        COALESCE(SUM(berat_telur), 0) AS weight_sum,
+        COALESCE(SUM(berat_telur * berat_telur), 0) AS weight_sq_sum
+    FROM egg_scans
+    WHERE scanned_at IS NOT NULL {user_filter}
+    GROUP BY user_id, DATE(scanned_at), grade, COALESCE(berat_cat, '')
+"""
+
+
+# =============== TULIS ===============
+
+def record_scans(cur, scans):
+    """
+    Tambahkan scan ke rollup. `scans`: list (user_id, grade, berat_cat, berat_telur).
+    Panggil setelah SET_SCANNED_AT_SQL, di transaksi yang sama dengan INSERT egg_scans.
+    """
+    if not scans:
+        return
+    cur.executemany(RECORD_SCAN_SQL, [
+        (user_id, grade, berat_cat, berat, berat, berat, berat)
+        for user_id, grade, berat_cat, berat in scans
+    ])
+
+
+def refill(cur, user_id=None):
+    """Hapus & hitung ulang rollup dari egg_scans (tanpa commit). Return jumlah baris rollup."""
+    params = (user_id,) if user_id is not None else ()
+    user_filter = "AND user_id = %s" if user_id is not None else ""
+    cur.execute(f"DELETE FROM scan_daily_stats WHERE 1 = 1 {user_filter}", params)
+    cur.execute(
+        f"INSERT INTO scan_daily_stats ({STATS_COLUMNS}) "
+        + AGGREGATE_SQL.format(user_filter=user_filter),
+        params,
+    )
+    return cur.rowcount
+
+
+def rebuild(user_id=None):
+    """refill() dalam 1 transaksi; None kalau DB tidak tersedia."""
+    conn = get_db_connection()
+    if not conn:
+        return None
+    try:
+        cur = conn.cursor()
+        rows = refill(cur, user_id)
+        conn.commit()
+        cur.close()
+        return rows
+    except mysql.connector.Error:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+# =============== CEK KONSISTENSI ===============
+
+def _stats_by_key(rows):
+    return {
+        (row[0], row[1], row[2], row[3]): (int(row[4]), int(row[5]), row[6], row[7])
+        for row in rows
+    }
+
+
+def check(user_id=None):
+    """
+    Bandingkan rollup dengan agregasi egg_scans (1 snapshot konsisten).
+    Return list selisih (key, dari_egg_scans, di_rollup), sisi yang tidak
+    punya baris bernilai None; list kosong = konsisten. None kalau DB tidak
+    tersedia.
+    """
+    conn = get_db_connection()
+    if not conn:
+        return None
+    params = (user_id,) if user_id is not None else ()
+    try:
+        conn.start_transaction(consistent_snapshot=True, readonly=True)
+        cur = conn.cursor()
+        cur.execute(
+            AGGREGATE_SQL.format(user_filter="AND user_id = %s" if user_id is not None else ""),
+            params,
+        )
+        expected = _stats_by_key(cur.fetchall())
+        cur.execute(
+            f"SELECT {STATS_COLUMNS} FROM scan_daily_stats "
+            + ("WHERE user_id = %s" if user_id is not None else ""),
+            params,
+        )
+        actual = _stats_by_key(cur.fetchall())
+        cur.close()
+        conn.rollback()
+    finally:
+        conn.close()
+
+    mismatches = []
+    for key in sorted(set(expected) | set(actual), key=str):
+        if expected.get(key) != actual.get(key):
+            mismatches.append((key, expected.get(key), actual.get(key)))
+    return mismatches
+
+
+# =============== BACA (dashboard & laporan) ===============
+
+def grade_counts(cur, user_id):
+    """{grade: jumlah scan} untuk 1 user (cursor dictionary)."""
+    cur.execute(
+        """
+        SELECT grade, SUM(scan_count) AS cnt
+        FROM scan_daily_stats
+        WHERE user_id = %s
+        GROUP BY grade
+        """,
+        (user_id,),
+    )
+    return {row["grade"]: int(row["cnt"]) for row in cur.fetchall()}
+
+
+def daily_counts(cur, user_id, limit=14):
+    """List {"d": tanggal, "cnt": jumlah scan} urut tanggal naik (cursor dictionary)."""
+    cur.execute(
+        """
+        SELECT stat_date AS d, SUM(scan_count) AS cnt
+        FROM scan_daily_stats
+        WHERE user_id = %s
+        GROUP BY stat_date
+        ORDER BY d ASC
+        LIMIT %s
+        """,
+        (user_id, limit),
+    )
+    return cur.fetchall()
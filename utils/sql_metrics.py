@@ -0,0 +1,298 @@
+# utils/sql_metrics.py
+"""
+Statistik query SQL per request: jumlah, waktu, baris, dan deteksi N+1.
+
+Semua cursor dari `get_db_connection()` dibungkus `InstrumentedCursor`
+(lihat PooledConnection.cursor di utils/db_pool.py). Tiap execute dicatat
+sebagai fingerprint (SQL dengan literal/parameter diganti `?`), durasi
+(execute + fetch) dan jumlah baris.
+
+  - Query > SQL_SLOW_QUERY_MS dicetak ke log sebagai slow query.
+  - Di akhir request, fingerprint yang sama dieksekusi >=
+    SQL_N_PLUS_ONE_THRESHOLD kali dicatat sebagai N+1 (query di dalam loop).
+  - Mode debug (app.debug / SQL_DEBUG_HEADERS): response diberi header
+    X-SQL-Queries, X-SQL-Time-Ms, X-SQL-N-Plus-One dan Server-Timing.
+  - Total per endpoint & per fingerprint tersedia di /metrics (`get_stats`).
+
+Query di luar request (thread worker grading, script) tetap masuk statistik
+global dan slow log, tapi tidak ke deteksi N+1.
+"""
+import re
+import threading
+import time
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+
+from config import (
+    SQL_METRICS_ENABLED,
+    SQL_SLOW_QUERY_MS,
+    SQL_N_PLUS_ONE_THRESHOLD,
+    SQL_DEBUG_HEADERS,
+)
+
+# Batas jumlah fingerprint yang disimpan (sisanya digabung), supaya SQL
+# dinamis tidak membuat statistik tumbuh tanpa batas.
+MAX_FINGERPRINTS = 500
+OTHER_FINGERPRINT = "(lainnya)"
+
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_VALUE_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """SQL ternormalisasi: literal & %s -> ?, IN (?, ?, ...) -> (?+), spasi dirapikan."""
+    if isinstance(sql, (bytes, bytearray)):
+        sql = sql.decode("utf-8", errors="replace")
+    sql = _STRING_RE.sub("?", sql).replace("%s", "?")
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _VALUE_LIST_RE.sub("(?+)", sql)
+    return _SPACE_RE.sub(" ", sql).strip().lower()
+
+
+# =============== STATISTIK GLOBAL ===============
+
+_lock = threading.Lock()
+_totals = {"queries": 0, "time_ms": 0.0, "rows": 0, "slow_queries": 0, "n_plus_one": 0, "requests": 0}
+_by_fingerprint = {}
+_by_endpoint = {}
+
+
+def _record_global(fp, duration_ms, rows, slow):
+    with _lock:
+        _totals["queries"] += 1
+        _totals["time_ms"] += duration_ms
+        _totals["rows"] += rows
+        if slow:
+            _totals["slow_queries"] += 1
+        if fp not in _by_fingerprint and len(_by_fingerprint) >= MAX_FINGERPRINTS:
+            fp = OTHER_FINGERPRINT
+        entry = _by_fingerprint.get(fp)
+        if entry is None:
+            entry = _by_fingerprint[fp] = {"count": 0, "time_ms": 0.0, "max_ms": 0.0, "rows": 0, "slow": 0}
+        entry["count"] += 1
+        entry["time_ms"] += duration_ms
+        entry["max_ms"] = max(entry["max_ms"], duration_ms)
+        entry["rows"] += rows
+        if slow:
+            entry["slow"] += 1
+
+
+def _endpoint():
+    if has_request_context():
+        return request.endpoint or request.path
+    return "(background)"
+
+
+class _Query:
+    """1 eksekusi: durasi & baris bertambah selama hasil di-fetch."""
+
+    __slots__ = ("fp", "duration_ms", "rows", "done")
+
+    def __init__(self, fp):
+        self.fp = fp
+        self.duration_ms = 0.0
+        self.rows = 0
+        self.done = False
+
+
+def _request_log():
+    if not has_request_context():
+        return None
+    if "_sql_queries" not in g:
+        g._sql_queries = []
+    return g._sql_queries
+
+
+def _finish(query):
+    """Query selesai (hasil habis dibaca / cursor dipakai lagi / ditutup)."""
+    if query is None or query.done:
+        return
+    query.done = True
+    slow = query.duration_ms >= SQL_SLOW_QUERY_MS
+    if slow:
+        print(f"🐢 Slow query {query.duration_ms:.1f} ms, {query.rows} baris "
+              f"[{_endpoint()}]: {query.fp[:300]}")
+    _record_global(query.fp, query.duration_ms, query.rows, slow)
+
+
+# =============== CURSOR ===============
+
+class InstrumentedCursor:
+    """Proxy ke cursor mysql.connector yang mencatat tiap execute/fetch."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._query = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _timed(self, query, method, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            query.duration_ms += (time.perf_counter() - started) * 1000.0
+
+    def _execute(self, method, operation, *args, **kwargs):
+        _finish(self._query)
+        query = self._query = _Query(fingerprint(operation))
+        log = _request_log()
+        if log is not None:
+            log.append(query)
+        result = self._timed(query, method, operation, *args, **kwargs)
+        if not self._cursor.with_rows:
+            # INSERT/UPDATE/DELETE: tidak ada hasil untuk di-fetch
+            query.rows = max(self._cursor.rowcount, 0)
+            _finish(query)
+        return result
+
+    def execute(self, operation, *args, **kwargs):
+        return self._execute(self._cursor.execute, operation, *args, **kwargs)
+
+    def executemany(self, operation, *args, **kwargs):
+        return self._execute(self._cursor.executemany, operation, *args, **kwargs)
+
+    def fetchone(self):
+        query = self._query
+        if query is None:
+            return self._cursor.fetchone()
+        row = self._timed(query, self._cursor.fetchone)
+        if row is None:
+            _finish(query)
+        else:
+            query.rows += 1
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        query = self._query
+        if query is None:
+            return self._cursor.fetchmany(*args, **kwargs)
+        rows = self._timed(query, self._cursor.fetchmany, *args, **kwargs)
+        query.rows += len(rows)
+        if not rows:
+            _finish(query)
+        return rows
+
+    def fetchall(self):
+        query = self._query
+        if query is None:
+            return self._cursor.fetchall()
+        rows = self._timed(query, self._cursor.fetchall)
+        query.rows += len(rows)
+        _finish(query)
+        return rows
+
+    def close(self):
+        _finish(self._query)
+        return self._cursor.close()
+
+
+def instrument(cursor):
+    return InstrumentedCursor(cursor) if SQL_METRICS_ENABLED else cursor
+
+
+# =============== PER REQUEST ===============
+
+def request_summary(queries=None):
+    """Ringkasan query request aktif: jumlah, total ms, fingerprint N+1."""
+    if queries is None:
+        queries = g.get("_sql_queries") or []
+    counts = Counter(q.fp for q in queries)
+    repeated = {fp: n for fp, n in counts.items() if n >= SQL_N_PLUS_ONE_THRESHOLD}
+    return {
+        "queries": len(queries),
+        "time_ms": sum(q.duration_ms for q in queries),
+        "rows": sum(q.rows for q in queries),
+        "n_plus_one": repeated,
+    }
+
+
+def _add_debug_headers(response):
+    if not (SQL_DEBUG_HEADERS or current_app.debug) or "_sql_queries" not in g:
+        return response
+    summary = request_summary()
+    response.headers["X-SQL-Queries"] = str(summary["queries"])
+    response.headers["X-SQL-Time-Ms"] = f"{summary['time_ms']:.1f}"
+    response.headers["X-SQL-N-Plus-One"] = str(len(summary["n_plus_one"]))
+    response.headers.add("Server-Timing", f"sql;dur={summary['time_ms']:.1f};desc=\"{summary['queries']} query\"")
+    return response
+
+
+def _finish_request(exc=None):
+    queries = g.pop("_sql_queries", None)
+    if queries is None:
+        return
+    for query in queries:
+        _finish(query)  # hasil yang tidak pernah di-fetch sampai habis
+    summary = request_summary(queries)
+
+    endpoint = _endpoint()
+    for fp, count in summary["n_plus_one"].items():
+        print(f"⚠️  N+1 [{endpoint}] {count}x: {fp[:300]}")
+
+    with _lock:
+        _totals["requests"] += 1
+        _totals["n_plus_one"] += len(summary["n_plus_one"])
+        entry = _by_endpoint.get(endpoint)
+        if entry is None:
+            entry = _by_endpoint[endpoint] = {
+                "requests": 0, "queries": 0, "time_ms": 0.0, "max_queries": 0, "n_plus_one": 0,
+            }
+        entry["requests"] += 1
+        entry["queries"] += summary["queries"]
+        entry["time_ms"] += summary["time_ms"]
+        entry["max_queries"] = max(entry["max_queries"], summary["queries"])
+        entry["n_plus_one"] += len(summary["n_plus_one"])
+
+
+def init_app(app):
+    if not SQL_METRICS_ENABLED:
+        return
+    app.after_request(_add_debug_headers)
+    app.teardown_request(_finish_request)
+
+
+def get_stats(top=20):
+    """Total global, per endpoint, dan fingerprint terlama (total waktu)."""
+    with _lock:
+        totals = dict(_totals)
+        endpoints = {name: dict(entry) for name, entry in _by_endpoint.items()}
+        fingerprints = sorted(
+            ((fp, dict(entry)) for fp, entry in _by_fingerprint.items()),
+            key=lambda item: item[1]["time_ms"],
+            reverse=True,
+        )[:top]
+
+    totals["time_ms"] = round(totals["time_ms"], 3)
+    for entry in endpoints.values():
+        entry["avg_queries"] = round(entry["queries"] / entry["requests"], 2)
+        entry["avg_time_ms"] = round(entry["time_ms"] / entry["requests"], 3)
+        entry["time_ms"] = round(entry["time_ms"], 3)
+    top_queries = []
+    for fp, entry in fingerprints:
+        entry.update(
+            fingerprint=fp,
+            avg_ms=round(entry["time_ms"] / entry["count"], 3),
+            time_ms=round(entry["time_ms"], 3),
+            max_ms=round(entry["max_ms"], 3),
+        )
+        top_queries.append(entry)
+    return {
+        "totals": totals,
+        "thresholds": {"slow_query_ms": SQL_SLOW_QUERY_MS, "n_plus_one": SQL_N_PLUS_ONE_THRESHOLD},
+        "endpoints": endpoints,
+        "top_queries": top_queries,
+    }
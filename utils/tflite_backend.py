@@ -0,0 +1,111 @@
+# utils/tflite_backend.py
+"""
+Runtime TFLite untuk model grading (ML_RUNTIME=tflite).
+
+`TFLiteModel` meniru antarmuka `keras.Model.predict` yang dipakai di
+utils/ml_utils.py, jadi jalur prediksi (single, batch, multihead, warm-up)
+tidak perlu tahu backend mana yang aktif. Artefak dibuat oleh
+`python export_tflite.py`.
+"""
+import os
+import threading
+
+import numpy as np
+
+from config import TFLITE_NUM_THREADS
+
+
+def tflite_path(keras_path: str, suffix: str = "int8") -> str:
+    """static/model-keutuhan.keras -> static/model-keutuhan.int8.tflite"""
+    base, _ = os.path.splitext(keras_path)
+    return f"{base}.{suffix}.tflite"
+
+
+def _make_interpreter(path, num_threads):
+    # tflite_runtime jauh lebih ringan dari TensorFlow penuh; pakai kalau ada.
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    return Interpreter(model_path=path, num_threads=num_threads)
+
+
+class TFLiteModel:
+    def __init__(self, path, num_threads=TFLITE_NUM_THREADS, output_names=None):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Artefak TFLite tidak ada: {path} (jalankan export_tflite.py)")
+        self.path = path
+        self._interpreter = _make_interpreter(path, num_threads)
+        self._lock = threading.Lock()  # Interpreter tidak thread-safe
+        self._batch = None
+        self._input = self._interpreter.get_input_details()[0]
+        self._output_index = [
+            d["index"] for d in self._order_outputs(
+                self._interpreter.get_output_details(), output_names
+            )
+        ]
+        self._outputs = self._output_details()
+        self._resize(1)
+
+    @staticmethod
+    def _order_outputs(details, output_names):
+        """Urutkan output multi-head sesuai `output_names` (dicocokkan dari nama tensor)."""
+        if not output_names or len(details) == 1:
+            return details
+        ordered = []
+        for name in output_names:
+            match = [d for d in details if name in d["name"] and d not in ordered]
+            ordered.append(match[0] if match else None)
+        if any(d is None for d in ordered):
+            return details
+        return ordered
+
+    def _resize(self, batch):
+        if batch == self._batch:
+            return
+        shape = list(self._input["shape"])
+        shape[0] = batch
+        self._interpreter.resize_tensor_input(self._input["index"], shape)
+        self._interpreter.allocate_tensors()
+        self._input = self._interpreter.get_input_details()[0]
+        self._outputs = self._output_details()
+        self._batch = batch
+
+    def _output_details(self):
+        by_index = {d["index"]: d for d in self._interpreter.get_output_details()}
+        return [by_index[i] for i in self._output_index]
+
+    def _quantize(self, x):
+        dtype = self._input["dtype"]
+        if dtype in (np.int8, np.uint8):
+            scale, zero_point = self._input["quantization"]
+            info = np.iinfo(dtype)
+            x = np.clip(np.round(x / scale + zero_point), info.min, info.max)
+        return x.astype(dtype)
+
+    @staticmethod
+    def _dequantize(y, detail):
+        if detail["dtype"] in (np.int8, np.uint8):
+            scale, zero_point = detail["quantization"]
+            return (y.astype("float32") - zero_point) * scale
+        return y.astype("float32")
+
+    def predict(self, x, batch_size=None, verbose=0):
+        x = np.asarray(x, dtype="float32")
+        n = x.shape[0]
+        step = batch_size or n or 1
+        chunks = [[] for _ in self._outputs]
+
+        with self._lock:
+            for start in range(0, n, step):
+                part = x[start:start + step]
+                self._resize(part.shape[0])
+                self._interpreter.set_tensor(self._input["index"], self._quantize(part))
+                self._interpreter.invoke()
+                for i, detail in enumerate(self._outputs):
+                    y = self._interpreter.get_tensor(detail["index"])
+                    chunks[i].append(self._dequantize(y, detail))
+
+        outputs = [np.concatenate(c, axis=0) for c in chunks]
+        return outputs[0] if len(outputs) == 1 else outputs
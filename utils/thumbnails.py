@@ -0,0 +1,137 @@
+# utils/thumbnails.py
+"""
+Thumbnail & varian ukuran untuk gambar di static/uploads (scan, products, news).
+
+Halaman dashboard / katalog cukup menampilkan preview kecil, jadi yang
+dikirim ke browser adalah varian berukuran tetap (THUMB_VARIANTS, sisi
+terpanjang dalam px) dalam WebP atau JPEG, bukan foto asli ratusan KB.
+
+Varian dibuat lazy saat pertama diminta (route /media/thumb/...) atau
+langsung setelah upload (`pregenerate_async`), lalu di-cache di disk:
+    static/thumbs/<varian>/<image_path>.<fmt>
+Cache dianggap basi kalau file asli lebih baru (mtime), misalnya gambar
+news/products yang diganti dengan nama sama.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from config import (
+    THUMB_DIR,
+    THUMB_WEBP_QUALITY,
+    THUMB_JPEG_QUALITY,
+)
+from utils.image_decode import open_image, reduce_to
+from utils.upload_storage import STATIC_ROOT, UPLOAD_PREFIX, static_path, wait_saved
+
+# nama varian -> sisi terpanjang (px)
+THUMB_VARIANTS = {"sm": 160, "md": 480, "lg": 960}
+THUMB_FORMATS = {"webp": ("WEBP", "image/webp"), "jpg": ("JPEG", "image/jpeg")}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="eggvision-thumb")
+        return _executor
+
+
+# =============== PATH ===============
+
+def normalize_image_path(src):
+    """
+    image_path relatif ke static/ (mis. "uploads/news/a.jpg") dari image_path,
+    URL "/static/..." atau "static/..."; None kalau bukan gambar upload lokal
+    (URL eksternal, static/img, path mencurigakan).
+    """
+    if not src or "://" in src or src.startswith("//"):
+        return None
+    path = src.split("?", 1)[0].lstrip("/")
+    if path.startswith(f"{STATIC_ROOT}/"):
+        path = path[len(STATIC_ROOT) + 1:]
+    parts = path.split("/")
+    if parts[0] != UPLOAD_PREFIX or len(parts) < 2 or any(p in ("", ".", "..") for p in parts):
+        return None
+    return path
+
+
+def thumb_path(image_path, variant, fmt):
+    return os.path.join(THUMB_DIR, variant, *image_path.split("/")) + f".{fmt}"
+
+
+# =============== GENERATE ===============
+
+# Orientasi EXIF -> transpose (foto HP sering disimpan miring + tag orientasi)
+_EXIF_TRANSPOSE = {
+    2: (Image.FLIP_LEFT_RIGHT,),
+    3: (Image.ROTATE_180,),
+    4: (Image.FLIP_TOP_BOTTOM,),
+    5: (Image.ROTATE_90, Image.FLIP_TOP_BOTTOM),
+    6: (Image.ROTATE_270,),
+    7: (Image.ROTATE_270, Image.FLIP_TOP_BOTTOM),
+    8: (Image.ROTATE_90,),
+}
+
+
+def _render(source_path, max_side, fmt):
+    with open_image(source_path) as img:
+        orientation = img.getexif().get(0x0112, 1)
+        keep_alpha = fmt == "webp" and (img.mode in ("RGBA", "LA") or "transparency" in img.info)
+        # RGB: draft/reduce dulu supaya foto besar tidak di-decode penuh
+        small = img.convert("RGBA") if keep_alpha else reduce_to(img, max_side, max_side)
+    for method in _EXIF_TRANSPOSE.get(orientation, ()):
+        small = small.transpose(method)
+    small.thumbnail((max_side, max_side), Image.LANCZOS)
+    return small
+
+
+def ensure_thumbnail(image_path, variant="sm", fmt="webp"):
+    """
+    Path file varian di disk (dibuat kalau belum ada / basi).
+    Raise FileNotFoundError kalau gambar asli tidak ada, ValueError kalau
+    varian / format tidak dikenal.
+    """
+    if variant not in THUMB_VARIANTS or fmt not in THUMB_FORMATS:
+        raise ValueError(f"Varian thumbnail tidak dikenal: {variant}.{fmt}")
+    source = static_path(image_path)
+    source_mtime = os.path.getmtime(source)  # FileNotFoundError kalau hilang
+    target = thumb_path(image_path, variant, fmt)
+    try:
+        if os.path.getmtime(target) >= source_mtime:
+            return target
+    except OSError:
+        pass
+
+    small = _render(source, THUMB_VARIANTS[variant], fmt)
+    if fmt == "webp":
+        options = {"quality": THUMB_WEBP_QUALITY, "method": 4}
+    else:
+        options = {"quality": THUMB_JPEG_QUALITY, "optimize": True, "progressive": True}
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp_path = f"{target}.{threading.get_ident()}.tmp"
+    small.save(tmp_path, format=THUMB_FORMATS[fmt][0], **options)
+    os.replace(tmp_path, target)
+    return target
+
+
+def _pregenerate(image_path, saving, variants, formats):
+    if saving is not None and not wait_saved(saving):
+        return
+    for variant in variants:
+        for fmt in formats:
+            try:
+                ensure_thumbnail(image_path, variant, fmt)
+            except Exception as e:
+                print(f"[Thumbnails] {image_path} {variant}.{fmt} error: {e}")
+                return
+
+
+def pregenerate_async(image_path, saving=None, variants=("sm", "md"), formats=("webp",)):
+    """Buat varian di background setelah upload (menunggu `saving` kalau ada)."""
+    return _get_executor().submit(_pregenerate, image_path, saving, variants, formats)
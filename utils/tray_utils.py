@@ -0,0 +1,258 @@
+# utils/tray_utils.py
+"""
+Mode tray: deteksi tiap telur di 1 foto tray (mis. 30 butir), crop, lalu
+grading semuanya dalam 1 batch inference.
+
+Deteksi memakai segmentasi klasik (tanpa model tambahan):
+  1. Gambar diperkecil (sisi terpanjang TRAY_DETECT_MAX_SIDE px).
+  2. Warna tray diestimasi dari median piksel pojok gambar; jarak warna tiap
+     piksel ke warna tray di-threshold (Otsu, dibatasi sebaran warna tray)
+     -> mask telur.
+  3. Mask di-erosi supaya telur yang bersentuhan terpisah, lalu diberi label
+     connected component.
+  4. Komponen disaring berdasar luas & rasio sisi (bentuk telur), lalu
+     diurutkan jadi posisi grid A1, A2, ... (baris huruf, kolom angka).
+Pembagian grid tetap (rows x cols) hanya dipakai kalau diminta (mode="grid").
+"""
+from string import ascii_uppercase
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+from config import TRAY_DETECT_MAX_SIDE, TRAY_GRID_ROWS, TRAY_GRID_COLS, TRAY_MAX_EGGS
+from utils.image_decode import decode_reduced
+
+# Tiap crop telur cukup ~2x input model (224 px), sama seperti decode_for_model
+CROP_DECODE_SIDE = 448
+
+
+def decode_tray(source):
+    """
+    Decode foto tray lewat utils.image_decode (batas ML_MAX_IMAGE_PIXELS +
+    draft JPEG): resolusi dikurangi selama tiap sel grid masih >= CROP_DECODE_SIDE.
+    Raise ImageTooLarge / UnidentifiedImageError / OSError.
+    """
+    return decode_reduced(source, TRAY_GRID_COLS * CROP_DECODE_SIDE, TRAY_GRID_ROWS * CROP_DECODE_SIDE)
+
+
+# =============== SEGMENTASI ===============
+
+def _otsu_threshold(values):
+    hist, edges = np.histogram(values, bins=256)
+    hist = hist.astype("float64")
+    centers = (edges[:-1] + edges[1:]) / 2.0
+    weight_bg = np.cumsum(hist)
+    weight_fg = weight_bg[-1] - weight_bg
+    mean_bg = np.cumsum(hist * centers) / np.maximum(weight_bg, 1)
+    total_mean = (hist * centers).sum()
+    mean_fg = (total_mean - np.cumsum(hist * centers)) / np.maximum(weight_fg, 1)
+    between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return centers[int(np.argmax(between))]
+
+
+def egg_mask(small: Image.Image, erode_px: int = 0):
+    """Mask boolean piksel bukan-background (telur) dari gambar kecil RGB."""
+    rgb = np.asarray(small, dtype="float32")
+    # Telur bulat, jadi pojok gambar hampir selalu tray meski telur menyentuh tepi.
+    ch, cw = max(2, rgb.shape[0] // 40), max(2, rgb.shape[1] // 40)
+    border = np.concatenate([
+        rgb[:ch, :cw].reshape(-1, 3), rgb[:ch, -cw:].reshape(-1, 3),
+        rgb[-ch:, :cw].reshape(-1, 3), rgb[-ch:, -cw:].reshape(-1, 3),
+    ], axis=0)
+    tray_color = np.median(border, axis=0)
+    distance = np.sqrt(((rgb - tray_color) ** 2).sum(axis=2))
+
+    # Otsu bisa memisahkan telur putih vs cokelat (bukan telur vs tray) kalau
+    # warnanya campur; batasi dengan sebaran warna tray di pojok gambar.
+    border_distance = np.sqrt(((border - tray_color) ** 2).sum(axis=1))
+    tray_spread = max(3.0 * float(np.median(border_distance)), 20.0)
+    mask = distance > min(_otsu_threshold(distance.ravel()), tray_spread)
+    mask_img = Image.fromarray((mask * 255).astype("uint8"))
+    if erode_px > 0:
+        mask_img = mask_img.filter(ImageFilter.MinFilter(erode_px * 2 + 1))
+    return np.asarray(mask_img) > 127
+
+
+def _row_runs(mask):
+    """Run piksel True per baris: array (row, start, end), end eksklusif, urut raster."""
+    padded = np.zeros((mask.shape[0], mask.shape[1] + 2), dtype="int8")
+    padded[:, 1:-1] = mask
+    diff = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(diff == 1)
+    _, ends = np.nonzero(diff == -1)
+    return rows, starts, ends
+
+
+def _label_components(mask):
+    """
+    Connected component (4-neighbour) berbasis run per baris: union-find hanya
+    atas run (ribuan), bukan per piksel; luas & box dihitung sekali jalan.
+    """
+    rows, starts, ends = _row_runs(mask)
+    n = rows.size
+    if n == 0:
+        return []
+
+    parent = list(range(n))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    # Run di baris y bersambung dengan run di baris y-1 kalau kolomnya overlap
+    bounds = np.searchsorted(rows, np.arange(mask.shape[0] + 1))
+    for y in range(1, mask.shape[0]):
+        a0, a1, b1 = bounds[y - 1], bounds[y], bounds[y + 1]
+        if a0 == a1 or a1 == b1:
+            continue
+        overlap = (
+            (starts[a0:a1, None] < ends[None, a1:b1])
+            & (starts[None, a1:b1] < ends[a0:a1, None])
+        )
+        for i, j in zip(*np.nonzero(overlap)):
+            a, b = find(a0 + i), find(a1 + j)
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+
+    roots = np.array([find(i) for i in range(n)])
+    _, label = np.unique(roots, return_inverse=True)
+    count = int(label.max()) + 1
+
+    area = np.bincount(label, weights=ends - starts, minlength=count)
+    x0 = np.full(count, mask.shape[1])
+    y0 = np.full(count, mask.shape[0])
+    x1 = np.zeros(count, dtype=ends.dtype)
+    y1 = np.zeros(count, dtype=rows.dtype)
+    np.minimum.at(x0, label, starts)
+    np.minimum.at(y0, label, rows)
+    np.maximum.at(x1, label, ends)
+    np.maximum.at(y1, label, rows + 1)
+    return [
+        {"area": int(area[k]), "box": (int(x0[k]), int(y0[k]), int(x1[k]), int(y1[k]))}
+        for k in range(count)
+    ]
+
+
+def _is_egg_shaped(comp, median_area):
+    x0, y0, x1, y1 = comp["box"]
+    w, h = x1 - x0, y1 - y0
+    if w == 0 or h == 0:
+        return False
+    aspect = max(w, h) / min(w, h)
+    fill = comp["area"] / float(w * h)  # elips ideal ~0.785
+    return (
+        0.35 * median_area <= comp["area"] <= 2.5 * median_area
+        and aspect <= 2.0
+        and fill >= 0.5
+    )
+
+
+# =============== POSISI GRID ===============
+
+def _assign_positions(boxes):
+    """Urutkan box jadi baris (atas->bawah) lalu kolom (kiri->kanan): A1, A2, ..."""
+    if not boxes:
+        return []
+    centers = [((b[0] + b[2]) / 2.0, (b[1] + b[3]) / 2.0, b) for b in boxes]
+    centers.sort(key=lambda c: c[1])
+    median_h = float(np.median([b[3] - b[1] for b in boxes]))
+
+    rows, current = [], [centers[0]]
+    for c in centers[1:]:
+        if c[1] - current[-1][1] > 0.5 * median_h:
+            rows.append(current)
+            current = [c]
+        else:
+            current.append(c)
+    rows.append(current)
+
+    positioned = []
+    for r, row in enumerate(rows):
+        row.sort(key=lambda c: c[0])
+        row_name = ascii_uppercase[r] if r < len(ascii_uppercase) else f"R{r + 1}"
+        for col, (_, _, box) in enumerate(row, start=1):
+            positioned.append({"position": f"{row_name}{col}", "box": box})
+    return positioned
+
+
+def grid_boxes(width, height, rows=TRAY_GRID_ROWS, cols=TRAY_GRID_COLS):
+    """Bagi gambar jadi grid tetap rows x cols (hanya untuk mode="grid")."""
+    boxes = []
+    for r in range(rows):
+        for c in range(cols):
+            boxes.append((
+                int(c * width / cols), int(r * height / rows),
+                int((c + 1) * width / cols), int((r + 1) * height / rows),
+            ))
+    return boxes
+
+
+# =============== API ===============
+
+def detect_eggs(img: Image.Image, pad_ratio=0.08):
+    """
+    Kembalikan list {"position", "box"} dengan box di koordinat gambar asli.
+    """
+    img = img.convert("RGB")
+    scale = min(1.0, TRAY_DETECT_MAX_SIDE / float(max(img.size)))
+    small = img if scale >= 1.0 else img.resize(
+        (max(1, int(img.width * scale)), max(1, int(img.height * scale))), Image.BILINEAR
+    )
+
+    erode_px = max(1, int(round(min(small.size) / 100.0)))
+    components = _label_components(egg_mask(small, erode_px))
+    if not components:
+        return []
+
+    # 1 telur tidak mungkin menutupi > 1/4 foto tray (biasanya berarti telur menyatu)
+    max_area = 0.25 * small.width * small.height
+    components = [c for c in components if c["area"] <= max_area]
+    if not components:
+        return []
+    median_area = float(np.median([c["area"] for c in components]))
+    eggs = [c for c in components if _is_egg_shaped(c, median_area)]
+
+    boxes = []
+    for comp in eggs:
+        x0, y0, x1, y1 = comp["box"]
+        # kembalikan bagian yang terkikis erosi + padding, lalu skala ke gambar asli
+        pad_x = erode_px + (x1 - x0) * pad_ratio
+        pad_y = erode_px + (y1 - y0) * pad_ratio
+        boxes.append((
+            max(0, int((x0 - pad_x) / scale)),
+            max(0, int((y0 - pad_y) / scale)),
+            min(img.width, int((x1 + pad_x) / scale)),
+            min(img.height, int((y1 + pad_y) / scale)),
+        ))
+    return _assign_positions(boxes)
+
+
+def locate_eggs(img: Image.Image, mode="auto"):
+    """
+    mode="auto": segmentasi; raise ImageRejected kalau tidak ada telur
+                 terdeteksi ("no_egg") atau jumlahnya tidak masuk akal
+                 (> TRAY_MAX_EGGS, "tray_count"). Tidak jatuh ke grid, supaya
+                 foto tanpa telur tidak menghasilkan baris egg_scans palsu.
+    mode="grid": grid TRAY_GRID_ROWS x TRAY_GRID_COLS, hanya kalau diminta
+                 eksplisit (tray penuh yang posisinya sudah pasti).
+    Mengembalikan (detections, method).
+    """
+    if mode == "grid":
+        return _assign_positions(grid_boxes(img.width, img.height)), "grid"
+
+    from utils.quality_gate import ImageRejected  # quality_gate mengimpor modul ini
+
+    detections = detect_eggs(img)
+    if not detections:
+        raise ImageRejected("no_egg", {"detected": 0})
+    if len(detections) > TRAY_MAX_EGGS:
+        raise ImageRejected("tray_count", {"detected": len(detections)})
+    return detections, "segmentation"
+
+
+def crop_eggs(img: Image.Image, detections):
+    """Crop tiap telur -> list PIL.Image, urutan sama dengan `detections`."""
+    img = img.convert("RGB")
+    return [img.crop(d["box"]) for d in detections]
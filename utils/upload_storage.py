@@ -0,0 +1,181 @@
+# utils/upload_storage.py
+"""
+Simpan file upload di background supaya tulis disk tidak ada di jalur grading.
+
+Controller membaca bytes dari FileStorage sekali, memanggil
+`store_upload_async` (thread writer), lalu langsung grading dari bytes yang
+sama. Penulisan memakai file sementara + os.replace, jadi file di
+static/uploads tidak pernah terbaca setengah jadi.
+
+Penyimpanan content-addressed: nama file = sha256(bytes), disebar ke folder
+2 level (uploads/ab/cd/abcd....jpg, 65.536 folder) supaya tidak ada 1 folder
+berisi jutaan file. Foto yang sama persis hanya disimpan sekali; jumlah
+referensinya dihitung dari egg_scans.image_path (+ grading_jobs yang belum
+selesai), dan file baru dihapus kalau tidak ada lagi yang mereferensikan.
+File lama (nama asli, flat) dipindahkan dengan `migrate_uploads.py`.
+"""
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import mysql.connector
+
+from config import UPLOAD_WRITE_WORKERS, UPLOAD_WRITE_TIMEOUT_S
+from utils.database import get_db_connection
+
+STATIC_ROOT = "static"
+UPLOAD_PREFIX = "uploads"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=UPLOAD_WRITE_WORKERS, thread_name_prefix="eggvision-upload"
+            )
+        return _executor
+
+
+# =============== PATH CONTENT-ADDRESSED ===============
+
+def _sniff_ext(data: bytes, filename=""):
+    """Ekstensi dari magic bytes (nama file upload bisa salah / kosong)."""
+    if data[:3] == b"\xff\xd8\xff":
+        return ".jpg"
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return ".png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return ".webp"
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == ".jpeg":
+        return ".jpg"
+    return ext if ext in (".jpg", ".png", ".webp", ".gif", ".bmp") else ".bin"
+
+
+def content_image_path(data: bytes, filename=""):
+    """image_path (relatif ke static/, seperti di egg_scans) untuk isi `data`."""
+    digest = hashlib.sha256(data).hexdigest()
+    return f"{UPLOAD_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{_sniff_ext(data, filename)}"
+
+
+def static_path(image_path):
+    """Path di disk untuk image_path relatif ke static/."""
+    return os.path.join(STATIC_ROOT, *image_path.split("/"))
+
+
+# =============== TULIS ===============
+
+def _write(data: bytes, path: str):
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _store(data: bytes, path: str):
+    """True kalau file baru ditulis, False kalau isi yang sama sudah ada (dedup)."""
+    if os.path.exists(path):
+        return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _write(data, path)
+    return True
+
+
+def store_upload_async(data: bytes, filename=""):
+    """
+    Simpan upload secara content-addressed di thread writer.
+    Mengembalikan (image_path, Future); Future bernilai False kalau dedup.
+    """
+    image_path = content_image_path(data, filename)
+    return image_path, _get_executor().submit(_store, data, static_path(image_path))
+
+
+def wait_saved(future, timeout=UPLOAD_WRITE_TIMEOUT_S) -> bool:
+    """Tunggu penulisan selesai (dipanggil sebelum response). False kalau gagal."""
+    try:
+        future.result(timeout=timeout)
+        return True
+    except Exception as e:
+        print(f"[UploadStorage] save error: {e}")
+        return False
+
+
+# =============== REFERENSI & HAPUS ===============
+
+def reference_counts(image_paths):
+    """
+    {image_path: jumlah referensi} dari egg_scans + grading_jobs yang belum
+    selesai. None kalau DB tidak tersedia (anggap masih dipakai).
+    """
+    image_paths = list(dict.fromkeys(image_paths))
+    counts = {path: 0 for path in image_paths}
+    if not image_paths:
+        return counts
+
+    conn = get_db_connection()
+    if not conn:
+        return None
+    try:
+        cur = conn.cursor()
+        for start in range(0, len(image_paths), 500):
+            chunk = image_paths[start:start + 500]
+            marks = ", ".join(["%s"] * len(chunk))
+            cur.execute(
+                f"""
+                SELECT image_path, COUNT(*) FROM egg_scans
+                WHERE image_path IN ({marks}) GROUP BY image_path
+                """,
+                tuple(chunk),
+            )
+            for path, n in cur.fetchall():
+                counts[path] += n
+            cur.execute(
+                f"""
+                SELECT image_path, COUNT(*) FROM grading_jobs
+                WHERE image_path IN ({marks}) AND status IN ('queued', 'running')
+                GROUP BY image_path
+                """,
+                tuple(chunk),
+            )
+            for path, n in cur.fetchall():
+                counts[path] += n
+        cur.close()
+        return counts
+    except mysql.connector.Error as e:
+        print(f"[UploadStorage] refcount error: {e}")
+        return None
+    finally:
+        conn.close()
+
+
+def release_upload(image_path):
+    """Hapus file upload kalau sudah tidak direferensikan; True kalau dihapus."""
+    counts = reference_counts([image_path])
+    if counts is None or counts[image_path] > 0:
+        return False
+    try:
+        os.remove(static_path(image_path))
+        return True
+    except FileNotFoundError:
+        return False
+    except OSError as e:
+        print(f"[UploadStorage] remove error: {e}")
+        return False
+
+
+def discard_upload(future, image_path):
+    """
+    Batalkan / hapus file upload yang ternyata ditolak (mis. quality gate).
+    File hasil dedup (sudah dipakai scan lain) tidak disentuh.
+    """
+    if future.cancel():
+        return
+    if not wait_saved(future) or future.result() is False:
+        return
+    release_upload(image_path)